@@ -1,8 +1,9 @@
+import asyncio
 import os
 from typing import Any, Dict, Optional, Tuple, Union
 
 from dotenv import load_dotenv
-from quart import Quart, send_from_directory
+from quart import Quart, abort, request
 
 # Load environment variables
 load_dotenv()
@@ -10,12 +11,23 @@ load_dotenv()
 
 def create_app(test_config: Optional[Dict[str, Any]] = None) -> Quart:
     """Create and configure the Quart application."""
-    app = Quart(__name__, static_folder="static", static_url_path="")
+    # The built frontend in static/ is served from memory by the routes below
+    app = Quart(__name__, static_folder=None)
 
     # Default configuration
     app.config.from_mapping(
         SECRET_KEY=os.environ.get("SECRET_KEY", "dev"),
         DATABASE=os.path.join(app.instance_path, "adhd_assistant.sqlite"),
+        # Set when several worker processes serve the app against the same database
+        SHARED_STATE=os.environ.get("SHARED_STATE", "") == "1"
+        or int(os.environ.get("WEB_CONCURRENCY", "1")) > 1,
+        # Seconds the elected scheduler leader's lease lasts without renewal
+        LEADER_LEASE_SECONDS=15.0,
+        # At most this many task check-ins are scheduled to come due per minute
+        CHECKINS_PER_MINUTE=10,
+        # Chat model behind the assistant: "openai", or "fake" for the offline
+        # scripted model (see services/llm.py)
+        LLM_BACKEND=os.environ.get("LLM_BACKEND", "openai"),
     )
 
     if test_config is None:
@@ -31,6 +43,22 @@ def create_app(test_config: Optional[Dict[str, Any]] = None) -> Quart:
     except OSError:
         pass
 
+    # Serialize responses and parse request bodies with the fastest available JSON encoder
+    from app.backend.services import json_provider
+
+    json_provider.init_app(app)
+
+    # Time every request (registered first, so the timing covers the other hooks too)
+    # and expose the measurements at /api/metrics
+    from app.backend.services import metrics
+
+    metrics.init_app(app)
+
+    # Web search for the assistant's web_search tool (see services/search.py)
+    from app.backend.services import search
+
+    search.init_app(app)
+
     # Register blueprints
     from app.backend.blueprints import assistant, checkins, goals, tasks
 
@@ -39,19 +67,94 @@ def create_app(test_config: Optional[Dict[str, Any]] = None) -> Quart:
     app.register_blueprint(checkins.bp)
     app.register_blueprint(assistant.bp)
 
-    # Initialize scheduler on startup
+    tasks.checkin_schedule.configure(app.config["CHECKINS_PER_MINUTE"])
+    assistant.configure(app.config)
+
+    # Persist tasks, goals and check-ins in the SQLite database
+    from app.backend.services import database, stores
+
+    database.init_app(
+        app, {"tasks": stores.tasks, "goals": stores.goals, "checkins": stores.checkins}
+    )
+
+    # Other workers use the assistant tools' files as well
+    if app.config["SHARED_STATE"]:
+        from app.backend.services.tools import use_shared_storage
+
+        use_shared_storage()
+
+    # Initialize scheduler on startup, with jobs kept in the database, and bring
+    # check-in jobs in line with the stored tasks
     @app.before_serving
     async def init_scheduler() -> None:
+        from app.backend.services.checkin_jobs import reconcile_checkins
+        from app.backend.services.leader import LeaderLease, campaign
         from app.backend.services.tools import initialize_scheduler
 
-        await initialize_scheduler()
+        database = app.extensions["database"]
+        if not app.config["SHARED_STATE"]:
+            await initialize_scheduler(app.config["DATABASE"])
+            await reconcile_checkins(database)
+            return
+
+        # Every worker adds and removes jobs, but only the elected leader runs them
+        scheduler = await initialize_scheduler(app.config["DATABASE"], paused=True)
+
+        async def on_elected() -> None:
+            scheduler.resume()
+            await reconcile_checkins(database)
+
+        async def on_deposed() -> None:
+            scheduler.pause()
+
+        async def while_leading() -> None:
+            # Notice jobs other workers added since the scheduler last looked
+            scheduler.wakeup()
+            await database.prune_changes()
+
+        lease = LeaderLease(app.config["DATABASE"], "scheduler", app.config["LEADER_LEASE_SECONDS"])
+        app.extensions["scheduler_campaign"] = asyncio.create_task(
+            campaign(lease, on_elected, on_deposed, while_leading)
+        )
+
+    @app.after_serving
+    async def stop_scheduler() -> None:
+        from app.backend.services.tools import shutdown_scheduler
+
+        campaign_task = app.extensions.pop("scheduler_campaign", None)
+        if campaign_task is not None:
+            campaign_task.cancel()
+            try:
+                await campaign_task
+            except asyncio.CancelledError:
+                pass
+        await shutdown_scheduler()
+
+    # Write pending tool data to disk on shutdown
+    @app.after_serving
+    async def flush_tool_stores() -> None:
+        from app.backend.services.tools import flush_stores
+
+        await flush_stores()
+
+    # Hold the built frontend in memory, compressed, once serving starts
+    from app.backend.services.static_assets import StaticAssets
+
+    static_assets = StaticAssets(os.path.join(app.root_path, "static"))
+
+    @app.before_serving
+    async def load_static_assets() -> None:
+        await asyncio.to_thread(static_assets.load)
 
     # Serve static files
     @app.route("/assets/<path:filename>")
     async def serve_static(filename: str) -> Any:
-        return await send_from_directory(os.path.join(app.static_folder, "assets"), filename)
+        asset = static_assets.get(f"assets/{filename}")
+        if asset is None:
+            abort(404)
+        return static_assets.response(asset, request)
 
-    # Serve the frontend index.html for all routes except /api
+    # Serve the frontend's files, and index.html for all other routes except /api
     @app.route("/", defaults={"path": ""})
     @app.route("/<path:path>")
     async def serve_frontend(path: str) -> Union[Tuple[Dict[str, str], int], Any]:
@@ -59,8 +162,13 @@ def create_app(test_config: Optional[Dict[str, Any]] = None) -> Quart:
         if path.startswith("api/"):
             return {"error": "API endpoint not found"}, 404
 
-        # Serve the frontend index.html for all other routes
-        return await send_from_directory(app.static_folder, "index.html")
+        asset = static_assets.get(path or "index.html")
+        if asset is None and "." not in path.rsplit("/", 1)[-1]:
+            # A client-side route
+            asset = static_assets.get("index.html")
+        if asset is None:
+            abort(404)
+        return static_assets.response(asset, request)
 
     # API routes will be added here
     @app.route("/api/health")
@@ -1,84 +1,360 @@
-import os
-
-from langchain.agents import AgentExecutor, create_openai_functions_agent
-from langchain.memory import ConversationBufferMemory
-from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain.tools import Tool
-from langchain_openai import ChatOpenAI
-from quart import Blueprint, jsonify, request
-
-# Import the actual tool implementations
-from app.backend.services.tools import (
-    get_memory,
-    mark_task_done,
-    schedule_goal,
-    store_memory,
-    web_search,
+import asyncio
+import logging
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncGenerator,
+    AsyncIterator,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
 )
 
-bp = Blueprint('assistant', __name__, url_prefix='/api/assistant')
-
-# Initialize the LLM
-llm = ChatOpenAI(model="gpt-4-turbo-preview", temperature=0.7, api_key=os.getenv("OPENAI_API_KEY"))
-
-# Initialize conversation memory
-memory = ConversationBufferMemory(memory_key="chat_history", return_messages=True)
-
-# Define tools with actual implementations
-tools = [
-    Tool(
-        name="schedule_goal",
-        func=schedule_goal,
-        description="Break down a goal into steps and schedule them",
-    ),
-    Tool(name="mark_task_done", func=mark_task_done, description="Mark a task or step as complete"),
-    Tool(
-        name="store_memory", func=store_memory, description="Store a memory in the long-term memory"
-    ),
-    Tool(name="get_memory", func=get_memory, description="Retrieve a memory from long-term memory"),
-    Tool(
-        name="web_search", func=web_search, description="Search the web for real-time information"
-    ),
-]
-
-# Create the agent prompt
-prompt = ChatPromptTemplate.from_messages(
-    [
-        (
-            "system",
-            """You are an ADHD Productivity Assistant. Your goal is to help users manage their tasks, 
-    stay focused, and maintain productivity. You can:
-    1. Break down goals into manageable steps
-    2. Schedule tasks and set reminders
-    3. Store and retrieve important information
-    4. Search the web for relevant information
-    
-    Always be supportive, clear, and concise in your responses.""",
-        ),
-        MessagesPlaceholder(variable_name="chat_history"),
-        ("human", "{input}"),
-        MessagesPlaceholder(variable_name="agent_scratchpad"),
-    ]
+from quart import Blueprint, Response, current_app, jsonify, request
+from quart.wrappers.response import IterableBody
+
+from app.backend.services.admission import (
+    AdmissionControl,
+    DeadlineExceeded,
+    Overloaded,
+    retry_after_header,
 )
+from app.backend.services.response_cache import ResponseCache
+from app.backend.services.sessions import SessionMemory, SessionStore
+from app.backend.services.sse import format_sse
+from app.backend.services.tools import state_change_listeners
+
+if TYPE_CHECKING:
+    from langchain_core.messages import BaseMessage
+
+    from app.backend.services.agent import Agent
+
+logger = logging.getLogger(__name__)
+
+bp = Blueprint("assistant", __name__, url_prefix="/api/assistant")
+
+# The LangChain agent, built from `agent_config` on first use (or by the warm-up
+# hook) and then shared by all requests
+agent_config: Mapping[str, Any] = {}
+_agent: Optional["Agent"] = None
+_agent_lock = asyncio.Lock()
+
+
+def _build_agent(config: Mapping[str, Any]) -> "Agent":
+    # Imports LangChain; run in a thread so the event loop keeps serving meanwhile
+    from app.backend.services.agent import Agent
+
+    return Agent(config)
+
+
+async def get_agent() -> "Agent":
+    """The assistant's agent, building it first if this is the first use."""
+    global _agent
+    if _agent is None:
+        async with _agent_lock:
+            if _agent is None:
+                started = time.perf_counter()
+                _agent = await asyncio.to_thread(_build_agent, agent_config)
+                logger.info("Built the assistant agent in %.2fs", time.perf_counter() - started)
+    return _agent
+
+
+@bp.before_app_serving
+async def warm_up_agent() -> None:
+    """With ASSISTANT_WARMUP set, build the agent in the background at startup."""
+    if current_app.config.get("ASSISTANT_WARMUP"):
+        current_app.add_background_task(get_agent)
+
+
+async def summarize_history(summary: str, messages: List["BaseMessage"]) -> str:
+    """Fold older conversation messages into the running summary."""
+    agent = await get_agent()
+    return await agent.summarize(summary, messages)
+
+
+# Tools whose calls change state; answers from turns that used them are not cached
+STATE_CHANGING_TOOLS = {"schedule_goal", "mark_task_done", "store_memory"}
+
+# Per-session conversation memory, the response cache and the limits on concurrent
+# agent runs, set up from the app config by `configure`
+sessions = SessionStore()
+response_cache: Optional[ResponseCache] = ResponseCache()
+admission = AdmissionControl()
+request_timeout = 120.0
+
+
+def configure(config: Mapping[str, Any]) -> None:
+    """Set up the agent, session memory, response cache and limits from the app config."""
+    global agent_config, _agent, sessions, response_cache, admission, request_timeout
+    agent_config = config
+    _agent = None
+    sessions = SessionStore(
+        max_sessions=config.get("ASSISTANT_MAX_SESSIONS", 1000),
+        idle_seconds=config.get("ASSISTANT_SESSION_IDLE_SECONDS", 3600),
+        history_tokens=config.get("ASSISTANT_HISTORY_TOKENS", 2000),
+        summarizer=summarize_history if config.get("ASSISTANT_SUMMARIZE_HISTORY") else None,
+    )
+    response_cache = None
+    if config.get("ASSISTANT_CACHE_ENABLED", True):
+        response_cache = ResponseCache(
+            max_entries=config.get("ASSISTANT_CACHE_MAX_ENTRIES", 1024),
+            ttl_seconds=config.get("ASSISTANT_CACHE_TTL_SECONDS", 600),
+            similarity_threshold=config.get("ASSISTANT_CACHE_SIMILARITY", 0.92),
+        )
+    admission = AdmissionControl(
+        max_concurrent=config.get("ASSISTANT_MAX_CONCURRENT", 8),
+        max_queue=config.get("ASSISTANT_MAX_QUEUE", 64),
+        max_queue_per_client=config.get("ASSISTANT_MAX_QUEUE_PER_CLIENT", 8),
+    )
+    request_timeout = config.get("ASSISTANT_REQUEST_TIMEOUT_SECONDS", 120.0)
+
+
+def invalidate_response_cache() -> None:
+    if response_cache is not None:
+        response_cache.invalidate()
+
+
+state_change_listeners.append(invalidate_response_cache)
+
+
+def use_cache(data: Dict[str, Any], session: SessionMemory) -> Optional[ResponseCache]:
+    """
+    The response cache, unless it is disabled, the request opted out or the session has
+    history. Cached answers are keyed by the message alone, so they are only used for
+    (and taken from) the first message of a conversation, which nothing earlier shaped.
+    """
+    if data.get("cache", True) is False or session.has_history:
+        return None
+    return response_cache
+
 
-# Create the agent
-agent = create_openai_functions_agent(llm, tools, prompt)
-agent_executor = AgentExecutor(agent=agent, tools=tools, memory=memory, verbose=True)
+def cache_response(
+    cache: Optional[ResponseCache], message: str, response: Dict[str, Any], generation: int
+) -> None:
+    """Cache an agent answer unless producing it changed state."""
+    if cache is None:
+        return
+    if any(action.tool in STATE_CHANGING_TOOLS for action, _ in response["intermediate_steps"]):
+        return
+    cache.put(message, response["output"], generation)
 
 
-@bp.route('/message', methods=['POST'])
-async def handle_message():
+def get_session_id(data: Dict[str, Any]) -> str:
+    """
+    Session ID from the request body or the X-Session-ID header.
+
+    Requests without one start a new session of their own, so anonymous callers never
+    share a history (or wait on each other's turns); the ID is sent back for the next turn.
+    """
+    session_id = data.get("session_id") or request.headers.get("X-Session-ID")
+    return str(session_id) if session_id else uuid.uuid4().hex
+
+
+def get_client_id() -> str:
+    """The client a request is queued under for fairness: its address."""
+    return request.remote_addr or "unknown"
+
+
+def get_deadline() -> float:
+    """
+    The request's deadline as a `time.monotonic()` value: `request_timeout` seconds
+    from now, or sooner if the client sent a shorter X-Request-Timeout.
+    """
+    timeout = request_timeout
+    header = request.headers.get("X-Request-Timeout")
+    if header is not None:
+        try:
+            timeout = min(timeout, float(header))
+        except ValueError:
+            pass
+    return time.monotonic() + timeout
+
+
+@asynccontextmanager
+async def hold_session(session: SessionMemory, deadline: float) -> AsyncIterator[None]:
+    """
+    Hold the session's lock for the block, waiting for the session's previous turn to
+    finish until the deadline at the latest.
+
+    Taken before a slot, so a request waiting on its own session doesn't keep a slot
+    from other sessions.
+    """
+    try:
+        await asyncio.wait_for(session.lock.acquire(), max(0.0, deadline - time.monotonic()))
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded() from None
+    try:
+        yield
+    finally:
+        session.lock.release()
+
+
+def too_many_requests(error: Overloaded) -> Response:
+    response = jsonify({"error": "Too many requests, try again later", "status": "error"})
+    response.status_code = 429
+    response.headers["Retry-After"] = retry_after_header(error.retry_after)
+    return response
+
+
+def deadline_exceeded() -> Tuple[Response, int]:
+    return jsonify({"error": "Request deadline exceeded", "status": "error"}), 504
+
+
+@bp.route("/message", methods=["POST"])
+async def handle_message() -> Union[Response, Tuple[Response, int]]:
     try:
         data = await request.get_json()
-        if not data or 'message' not in data:
-            return jsonify({'error': 'No message provided'}), 400
+        if not data or "message" not in data:
+            return jsonify({"error": "No message provided"}), 400
 
-        user_message = data['message']
+        user_message = data["message"]
+        session_id = get_session_id(data)
+        session = sessions.get(session_id)
+        deadline = get_deadline()
 
-        # Process the message with the agent
-        response = await agent_executor.ainvoke({"input": user_message})
+        async with hold_session(session, deadline):
+            cache = use_cache(data, session)
+            # Cached answers are sent without waiting for a slot
+            output = cache.get(user_message) if cache is not None else None
+            cached = output is not None
+            if output is None:
+                async with admission.admit(get_client_id(), deadline):
+                    # Process the message with the agent, within what is left of the deadline
+                    generation = cache.generation if cache is not None else 0
+                    agent = await get_agent()
+                    response = await asyncio.wait_for(
+                        agent.executor.ainvoke(
+                            {"input": user_message, "chat_history": session.history()}
+                        ),
+                        max(0.0, deadline - time.monotonic()),
+                    )
+                output = response["output"]
+                cache_response(cache, user_message, response, generation)
+            sessions.save_turn(session, user_message, output)
 
-        return jsonify({'response': response['output'], 'status': 'success'})
+        reply = jsonify(
+            {"response": output, "session_id": session_id, "cached": cached, "status": "success"}
+        )
+        reply.headers["X-Session-ID"] = session_id
+        return reply
 
+    except Overloaded as e:
+        return too_many_requests(e)
+    except (DeadlineExceeded, asyncio.TimeoutError):
+        return deadline_exceeded()
     except Exception as e:
-        return jsonify({'error': str(e), 'status': 'error'}), 500
+        return jsonify({"error": str(e), "status": "error"}), 500
+
+
+@bp.route("/message/stream", methods=["POST"])
+async def stream_message() -> Union[Response, Tuple[Response, int]]:
+    """Stream the agent's tokens and tool events as Server-Sent Events."""
+    data = await request.get_json()
+    if not data or "message" not in data:
+        return jsonify({"error": "No message provided"}), 400
+
+    user_message = data["message"]
+    session_id = get_session_id(data)
+    session = sessions.get(session_id)
+
+    client_id = get_client_id()
+    deadline = get_deadline()
+    # Turn the request away now, while it can still get a 429, unless it will be
+    # answered from the cache without a slot
+    cache = use_cache(data, session)
+    if cache is None or cache.get(user_message) is None:
+        try:
+            admission.check(client_id)
+        except Overloaded as e:
+            return too_many_requests(e)
+
+    async def events() -> AsyncGenerator[bytes, None]:
+        try:
+            async for event in run_events():
+                yield event
+        except Overloaded:
+            yield format_sse("error", {"error": "Too many requests", "status": "error"})
+        except DeadlineExceeded:
+            yield format_sse("error", {"error": "Request deadline exceeded", "status": "error"})
+
+    async def run_events() -> AsyncIterator[bytes]:
+        queue: "asyncio.Queue[Optional[Dict[str, Any]]]" = asyncio.Queue()
+        async with hold_session(session, deadline):
+            # Looked up again: an earlier turn of the session may have finished meanwhile
+            cache = use_cache(data, session)
+            output = cache.get(user_message) if cache is not None else None
+            if output is not None:
+                sessions.save_turn(session, user_message, output)
+                yield format_sse(
+                    "done",
+                    {
+                        "response": output,
+                        "session_id": session_id,
+                        "cached": True,
+                        "status": "success",
+                    },
+                )
+                return
+
+            async with admission.admit(client_id, deadline):
+                generation = cache.generation if cache is not None else 0
+                agent = await get_agent()
+                # Loaded along with the agent
+                from app.backend.services.agent import StreamingEventHandler
+
+                run = asyncio.ensure_future(
+                    agent.streaming_executor.ainvoke(
+                        {"input": user_message, "chat_history": session.history()},
+                        config={"callbacks": [StreamingEventHandler(queue)]},
+                    )
+                )
+                # Wake the reader up once the run has finished, however it finished, and
+                # stop it at the deadline
+                run.add_done_callback(lambda _: queue.put_nowait(None))
+                timer = asyncio.get_running_loop().call_later(
+                    max(0.0, deadline - time.monotonic()), run.cancel
+                )
+                try:
+                    while True:
+                        event = await queue.get()
+                        if event is None:
+                            break
+                        yield format_sse(event["event"], event["data"])
+
+                    if run.cancelled():
+                        raise DeadlineExceeded()
+                    if run.exception() is not None:
+                        yield format_sse(
+                            "error", {"error": str(run.exception()), "status": "error"}
+                        )
+                    else:
+                        response = run.result()
+                        cache_response(cache, user_message, response, generation)
+                        sessions.save_turn(session, user_message, response["output"])
+                        yield format_sse(
+                            "done",
+                            {
+                                "response": response["output"],
+                                "session_id": session_id,
+                                "cached": False,
+                                "status": "success",
+                            },
+                        )
+                finally:
+                    timer.cancel()
+                    # The client disconnected (or the stream failed); stop the agent run
+                    if not run.done():
+                        run.cancel()
+
+    response = Response(IterableBody(events()), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    response.headers["X-Session-ID"] = session_id
+    response.timeout = None
+    return response
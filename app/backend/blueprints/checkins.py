@@ -1,82 +1,156 @@
-from quart import Blueprint, request, jsonify
-from datetime import datetime
+import time
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple, Union
+
+from quart import Blueprint, Response, jsonify, request
+from quart.wrappers.response import IterableBody
+
+from app.backend.services.batch import BatchError, apply_batch
+from app.backend.services.due_feed import DueFeed
+from app.backend.services.listing import list_records
+from app.backend.services.records import CheckIn, Status, now, to_status
+from app.backend.services.sse import KEEPALIVE, format_sse
+from app.backend.services.stores import checkins, goals
 
 bp = Blueprint("checkins", __name__, url_prefix="/api/checkins")
 
-# In-memory storage for check-ins (will be replaced with database)
-checkins = []
+# Pushes check-ins to /stream subscribers as they come due, once per task and due time
+due_checkins = DueFeed(checkins, "next_checkin_time", key="task_id")
+
+STREAM_KEEPALIVE_SECONDS = 15
 
 
 @bp.route("/", methods=["GET"])
-async def get_checkins():
-    """Get all check-ins."""
-    return jsonify(checkins)
+async def get_checkins() -> Response:
+    """Get check-ins, optionally filtered, paginated and projected (see `list_records`)."""
+    task_id = request.args.get("task_id", type=int)
+    goal_id = request.args.get("goal_id", type=int)
+    task_ids: Optional[List[int]] = None if task_id is None else [task_id]
+    if goal_id is not None:
+        goal = goals.get(goal_id)
+        goal_tasks = goal["tasks"] if goal is not None else []
+        task_ids = [t for t in (goal_tasks if task_ids is None else task_ids) if t in goal_tasks]
+    ids = None
+    if task_ids is not None:
+        ids = [c["id"] for t in task_ids for c in checkins.find("task_id", t)]
+    return list_records(checkins, ids=ids, depends_on=(goals,) if goal_id is not None else ())
+
+
+def validate_checkin(data: Dict[str, Any]) -> Optional[str]:
+    """Error message for invalid new-check-in data, if any."""
+    if not data.get("task_id"):
+        return "Task ID is required"
+    if "status" in data:
+        try:
+            to_status(data["status"])
+        except ValueError as e:
+            return str(e)
+    return None
+
+
+def new_checkin(data: Dict[str, Any]) -> CheckIn:
+    """Build a check-in record from validated request data."""
+    return CheckIn(
+        task_id=data["task_id"],
+        status=data.get("status", Status.IN_PROGRESS),
+        notes=data.get("notes", ""),
+        created_at=now(),
+        next_checkin_time=data.get("next_checkin_time"),
+    )
+
+
+def checkin_changes(checkin: CheckIn, data: Dict[str, Any]) -> Dict[str, Any]:
+    """The changes an update request makes to a check-in; raises `ValueError` if invalid."""
+    changes: Dict[str, Any] = {
+        key: data[key] for key in ("status", "notes", "next_checkin_time") if key in data
+    }
+    if "status" in changes:
+        changes["status"] = to_status(changes["status"])
+    return changes
 
 
 @bp.route("/", methods=["POST"])
-async def create_checkin():
+async def create_checkin() -> Tuple[Response, int]:
     """Create a new check-in."""
-    data = await request.get_json()
+    data = await request.get_json() or {}
 
     # Validate required fields
-    if not data.get("task_id"):
-        return jsonify({"error": "Task ID is required"}), 400
-
-    # Create check-in object
-    checkin = {
-        "id": len(checkins) + 1,
-        "task_id": data["task_id"],
-        "status": data.get("status", "in_progress"),
-        "notes": data.get("notes", ""),
-        "created_at": datetime.now().isoformat(),
-        "next_checkin_time": data.get("next_checkin_time"),
-    }
+    error = validate_checkin(data)
+    if error:
+        return jsonify({"error": error}), 400
 
-    checkins.append(checkin)
+    checkin = await checkins.insert(new_checkin(data))
     return jsonify(checkin), 201
 
 
+@bp.route("/batch", methods=["POST"])
+async def batch_checkins() -> Tuple[Response, int]:
+    """Create and update many check-ins at once; all operations are applied or none."""
+    data = await request.get_json()
+    try:
+        results, applied = await apply_batch(
+            checkins,
+            (data or {}).get("operations"),
+            "checkin",
+            new_checkin,
+            checkin_changes,
+            validate_checkin,
+        )
+    except BatchError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"results": results}), 200 if applied else 400
+
+
 @bp.route("/<int:checkin_id>", methods=["GET"])
-async def get_checkin(checkin_id):
+async def get_checkin(checkin_id: int) -> Union[Response, Tuple[Response, int]]:
     """Get a specific check-in by ID."""
-    checkin = next((c for c in checkins if c["id"] == checkin_id), None)
+    checkin = checkins.get(checkin_id)
     if checkin is None:
         return jsonify({"error": "Check-in not found"}), 404
     return jsonify(checkin)
 
 
 @bp.route("/task/<int:task_id>", methods=["GET"])
-async def get_task_checkins(task_id):
+async def get_task_checkins(task_id: int) -> Response:
     """Get all check-ins for a specific task."""
-    task_checkins = [c for c in checkins if c["task_id"] == task_id]
+    task_checkins = checkins.find("task_id", task_id)
     return jsonify(task_checkins)
 
 
 @bp.route("/<int:checkin_id>", methods=["PUT"])
-async def update_checkin(checkin_id):
+async def update_checkin(checkin_id: int) -> Union[Response, Tuple[Response, int]]:
     """Update a check-in."""
-    checkin = next((c for c in checkins if c["id"] == checkin_id), None)
+    checkin = checkins.get(checkin_id)
     if checkin is None:
         return jsonify({"error": "Check-in not found"}), 404
 
-    data = await request.get_json()
+    data = await request.get_json() or {}
 
     # Update check-in fields
-    if "status" in data:
-        checkin["status"] = data["status"]
-    if "notes" in data:
-        checkin["notes"] = data["notes"]
-    if "next_checkin_time" in data:
-        checkin["next_checkin_time"] = data["next_checkin_time"]
+    try:
+        changes = checkin_changes(checkin, data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    await checkins.update(checkin_id, changes)
 
     return jsonify(checkin)
 
 
 @bp.route("/due", methods=["GET"])
-async def get_due_checkins():
+async def get_due_checkins() -> Response:
     """Get all check-ins that are due now."""
-    now = datetime.now().isoformat()
-    due_checkins = [
-        c for c in checkins if c.get("next_checkin_time") and c["next_checkin_time"] <= now
-    ]
-    return jsonify(due_checkins)
+    return jsonify(checkins.due("next_checkin_time", time.time()))
+
+
+@bp.route("/stream", methods=["GET"])
+async def stream_due_checkins() -> Response:
+    """Stream check-ins as Server-Sent Events: those already due, then each as it comes due."""
+
+    async def events() -> AsyncGenerator[bytes, None]:
+        async for checkin in due_checkins.subscribe(heartbeat=STREAM_KEEPALIVE_SECONDS):
+            yield KEEPALIVE if checkin is None else format_sse("checkin", checkin)
+
+    response = Response(IterableBody(events()), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    response.timeout = None
+    return response
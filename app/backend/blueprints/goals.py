@@ -1,49 +1,95 @@
-from datetime import datetime
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, Optional, Tuple
 
 from quart import Blueprint, Response, jsonify, request
 
+from app.backend.services.batch import BatchError, apply_batch
+from app.backend.services.goal_progress import GoalProgress
+from app.backend.services.listing import list_records
+from app.backend.services.records import Goal, Status, now, to_status
+from app.backend.services.stores import goals, tasks
+
 bp = Blueprint("goals", __name__, url_prefix="/api/goals")
 
-# In-memory storage for goals (will be replaced with database)
-goals: List[Dict[str, Any]] = []
+# Progress rollups per goal; the tasks blueprint hooks up its repository
+goal_progress = GoalProgress(goals)
 
 
 @bp.route("/", methods=["GET"])
-async def get_goals() -> Tuple[Response, int]:
-    """Get all goals."""
-    return jsonify({"goals": goals}), 200
+async def get_goals() -> Response:
+    """Get goals, optionally filtered, paginated and projected (see `list_records`)."""
+    task_id = request.args.get("task_id", type=int)
+    ids = None
+    if task_id is not None:
+        ids = goal_progress.goals_for_task(task_id)
+    return list_records(goals, key="goals", ids=ids)
+
+
+def validate_goal(data: Dict[str, Any]) -> Optional[str]:
+    """Error message for invalid new-goal data, if any."""
+    if not data.get("title"):
+        return "Title is required"
+    return None
+
+
+def new_goal(data: Dict[str, Any]) -> Goal:
+    """Build a goal record from validated request data."""
+    return Goal(
+        title=data["title"],
+        description=data.get("description", ""),
+        deadline=data.get("deadline"),
+        status=Status.PENDING,
+        created_at=now(),
+        tasks=[],  # List of task IDs associated with this goal
+    )
+
+
+def goal_changes(goal: Goal, data: Dict[str, Any]) -> Dict[str, Any]:
+    """The changes an update request makes to a goal; raises `ValueError` if invalid."""
+    changes: Dict[str, Any] = {}
+    if "title" in data:
+        changes["title"] = data["title"]
+    if "description" in data:
+        changes["description"] = data["description"]
+    if "deadline" in data:
+        changes["deadline"] = data["deadline"]
+    if "status" in data:
+        changes["status"] = to_status(data["status"])
+        if changes["status"] == Status.COMPLETED and not goal["completed_at"]:
+            changes["completed_at"] = now()
+    return changes
 
 
 @bp.route("/", methods=["POST"])
 async def create_goal() -> Tuple[Response, int]:
     """Create a new goal."""
-    data = await request.get_json()
+    data = await request.get_json() or {}
 
     # Validate required fields
-    if not data.get("title"):
-        return jsonify({"error": "Title is required"}), 400
-
-    # Create goal object
-    goal = {
-        "id": len(goals) + 1,
-        "title": data["title"],
-        "description": data.get("description", ""),
-        "deadline": data.get("deadline"),
-        "status": "pending",
-        "created_at": datetime.now().isoformat(),
-        "completed_at": None,
-        "tasks": [],  # List of task IDs associated with this goal
-    }
-
-    goals.append(goal)
+    error = validate_goal(data)
+    if error:
+        return jsonify({"error": error}), 400
+
+    goal = await goals.insert(new_goal(data))
     return jsonify(goal), 201
 
 
+@bp.route("/batch", methods=["POST"])
+async def batch_goals() -> Tuple[Response, int]:
+    """Create and update many goals at once; all operations are applied or none."""
+    data = await request.get_json()
+    try:
+        results, applied = await apply_batch(
+            goals, (data or {}).get("operations"), "goal", new_goal, goal_changes, validate_goal
+        )
+    except BatchError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"results": results}), 200 if applied else 400
+
+
 @bp.route("/<int:goal_id>", methods=["GET"])
 async def get_goal(goal_id: int) -> Tuple[Response, int]:
     """Get a specific goal by ID."""
-    goal = next((g for g in goals if g["id"] == goal_id), None)
+    goal = goals.get(goal_id)
     if goal is None:
         return jsonify({"error": "Goal not found"}), 404
     return jsonify(goal), 200
@@ -52,23 +98,19 @@ async def get_goal(goal_id: int) -> Tuple[Response, int]:
 @bp.route("/<int:goal_id>", methods=["PUT"])
 async def update_goal(goal_id: int) -> Tuple[Response, int]:
     """Update a goal."""
-    goal = next((g for g in goals if g["id"] == goal_id), None)
+    goal = goals.get(goal_id)
     if goal is None:
         return jsonify({"error": "Goal not found"}), 404
 
-    data = await request.get_json()
+    data = await request.get_json() or {}
 
     # Update goal fields
-    if "title" in data:
-        goal["title"] = data["title"]
-    if "description" in data:
-        goal["description"] = data["description"]
-    if "deadline" in data:
-        goal["deadline"] = data["deadline"]
-    if "status" in data:
-        goal["status"] = data["status"]
-        if data["status"] == "completed" and not goal["completed_at"]:
-            goal["completed_at"] = datetime.now().isoformat()
+    try:
+        changes = goal_changes(goal, data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    await goals.update(goal_id, changes)
 
     return jsonify(goal), 200
 
@@ -76,32 +118,44 @@ async def update_goal(goal_id: int) -> Tuple[Response, int]:
 @bp.route("/<int:goal_id>/tasks", methods=["POST"])
 async def add_task_to_goal(goal_id: int) -> Tuple[Response, int]:
     """Add a task to a goal."""
-    goal = next((g for g in goals if g["id"] == goal_id), None)
+    goal = goals.get(goal_id)
     if goal is None:
         return jsonify({"error": "Goal not found"}), 404
 
-    data = await request.get_json()
+    data = await request.get_json() or {}
     task_id = data.get("task_id")
 
     if not task_id:
         return jsonify({"error": "Task ID is required"}), 400
+    if not isinstance(task_id, int):
+        return jsonify({"error": "Task ID must be an integer"}), 400
+    if tasks.get(task_id) is None:
+        return jsonify({"error": "Task not found"}), 404
 
     # Check if task already exists in goal
-    if task_id in goal["tasks"]:
+    if goal_progress.has_task(goal_id, task_id):
         return jsonify({"error": "Task already added to this goal"}), 400
 
-    goal["tasks"].append(task_id)
+    await goals.append(goal_id, "tasks", task_id)
     return jsonify(goal), 200
 
 
+@bp.route("/<int:goal_id>/progress", methods=["GET"])
+async def get_goal_progress(goal_id: int) -> Tuple[Response, int]:
+    """Get a goal's task counts by status, estimated minutes and completion percentage."""
+    progress = goal_progress.progress(goal_id)
+    if progress is None:
+        return jsonify({"error": "Goal not found"}), 404
+    return jsonify({"goal_id": goal_id, **progress}), 200
+
+
 @bp.route("/<int:goal_id>/complete", methods=["POST"])
 async def complete_goal(goal_id: int) -> Tuple[Response, int]:
     """Mark a goal as completed."""
-    goal = next((g for g in goals if g["id"] == goal_id), None)
+    goal = goals.get(goal_id)
     if goal is None:
         return jsonify({"error": "Goal not found"}), 404
 
-    goal["status"] = "completed"
-    goal["completed_at"] = datetime.now().isoformat()
+    await goals.update(goal_id, {"status": Status.COMPLETED, "completed_at": now()})
 
     return jsonify(goal), 200
@@ -1,52 +1,166 @@
-from typing import Dict, List, Optional, Union, Any
-from quart import Blueprint, Response, request, jsonify
-from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from quart import Blueprint, Response, jsonify, request
+
+from app.backend.blueprints.goals import goal_progress
+from app.backend.services.batch import MAX_BATCH_SIZE, BatchError, apply_batch
+from app.backend.services.checkin_jobs import (
+    cancel_checkin,
+    cancel_checkins,
+    schedule_checkin,
+    schedule_checkins,
+)
+from app.backend.services.checkin_schedule import CheckInSchedule
+from app.backend.services.listing import list_records
+from app.backend.services.records import Status, Task, now, to_status
+from app.backend.services.stores import goals, tasks
 
 bp = Blueprint("tasks", __name__, url_prefix="/api/tasks")
 
-# Type definition for a task
-TaskType = Dict[str, Union[int, str, Optional[str]]]
+# Keep the goals' progress rollups up to date as tasks change
+goal_progress.track(tasks)
 
-# In-memory storage for tasks (will be replaced with database)
-tasks: List[TaskType] = []
+# Check-in times, learned from how long tasks take and spread out over time
+checkin_schedule = CheckInSchedule()
+checkin_schedule.track(tasks)
 
 
 @bp.route("/", methods=["GET"])
 async def get_tasks() -> Response:
-    """Get all tasks."""
-    return jsonify(tasks)
+    """Get tasks, optionally filtered, paginated and projected (see `list_records`)."""
+    goal_id = request.args.get("goal_id", type=int)
+    ids = None
+    if goal_id is not None:
+        goal = goals.get(goal_id)
+        ids = goal["tasks"] if goal is not None else []
+    return list_records(tasks, ids=ids, depends_on=(goals,) if goal_id is not None else ())
+
+
+def validate_task(data: Dict[str, Any]) -> Optional[str]:
+    """Error message for invalid new-task data, if any."""
+    if not data.get("title"):
+        return "Title is required"
+    return None
+
+
+def new_task(data: Dict[str, Any]) -> Task:
+    """Build a task record from validated request data."""
+    return Task(
+        title=data["title"],
+        description=data.get("description", ""),
+        estimated_duration=data.get("estimated_duration", 30),  # in minutes
+        status=Status.PENDING,
+        created_at=now(),
+    )
+
+
+def task_changes(task: Task, data: Dict[str, Any]) -> Dict[str, Any]:
+    """The changes an update request makes to a task; raises `ValueError` if invalid."""
+    changes: Dict[str, Any] = {}
+    if "title" in data:
+        changes["title"] = data["title"]
+    if "description" in data:
+        changes["description"] = data["description"]
+    if "estimated_duration" in data:
+        changes["estimated_duration"] = data["estimated_duration"]
+    if "status" in data:
+        changes["status"] = to_status(data["status"])
+        if changes["status"] == Status.IN_PROGRESS and not task["started_at"]:
+            changes["started_at"] = now()
+        elif changes["status"] == Status.COMPLETED and not task["completed_at"]:
+            changes["completed_at"] = now()
+    return changes
 
 
 @bp.route("/", methods=["POST"])
 async def create_task() -> tuple[Response, int]:
     """Create a new task."""
-    data = await request.get_json()
+    data = await request.get_json() or {}
 
     # Validate required fields
-    if not data.get("title"):
-        return jsonify({"error": "Title is required"}), 400
-
-    # Create task object
-    task = {
-        "id": len(tasks) + 1,
-        "title": data["title"],
-        "description": data.get("description", ""),
-        "estimated_duration": data.get("estimated_duration", 30),  # in minutes
-        "status": "pending",
-        "created_at": datetime.now().isoformat(),
-        "started_at": None,
-        "completed_at": None,
-        "check_in_time": None,
-    }
-
-    tasks.append(task)
+    error = validate_task(data)
+    if error:
+        return jsonify({"error": error}), 400
+
+    task = await tasks.insert(new_task(data))
     return jsonify(task), 201
 
 
+@bp.route("/batch", methods=["POST"])
+async def batch_tasks() -> tuple[Response, int]:
+    """Create and update many tasks at once; all operations are applied or none."""
+    data = await request.get_json()
+    # Tasks the batch takes out of progress; their check-ins are cancelled once applied
+    stopped: List[int] = []
+
+    def changes_for(task: Task, update: Dict[str, Any]) -> Dict[str, Any]:
+        changes = task_changes(task, update)
+        new_status = changes.get("status", task["status"])
+        if task["status"] == Status.IN_PROGRESS and new_status != Status.IN_PROGRESS:
+            stopped.append(task["id"])
+        return changes
+
+    try:
+        results, applied = await apply_batch(
+            tasks, (data or {}).get("operations"), "task", new_task, changes_for, validate_task
+        )
+    except BatchError as e:
+        return jsonify({"error": str(e)}), 400
+    if not applied:
+        return jsonify({"results": results}), 400
+
+    await cancel_checkins(stopped)
+    return jsonify({"results": results}), 200
+
+
+@bp.route("/start", methods=["POST"])
+async def start_tasks() -> tuple[Response, int]:
+    """Start many tasks at once and schedule their check-ins."""
+    data = await request.get_json()
+    task_ids = (data or {}).get("task_ids")
+    if not isinstance(task_ids, list):
+        return jsonify({"error": "task_ids must be a list"}), 400
+    if len(task_ids) > MAX_BATCH_SIZE:
+        return jsonify({"error": f"At most {MAX_BATCH_SIZE} tasks per request"}), 400
+
+    found: Dict[int, Task] = {}
+    not_found = []
+    for task_id in task_ids:
+        task = tasks.get(task_id) if isinstance(task_id, int) else None
+        if task is None:
+            not_found.append(task_id)
+        else:
+            found[task_id] = task
+
+    started_at = now()
+    check_in_times = checkin_schedule.plan(list(found.values()), started_at)
+    updates = [
+        (
+            task_id,
+            {
+                "status": Status.IN_PROGRESS,
+                "started_at": started_at,
+                "check_in_time": check_in_time,
+            },
+        )
+        for task_id, check_in_time in zip(found, check_in_times)
+    ]
+    try:
+        started = await tasks.apply_batch([], updates)
+    except BaseException:
+        # Give back the slots held for the check-ins
+        checkin_schedule.restore(tasks, list(found))
+        raise
+    await schedule_checkins(
+        [(task_id, t.astimezone()) for task_id, t in zip(found, check_in_times)]
+    )
+    return jsonify({"tasks": started, "not_found": not_found}), 200
+
+
 @bp.route("/<int:task_id>", methods=["GET"])
 async def get_task(task_id: int) -> tuple[Response, int]:
     """Get a specific task by ID."""
-    task = next((t for t in tasks if t["id"] == task_id), None)
+    task = tasks.get(task_id)
     if task is None:
         return jsonify({"error": "Task not found"}), 404
     return jsonify(task), 200
@@ -55,44 +169,54 @@ async def get_task(task_id: int) -> tuple[Response, int]:
 @bp.route("/<int:task_id>", methods=["PUT"])
 async def update_task(task_id: int) -> tuple[Response, int]:
     """Update a task."""
-    task: Optional[TaskType] = next((t for t in tasks if t["id"] == task_id), None)
+    task: Optional[Task] = tasks.get(task_id)
     if task is None:
         return jsonify({"error": "Task not found"}), 404
 
-    data: Dict[str, Any] = await request.get_json()
+    data: Dict[str, Any] = await request.get_json() or {}
 
     # Update task fields
-    if "title" in data:
-        task["title"] = data["title"]
-    if "description" in data:
-        task["description"] = data["description"]
-    if "estimated_duration" in data:
-        task["estimated_duration"] = data["estimated_duration"]
-    if "status" in data:
-        task["status"] = data["status"]
-        if data["status"] == "in_progress" and not task["started_at"]:
-            task["started_at"] = datetime.now().isoformat()
-        elif data["status"] == "completed" and not task["completed_at"]:
-            task["completed_at"] = datetime.now().isoformat()
-
+    try:
+        changes = task_changes(task, data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    await tasks.update(task_id, changes)
+    if task["status"] != Status.IN_PROGRESS:
+        await cancel_checkin(task_id)
     return jsonify(task), 200
 
 
 @bp.route("/<int:task_id>/start", methods=["POST"])
 async def start_task(task_id: int) -> tuple[Response, int]:
     """Start a task and schedule a check-in."""
-    task: Optional[TaskType] = next((t for t in tasks if t["id"] == task_id), None)
+    task: Optional[Task] = tasks.get(task_id)
     if task is None:
         return jsonify({"error": "Task not found"}), 404
 
-    # Update task status
-    task["status"] = "in_progress"
-    task["started_at"] = datetime.now().isoformat()
+    # Check in when the task is expected to be done
+    started_at = now()
+    [check_in_time] = checkin_schedule.plan([task], started_at)
 
-    # Schedule check-in (for now, just set a time 30 minutes from now)
-    # In a real implementation, this would use a scheduler like APScheduler
-    check_in_time: datetime = datetime.now() + timedelta(minutes=30)
-    task["check_in_time"] = check_in_time.isoformat()
+    # Update task status
+    try:
+        updated = await tasks.update(
+            task_id,
+            {
+                "status": Status.IN_PROGRESS,
+                "started_at": started_at,
+                "check_in_time": check_in_time,
+            },
+        )
+    except BaseException:
+        # Give back the slot held for the check-in
+        checkin_schedule.restore(tasks, [task_id])
+        raise
+    if updated is None:
+        # Deleted meanwhile
+        checkin_schedule.restore(tasks, [task_id])
+        return jsonify({"error": "Task not found"}), 404
+    await schedule_checkin(task_id, check_in_time.astimezone())
 
     return jsonify(task), 200
 
@@ -100,11 +224,11 @@ async def start_task(task_id: int) -> tuple[Response, int]:
 @bp.route("/<int:task_id>/complete", methods=["POST"])
 async def complete_task(task_id: int) -> tuple[Response, int]:
     """Mark a task as completed."""
-    task: Optional[TaskType] = next((t for t in tasks if t["id"] == task_id), None)
+    task: Optional[Task] = tasks.get(task_id)
     if task is None:
         return jsonify({"error": "Task not found"}), 404
 
-    task["status"] = "completed"
-    task["completed_at"] = datetime.now().isoformat()
+    await tasks.update(task_id, {"status": Status.COMPLETED, "completed_at": now()})
+    await cancel_checkin(task_id)
 
     return jsonify(task), 200
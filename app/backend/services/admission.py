@@ -0,0 +1,170 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Optional
+
+from app.backend.services.metrics import Counter, Gauge, registry
+
+admission_active: Gauge = registry.register(
+    Gauge("assistant_admission_active", "Assistant requests being processed.")
+)
+admission_queued: Gauge = registry.register(
+    Gauge("assistant_admission_queued", "Assistant requests waiting for a slot.")
+)
+admission_rejected: Counter = registry.register(
+    Counter(
+        "assistant_admission_rejected_total",
+        "Assistant requests turned away, by reason (queue full or deadline passed).",
+        ("reason",),
+    )
+)
+
+# Weight of the latest run in the running average of run times
+SERVICE_TIME_WEIGHT = 0.2
+
+
+class Overloaded(Exception):
+    """The queue is full; try again after `retry_after` seconds."""
+
+    def __init__(self, retry_after: float) -> None:
+        super().__init__("Too many requests")
+        self.retry_after = retry_after
+
+
+class DeadlineExceeded(Exception):
+    """The request's deadline passed before it got a slot."""
+
+
+class _Waiter:
+    __slots__ = ("future", "deadline")
+
+    def __init__(self, future: "asyncio.Future[None]", deadline: Optional[float]) -> None:
+        self.future = future
+        self.deadline = deadline
+
+
+class AdmissionControl:
+    """
+    Limits how many requests run at once and queues the rest fairly.
+
+    At most `max_concurrent` requests hold a slot. Others wait in a queue per
+    client, and freed slots go to the clients in turn, so one client sending a burst
+    can't starve the others. When `max_queue` requests are waiting, or the client
+    already has `max_queue_per_client`, new requests are rejected with `Overloaded`
+    and a retry delay estimated from the queue depth and the average run time.
+
+    Deadlines are `time.monotonic()` values. A request still waiting at its deadline
+    is dropped with `DeadlineExceeded` instead of being run late.
+    """
+
+    def __init__(
+        self, max_concurrent: int = 8, max_queue: int = 64, max_queue_per_client: int = 8
+    ) -> None:
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_queue_per_client = max_queue_per_client
+        self.active = 0
+        self.queued = 0
+        # Clients with waiting requests, in the order they are next served
+        self._queues: "OrderedDict[str, Deque[_Waiter]]" = OrderedDict()
+        # Running average of how long a request holds its slot, in seconds
+        self._service_time = 1.0
+
+    def retry_after(self) -> float:
+        """Seconds until the requests queued now are likely to have started."""
+        return max(1.0, (self.queued + 1) * self._service_time / self.max_concurrent)
+
+    def check(self, client: str) -> None:
+        """Raise `Overloaded` if a request from `client` could not be queued now."""
+        if self.active < self.max_concurrent and not self.queued:
+            return
+        if (
+            self.queued >= self.max_queue
+            or len(self._queues.get(client, ())) >= self.max_queue_per_client
+        ):
+            admission_rejected.inc(1, "overloaded")
+            raise Overloaded(self.retry_after())
+
+    @asynccontextmanager
+    async def admit(self, client: str, deadline: Optional[float] = None) -> AsyncIterator[None]:
+        """Hold a slot for the duration of the block, waiting for one if needed."""
+        await self._acquire(client, deadline)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            self._service_time += SERVICE_TIME_WEIGHT * (elapsed - self._service_time)
+            self._release()
+
+    async def _acquire(self, client: str, deadline: Optional[float]) -> None:
+        if self.active < self.max_concurrent and not self.queued:
+            self._take()
+            return
+        self.check(client)
+
+        waiter = _Waiter(asyncio.get_running_loop().create_future(), deadline)
+        self._queues.setdefault(client, deque()).append(waiter)
+        self.queued += 1
+        admission_queued.inc()
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        try:
+            done, _ = await asyncio.wait((waiter.future,), timeout=timeout)
+        except asyncio.CancelledError:
+            self._abandon(client, waiter)
+            raise
+        if not done:
+            self._abandon(client, waiter)
+            admission_rejected.inc(1, "deadline")
+            raise DeadlineExceeded()
+        # Dropped by `_dispatch` because the deadline had passed
+        waiter.future.result()
+
+    def _take(self) -> None:
+        self.active += 1
+        admission_active.inc()
+
+    def _release(self) -> None:
+        self.active -= 1
+        admission_active.dec()
+        self._dispatch()
+
+    def _abandon(self, client: str, waiter: _Waiter) -> None:
+        if waiter.future.done():
+            # Handed a slot (or dropped) just as it stopped waiting
+            if not waiter.future.cancelled() and waiter.future.exception() is None:
+                self._release()
+            return
+        waiter.future.cancel()
+        queue = self._queues.get(client)
+        if queue is not None and waiter in queue:
+            queue.remove(waiter)
+            self.queued -= 1
+            admission_queued.dec()
+            if not queue:
+                del self._queues[client]
+
+    def _dispatch(self) -> None:
+        while self.active < self.max_concurrent and self._queues:
+            client, queue = next(iter(self._queues.items()))
+            waiter = queue.popleft()
+            self.queued -= 1
+            admission_queued.dec()
+            # The client's next request waits until every other client had a turn
+            if queue:
+                self._queues.move_to_end(client)
+            else:
+                del self._queues[client]
+
+            if waiter.deadline is not None and waiter.deadline <= time.monotonic():
+                admission_rejected.inc(1, "deadline")
+                waiter.future.set_exception(DeadlineExceeded())
+                continue
+            self._take()
+            waiter.future.set_result(None)
+
+
+def retry_after_header(seconds: float) -> str:
+    return str(math.ceil(seconds))
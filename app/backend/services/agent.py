@@ -0,0 +1,166 @@
+"""
+The assistant's LangChain agent: chat model, tools, prompt and executor.
+
+Importing LangChain takes seconds and a good deal of memory, so this module is
+only imported when the assistant is first used (see `blueprints.assistant.get_agent`).
+"""
+
+import asyncio
+import functools
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional
+
+from langchain.agents import AgentExecutor, create_openai_tools_agent
+from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain.tools import StructuredTool
+from langchain_core.callbacks import AsyncCallbackHandler, BaseCallbackHandler
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+
+from app.backend.services.llm import LLMMetricsHandler, create_llm, model_name
+from app.backend.services.metrics import tool_duration
+
+# Import the actual tool implementations
+from app.backend.services.tools import (
+    get_memory,
+    mark_task_done,
+    schedule_goal,
+    search_memories,
+    store_memory,
+    web_search,
+)
+
+# Limits applied to every tool call
+TOOL_TIMEOUT_SECONDS = 30.0
+TOOL_MAX_CONCURRENCY = 8
+
+
+def async_tool(
+    coroutine: Callable[..., Awaitable[str]],
+    description: str,
+    timeout: float = TOOL_TIMEOUT_SECONDS,
+    max_concurrency: int = TOOL_MAX_CONCURRENCY,
+) -> StructuredTool:
+    """
+    Register a coroutine as an agent tool with a timeout and a concurrency limit.
+
+    The agent runs independent tool calls from one model turn concurrently, so the
+    semaphore bounds how many calls of this tool run at once across all requests.
+    Each call's duration, including the wait for the semaphore, goes to the metrics.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    name = coroutine.__name__
+
+    @functools.wraps(coroutine)
+    async def guarded(*args: Any, **kwargs: Any) -> str:
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            async with semaphore:
+                result = await asyncio.wait_for(coroutine(*args, **kwargs), timeout)
+            outcome = "ok"
+            return result
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            return f"Error: {name} timed out after {timeout:g} seconds."
+        finally:
+            tool_duration.observe(time.perf_counter() - start, name, outcome)
+
+    return StructuredTool.from_function(coroutine=guarded, name=name, description=description)
+
+
+# Define tools with actual implementations
+tools = [
+    async_tool(schedule_goal, "Break down a goal into steps and schedule them"),
+    async_tool(mark_task_done, "Mark a task as complete"),
+    async_tool(store_memory, "Store a memory in the long-term memory"),
+    async_tool(get_memory, "Retrieve a memory from long-term memory"),
+    async_tool(search_memories, "Find long-term memories related to a topic"),
+    async_tool(web_search, "Search the web for real-time information"),
+]
+
+# Create the agent prompt
+prompt = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            """You are an ADHD Productivity Assistant. Your goal is to help users manage their tasks, 
+    stay focused, and maintain productivity. You can:
+    1. Break down goals into manageable steps
+    2. Schedule tasks and set reminders
+    3. Store and retrieve important information
+    4. Search the web for relevant information
+    
+    Always be supportive, clear, and concise in your responses.""",
+        ),
+        MessagesPlaceholder(variable_name="chat_history"),
+        ("human", "{input}"),
+        MessagesPlaceholder(variable_name="agent_scratchpad"),
+    ]
+)
+
+
+class Agent:
+    """
+    The chat model selected by the app config and the agent executors built on it.
+
+    `executor` waits for whole replies; `streaming_executor` has the model stream
+    them, for callers that forward the tokens as they come. The tools agent lets the
+    model request several tool calls in one turn; the executor awaits them
+    concurrently.
+    """
+
+    def __init__(self, config: Mapping[str, Any]) -> None:
+        callbacks: List[BaseCallbackHandler] = [LLMMetricsHandler(model_name(config))]
+        self.llm = create_llm(config, callbacks=callbacks)
+        self.executor = self._executor(config, self.llm)
+        # For streamed replies; the model sends tokens as they are generated
+        self.streaming_executor = self._executor(
+            config, create_llm(config, callbacks=callbacks, streaming=True)
+        )
+
+    @staticmethod
+    def _executor(config: Mapping[str, Any], llm: BaseChatModel) -> AgentExecutor:
+        return AgentExecutor(
+            agent=create_openai_tools_agent(llm, tools, prompt),
+            tools=tools,
+            return_intermediate_steps=True,
+            verbose=config.get("ASSISTANT_VERBOSE", True),
+        )
+
+    async def summarize(self, summary: str, messages: List[BaseMessage]) -> str:
+        """Fold older conversation messages into the running summary."""
+        transcript = "\n".join(f"{message.type}: {message.content}" for message in messages)
+        result = await self.llm.ainvoke(
+            [
+                SystemMessage(
+                    content="Progressively summarize the conversation, keeping the user's goals, "
+                    "tasks, deadlines and preferences. Reply with the new summary only."
+                ),
+                HumanMessage(content=f"Current summary:\n{summary}\n\nNew lines:\n{transcript}"),
+            ]
+        )
+        return str(result.content)
+
+
+class StreamingEventHandler(AsyncCallbackHandler):
+    """Forwards LLM tokens and tool calls from an agent run onto a queue."""
+
+    def __init__(self, queue: "asyncio.Queue[Optional[Dict[str, Any]]]") -> None:
+        self.queue = queue
+
+    async def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        if token:
+            await self.queue.put({"event": "token", "data": {"token": token}})
+
+    async def on_tool_start(
+        self, serialized: Dict[str, Any], input_str: str, **kwargs: Any
+    ) -> None:
+        await self.queue.put(
+            {"event": "tool_start", "data": {"tool": serialized.get("name"), "input": input_str}}
+        )
+
+    async def on_tool_end(self, output: str, **kwargs: Any) -> None:
+        await self.queue.put(
+            {"event": "tool_end", "data": {"tool": kwargs.get("name"), "output": str(output)}}
+        )
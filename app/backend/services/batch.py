@@ -0,0 +1,88 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.backend.services.repository import R, Repository
+
+MAX_BATCH_SIZE = 100_000
+
+# Result status of valid operations in a batch that was rejected because of others
+NOT_APPLIED = 424
+
+
+class BatchError(ValueError):
+    """The batch as a whole is malformed (not a list, too large, ...)."""
+
+
+async def apply_batch(
+    repository: Repository[R],
+    operations: Any,
+    key: str,
+    build: Callable[[Dict[str, Any]], R],
+    changes_for: Callable[[R, Dict[str, Any]], Dict[str, Any]],
+    validate: Callable[[Dict[str, Any]], Optional[str]] = lambda data: None,
+) -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    Validate a list of create/update operations, then apply all of them or none.
+
+    Each operation is `{"op": "create", "data": {...}}` or
+    `{"op": "update", "id": <id>, "data": {...}}`. `validate` checks the data of a
+    create and returns an error message; `build` turns it into a record and
+    `changes_for` turns an update's data into changes for the existing record (raising
+    `ValueError` for invalid data), like the single-record endpoints do.
+
+    Returns one result per operation, in order, and whether the batch was applied.
+    Applied results carry the record under `key`. If any operation is invalid nothing
+    is applied, invalid operations get an `error` and the others `NOT_APPLIED`.
+    """
+    if not isinstance(operations, list):
+        raise BatchError("operations must be a list")
+    if len(operations) > MAX_BATCH_SIZE:
+        raise BatchError(f"At most {MAX_BATCH_SIZE} operations per batch")
+
+    results: List[Dict[str, Any]] = []
+    inserts: List[R] = []
+    updates: List[Tuple[int, Dict[str, Any]]] = []
+    failed = False
+    for index, operation in enumerate(operations):
+        error, status = None, 404
+        op = operation.get("op") if isinstance(operation, dict) else None
+        data = operation.get("data") if isinstance(operation, dict) else None
+        if op not in ("create", "update"):
+            error, status = "op must be 'create' or 'update'", 400
+        elif not isinstance(data, dict):
+            error, status = "data must be an object", 400
+        elif op == "create":
+            error, status = validate(data), 400
+            if error is None:
+                inserts.append(build(data))
+        else:
+            record_id = operation.get("id")
+            record = repository.get(record_id) if isinstance(record_id, int) else None
+            if record is None:
+                error = "Not found"
+            else:
+                try:
+                    updates.append((record["id"], changes_for(record, data)))
+                except ValueError as e:
+                    error, status = str(e), 400
+
+        if error is not None:
+            failed = True
+            results.append({"index": index, "status": status, "error": error})
+        else:
+            results.append({"index": index, "status": 201 if op == "create" else 200})
+
+    if failed:
+        for result in results:
+            if "error" not in result:
+                result["status"] = NOT_APPLIED
+        return results, False
+
+    updated = await repository.apply_batch(inserts, updates)
+    created = iter(inserts)
+    by_id = {record["id"]: record for record in updated}
+    for result, operation in zip(results, operations):
+        if operation["op"] == "create":
+            result[key] = next(created)
+        else:
+            result[key] = by_id[operation["id"]]
+    return results, True
@@ -0,0 +1,196 @@
+import asyncio
+import logging
+import sqlite3
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Tuple
+
+from apscheduler.job import Job
+from apscheduler.jobstores.base import JobLookupError
+from apscheduler.triggers.date import DateTrigger
+
+from app.backend.services import tools
+from app.backend.services.database import Database
+from app.backend.services.records import CheckIn, Status, Task, now
+from app.backend.services.stores import checkins, tasks
+
+logger = logging.getLogger(__name__)
+
+CHECKIN_JOB_PREFIX = "checkin:"
+
+
+def checkin_job_id(task_id: int) -> str:
+    return f"{CHECKIN_JOB_PREFIX}{task_id}"
+
+
+def parse_time(value: str) -> datetime:
+    """Parse an ISO timestamp; naive values are taken to be in local time."""
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo is not None else parsed.astimezone()
+
+
+def new_checkin(task: Task) -> CheckIn:
+    """The check-in record created when a task's check-in comes due."""
+    return CheckIn(
+        task_id=task.id,
+        status=task.status,
+        notes="",
+        created_at=now(),
+        next_checkin_time=task.check_in_time,
+    )
+
+
+async def schedule_checkin(task_id: int, run_at: datetime) -> None:
+    """Schedule (or reschedule) the check-in job for a task."""
+    await schedule_checkins([(task_id, run_at)])
+
+
+def _add_job(task_id: int, run_at: datetime) -> None:
+    assert tools.scheduler is not None
+    tools.scheduler.add_job(
+        fire_checkin,
+        "date",
+        run_date=run_at,
+        id=checkin_job_id(task_id),
+        args=[task_id],
+        executor="asyncio",
+        replace_existing=True,
+        misfire_grace_time=None,
+        coalesce=True,
+    )
+
+
+async def schedule_checkins(rows: List[Tuple[int, datetime]]) -> None:
+    """
+    Schedule (or reschedule) the check-in jobs for many tasks in one job store write.
+
+    The write runs in a worker thread, so the event loop isn't blocked on SQLite.
+    """
+    if tools.scheduler is None or not rows:
+        # Not serving; the startup reconciliation picks the tasks up later
+        return
+    if tools.job_store is None:
+        # Jobs only kept in memory, which doesn't block
+        for task_id, run_at in rows:
+            _add_job(task_id, run_at)
+        return
+    states = _job_states(rows)
+    await asyncio.to_thread(tools.job_store.add_job_states, states)
+    tools.scheduler.wakeup()
+
+
+async def cancel_checkin(task_id: int) -> None:
+    """Remove a task's pending check-in job, if it has one."""
+    await cancel_checkins([task_id])
+
+
+async def cancel_checkins(task_ids: Iterable[int]) -> None:
+    """Remove the pending check-in jobs of many tasks in one job store write."""
+    job_ids = [checkin_job_id(task_id) for task_id in task_ids]
+    if tools.scheduler is None or not job_ids:
+        return
+    if tools.job_store is None:
+        for job_id in job_ids:
+            try:
+                tools.scheduler.remove_job(job_id)
+            except JobLookupError:
+                pass
+        return
+    await asyncio.to_thread(tools.job_store.remove_jobs, job_ids)
+
+
+async def fire_checkin(task_id: int) -> None:
+    """Job body: record a due check-in for a task that is still in progress."""
+    task = tasks.get(task_id)
+    if task is None or task.status != Status.IN_PROGRESS or not task.check_in_time:
+        return
+    # Firing twice for the same check-in time (e.g. after a restart) is a no-op
+    if any(c.next_checkin_time == task.check_in_time for c in checkins.find("task_id", task_id)):
+        return
+    await checkins.insert(new_checkin(task))
+
+
+def _job_states(rows: List[Tuple[int, datetime]]) -> List[Dict[str, Any]]:
+    """Build pickled-job states for check-in jobs, for `SQLiteJobStore.add_job_states`."""
+    assert tools.scheduler is not None
+    timezone = tools.scheduler.timezone
+    states = []
+    for task_id, run_at in rows:
+        run_at = run_at.astimezone(timezone)
+        job = Job(
+            tools.scheduler,
+            id=checkin_job_id(task_id),
+            func=fire_checkin,
+            trigger=DateTrigger(run_date=run_at),
+            executor="asyncio",
+            args=(task_id,),
+            kwargs={},
+            name="fire_checkin",
+            misfire_grace_time=None,
+            coalesce=True,
+            max_instances=1,
+            next_run_time=run_at,
+        )
+        states.append(job.__getstate__())
+    return states
+
+
+async def reconcile_checkins(database: Database) -> Dict[str, int]:
+    """
+    Bring check-in jobs in line with the stored tasks in one pass at startup.
+
+    A single query finds in-progress tasks that have a check-in time but neither a
+    job nor an existing check-in for that time. Check-ins already due are recorded
+    straight away in one transaction; upcoming ones are inserted into the job store in
+    one batch. Jobs for tasks that are no longer in progress are deleted.
+    """
+    assert tools.scheduler is not None and tools.job_store is not None
+    jobs_table = tools.job_store.TABLE
+    prefix_length = len(CHECKIN_JOB_PREFIX)
+
+    def find_missing(conn: sqlite3.Connection) -> List[Tuple[int, str]]:
+        return conn.execute(
+            f"""
+            SELECT t.id, t.check_in_time FROM tasks t
+            WHERE t.status = 'in_progress' AND t.check_in_time IS NOT NULL
+              AND NOT EXISTS (SELECT 1 FROM {jobs_table} j WHERE j.id = ? || t.id)
+              AND NOT EXISTS (
+                SELECT 1 FROM checkins c
+                WHERE c.task_id = t.id AND c.next_checkin_time = t.check_in_time
+              )
+            """,
+            (CHECKIN_JOB_PREFIX,),
+        ).fetchall()
+
+    def remove_stale(conn: sqlite3.Connection) -> int:
+        return conn.execute(
+            f"""
+            DELETE FROM {jobs_table}
+            WHERE substr(id, 1, ?) = ? AND CAST(substr(id, ?) AS INTEGER) NOT IN (
+              SELECT id FROM tasks WHERE status = 'in_progress' AND check_in_time IS NOT NULL
+            )
+            """,
+            (prefix_length, CHECKIN_JOB_PREFIX, prefix_length + 1),
+        ).rowcount
+
+    removed = await database.write(remove_stale)
+    missing = await database.read(find_missing)
+
+    current_time = datetime.now().astimezone()
+    due: List[CheckIn] = []
+    upcoming: List[Tuple[int, datetime]] = []
+    for task_id, check_in_time in missing:
+        run_at = parse_time(check_in_time)
+        if run_at <= current_time:
+            task = tasks.get(task_id)
+            if task is not None:
+                due.append(new_checkin(task))
+        else:
+            upcoming.append((task_id, run_at))
+
+    if due:
+        await checkins.insert_many(due)
+    await schedule_checkins(upcoming)
+
+    summary = {"removed": removed, "due": len(due), "scheduled": len(upcoming)}
+    logger.info("Reconciled check-ins: %s", summary)
+    return summary
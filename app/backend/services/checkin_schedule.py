@@ -0,0 +1,207 @@
+import math
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.backend.services.records import Status, Task
+from app.backend.services.repository import Repository
+
+MINUTE = timedelta(minutes=1)
+# Slots are numbered from here
+_EPOCH = datetime(1970, 1, 1)
+
+# Estimate used for tasks without a usable `estimated_duration`, in minutes
+DEFAULT_ESTIMATE_MINUTES = 30
+# Bounds on the time from starting a task to its check-in, in minutes
+MIN_DELAY_MINUTES = 5
+MAX_DELAY_MINUTES = 120
+# Actual/estimated duration ratios are clamped to this range, so a task left running
+# overnight doesn't skew the model
+MIN_RATIO, MAX_RATIO = 0.25, 4.0
+# The model starts out assuming estimates are right, with the weight of this many tasks
+PRIOR_TASKS = 5
+
+DEFAULT_CHECKINS_PER_MINUTE = 10
+
+
+def _estimate(value: Any) -> float:
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0:
+        return float(value)
+    return DEFAULT_ESTIMATE_MINUTES
+
+
+def _as_time(value: Any) -> Optional[datetime]:
+    """`value` if it is a stored (naive) record time, otherwise `None`."""
+    if isinstance(value, datetime) and value.tzinfo is None:
+        return value
+    return None
+
+
+def _log_ratio(task: Task) -> Optional[float]:
+    """Log of actual over estimated duration for a completed task, or `None`."""
+    if task.status != Status.COMPLETED:
+        return None
+    started, completed = _as_time(task.started_at), _as_time(task.completed_at)
+    if started is None or completed is None or completed <= started:
+        return None
+    ratio = (completed - started) / MINUTE / _estimate(task.estimated_duration)
+    return math.log(min(max(ratio, MIN_RATIO), MAX_RATIO))
+
+
+class CheckInSchedule:
+    """
+    Check-in times computed from how long tasks have taken, spread out over time.
+
+    A started task is checked in on when it is expected to be done: its estimated
+    duration scaled by how much longer (or shorter) than estimated completed tasks
+    took. That ratio is the geometric mean over completed tasks with a `started_at`
+    and `completed_at`, shrunk towards 1 while there are few of them, and is kept
+    up to date incrementally as tasks change.
+
+    Check-in times are also rate limited: time is cut into slots of
+    `1 / checkins_per_minute` minutes, each normally holding the check-in of one
+    in-progress task, and a check-in goes into the first free slot at or after the
+    time it is wanted. Starting many tasks at once then spreads their check-ins out
+    instead of making them all come due together. No check-in is pushed past
+    `MAX_DELAY_MINUTES` after its start, though: once the slots up to then are full,
+    they take a second check-in each (from the wanted time on), then a third, and so on.
+    """
+
+    def __init__(self, checkins_per_minute: int = DEFAULT_CHECKINS_PER_MINUTE) -> None:
+        self._spacing = MINUTE / checkins_per_minute
+        # task id -> log ratio of the completed tasks in the model, and their sum
+        self._samples: Dict[Any, float] = {}
+        self._log_total = 0.0
+        # task id -> check-in time of in-progress tasks, and slot -> how many it holds
+        self._times: Dict[Any, datetime] = {}
+        self._load: Dict[int, int] = {}
+        # (slot, n) for a slot holding n or more -> a later slot to continue looking
+        # for one with fewer than n from
+        self._skip: Dict[Tuple[int, int], int] = {}
+        # Skips from slots before this one are dropped once a plan starts past it
+        self._prune_at = 0
+
+    def configure(self, checkins_per_minute: int) -> None:
+        """Change the rate, re-slotting the check-ins already scheduled."""
+        self._spacing = MINUTE / checkins_per_minute
+        times = self._times
+        self._times, self._load, self._skip = {}, {}, {}
+        self._prune_at = 0
+        for task_id, check_in_time in times.items():
+            self._hold(task_id, check_in_time)
+
+    def track(self, tasks: Repository[Task]) -> None:
+        """Start following changes to `tasks`."""
+        for task in tasks:
+            self._task_changed(task)
+        tasks.listeners.append(self._task_changed)
+        tasks.removal_listeners.append(self._task_removed)
+
+    def ratio(self) -> float:
+        """How many times their estimate tasks are expected to take."""
+        return math.exp(self._log_total / (len(self._samples) + PRIOR_TASKS))
+
+    def plan(self, tasks: Sequence[Task], started_at: datetime) -> List[datetime]:
+        """
+        Check-in times for `tasks` starting at `started_at`, in order.
+
+        Each time's slot is held for its task straight away, so later tasks in the
+        same call (and later calls) are spread around it.
+        """
+        self._prune(self._slot(started_at))
+        ratio = self.ratio()
+        times = []
+        for task in tasks:
+            minutes = _estimate(task.estimated_duration) * ratio
+            delay = min(max(minutes, MIN_DELAY_MINUTES), MAX_DELAY_MINUTES) * MINUTE
+            # From the first slot starting at or after the wanted time, to the last one
+            # starting by the latest check-in time
+            first = -((_EPOCH - started_at - delay) // self._spacing)
+            last = max(first, self._slot(started_at + MAX_DELAY_MINUTES * MINUTE))
+            slot = self._free_slot(first, last)
+            check_in_time = _EPOCH + slot * self._spacing
+            self._release(task.id)
+            self._hold(task.id, check_in_time)
+            times.append(check_in_time)
+        return times
+
+    def restore(self, tasks: Repository[Task], task_ids: Sequence[Any]) -> None:
+        """
+        Undo `plan` for `task_ids` after their update failed: give back the slots held
+        for them and hold the check-in times `tasks` has for them again.
+        """
+        for task_id in task_ids:
+            self._release(task_id)
+            task = tasks.get(task_id)
+            if task is not None:
+                self._task_changed(task)
+
+    def _prune(self, slot: int) -> None:
+        """Drop the skips from slots before `slot`, which searches no longer start at."""
+        if slot < self._prune_at:
+            return
+        self._skip = {key: later for key, later in self._skip.items() if key[0] >= slot}
+        # Check again once the maximum delay has passed, so the cost is spread over
+        # the plans made in between
+        self._prune_at = slot + math.ceil(MAX_DELAY_MINUTES * MINUTE / self._spacing)
+
+    def _free_slot(self, first: int, last: int) -> int:
+        """The first slot from `first` to `last` holding the fewest check-ins."""
+        capacity = 1
+        while True:
+            slot = self._below(first, capacity)
+            if slot <= last:
+                return slot
+            capacity += 1
+
+    def _below(self, slot: int, capacity: int) -> int:
+        """The first slot from `slot` holding fewer than `capacity` check-ins."""
+        passed = []
+        while self._load.get(slot, 0) >= capacity:
+            passed.append(slot)
+            slot = self._skip.get((slot, capacity), slot + 1)
+        # Let later searches jump straight past the full run
+        for full in passed:
+            self._skip[full, capacity] = slot
+        return slot
+
+    def _slot(self, check_in_time: datetime) -> int:
+        return (check_in_time - _EPOCH) // self._spacing
+
+    def _hold(self, task_id: Any, check_in_time: datetime) -> None:
+        self._times[task_id] = check_in_time
+        slot = self._slot(check_in_time)
+        self._load[slot] = self._load.get(slot, 0) + 1
+
+    def _release(self, task_id: Any) -> None:
+        check_in_time = self._times.pop(task_id, None)
+        if check_in_time is None:
+            return
+        slot = self._slot(check_in_time)
+        load = self._load.pop(slot)
+        if load > 1:
+            self._load[slot] = load - 1
+        # Searches already skipping past the slot won't reuse it, which only leaves a
+        # gap in the spacing
+        self._skip.pop((slot, load), None)
+
+    def _task_changed(self, task: Task) -> None:
+        sample = _log_ratio(task)
+        old = self._samples.pop(task.id, None)
+        if old is not None:
+            self._log_total -= old
+        if sample is not None:
+            self._samples[task.id] = sample
+            self._log_total += sample
+
+        check_in_time = _as_time(task.check_in_time)
+        if task.status != Status.IN_PROGRESS or check_in_time is None:
+            self._release(task.id)
+        elif self._times.get(task.id) != check_in_time:
+            self._release(task.id)
+            self._hold(task.id, check_in_time)
+
+    def _task_removed(self, task: Task) -> None:
+        old = self._samples.pop(task.id, None)
+        if old is not None:
+            self._log_total -= old
+        self._release(task.id)
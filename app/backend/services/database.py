@@ -0,0 +1,391 @@
+import asyncio
+import logging
+import os
+import sqlite3
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+from quart import Quart
+
+from app.backend.services.json_provider import dumps, loads
+from app.backend.services.records import Status, to_status
+from app.backend.services.repository import Record, Repository
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+# Where the assistant's tools kept tasks before they moved to the database
+LEGACY_TASKS_FILE = "instance/tasks.json"
+
+# Indexed columns for each table. The full record is kept as JSON in the `data`
+# column (see `Record.to_storage`); these columns are copies of the fields we filter
+# and sort on, in their API form, so times in them are ISO strings.
+TABLES: Dict[str, Tuple[str, ...]] = {
+    "tasks": ("status", "check_in_time"),
+    "goals": ("status",),
+    "checkins": ("task_id", "status", "next_checkin_time"),
+}
+
+
+def _schema() -> str:
+    statements = [
+        "CREATE TABLE IF NOT EXISTS migrations (name TEXT PRIMARY KEY, applied_at TEXT NOT NULL)"
+    ]
+    for table, columns in TABLES.items():
+        column_defs = "".join(f", {column}" for column in columns)
+        statements.append(
+            f"CREATE TABLE IF NOT EXISTS {table} "
+            f"(id INTEGER PRIMARY KEY AUTOINCREMENT{column_defs}, data TEXT NOT NULL)"
+        )
+        for column in columns:
+            statements.append(
+                f"CREATE INDEX IF NOT EXISTS idx_{table}_{column} ON {table} ({column})"
+            )
+    return ";\n".join(statements) + ";"
+
+
+def _change_log_schema(enabled: bool) -> str:
+    """
+    SQL that turns the change log on or off.
+
+    The log is a table of (seq, table, row id) filled by triggers, so every write to
+    the record tables is logged whichever process or statement makes it.
+    """
+    statements = [
+        "CREATE TABLE IF NOT EXISTS changes "
+        "(seq INTEGER PRIMARY KEY AUTOINCREMENT, tbl TEXT NOT NULL, row_id INTEGER NOT NULL)"
+    ]
+    for table in TABLES:
+        for event, row in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+            trigger = f"log_{table}_{event.lower()}"
+            if enabled:
+                statements.append(
+                    f"CREATE TRIGGER IF NOT EXISTS {trigger} AFTER {event} ON {table} BEGIN "
+                    f"INSERT INTO changes (tbl, row_id) VALUES ('{table}', {row}.id); END"
+                )
+            else:
+                statements.append(f"DROP TRIGGER IF EXISTS {trigger}")
+    return ";\n".join(statements) + ";"
+
+
+class Database:
+    """
+    Async facade over the SQLite file at the app's DATABASE path.
+
+    All sqlite3 calls run in worker threads so the event loop is never blocked.
+    Writes go through a single connection guarded by a lock (SQLite has one writer
+    at a time); reads use a small pool of connections that WAL lets run alongside it.
+    SQL for each table is built once and reused, so sqlite3's statement cache keeps
+    the compiled statements around.
+
+    With `shared` set, several processes use the file at once. Every write is logged
+    to a change table and `sync` applies the rows other processes changed to the
+    repositories, so each process's in-memory copy stays current.
+    """
+
+    def __init__(self, path: str, pool_size: int = 4, shared: bool = False) -> None:
+        self.path = path
+        self.pool_size = pool_size
+        self.shared = shared
+        # Last change-log entry reflected in the repositories
+        self.synced_seq = 0
+        self._syncs_started = 0
+        self._sync_lock = asyncio.Lock()
+        self._writer: Optional[sqlite3.Connection] = None
+        self._write_lock = asyncio.Lock()
+        self._readers: "asyncio.Queue[sqlite3.Connection]" = asyncio.Queue()
+        self._sql: Dict[str, Dict[str, str]] = {}
+        for table, columns in TABLES.items():
+            placeholders = ", ".join("?" for _ in columns)
+            assignments = "".join(f"{column} = ?, " for column in columns)
+            self._sql[table] = {
+                "insert": f"INSERT INTO {table} ({', '.join(columns)}, data) "
+                f"VALUES ({placeholders}, ?)",
+                "update": f"UPDATE {table} SET {assignments}data = ? WHERE id = ?",
+                "delete": f"DELETE FROM {table} WHERE id = ?",
+                "load": f"SELECT id, data FROM {table} ORDER BY id",
+            }
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, cached_statements=256)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    def _open(self) -> List[sqlite3.Connection]:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        writer = self._connect()
+        writer.executescript(_schema())
+        writer.executescript(_change_log_schema(self.shared))
+        return [writer] + [self._connect() for _ in range(self.pool_size)]
+
+    async def open(self) -> None:
+        """Open the connections and create the schema if needed."""
+        connections = await asyncio.to_thread(self._open)
+        self._writer = connections[0]
+        for conn in connections[1:]:
+            self._readers.put_nowait(conn)
+
+    async def close(self) -> None:
+        """Close every connection in the pool."""
+        connections = []
+        while not self._readers.empty():
+            connections.append(self._readers.get_nowait())
+        if self._writer is not None:
+            connections.append(self._writer)
+            self._writer = None
+        for conn in connections:
+            await asyncio.to_thread(conn.close)
+
+    async def read(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        """Run `fn` with a pooled read connection in a worker thread."""
+        conn = await self._readers.get()
+        try:
+            return await asyncio.to_thread(fn, conn)
+        finally:
+            self._readers.put_nowait(conn)
+
+    async def write(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        """Run `fn` inside a transaction on the writer connection in a worker thread."""
+        if self._writer is None:
+            raise RuntimeError("Database is not open")
+        writer = self._writer
+
+        def run() -> T:
+            with writer:
+                return fn(writer)
+
+        def run_logged() -> Tuple[T, int, int]:
+            with writer:
+                # Take the write lock up front so no other process writes in between
+                writer.execute("BEGIN IMMEDIATE")
+                before = _last_change(writer)
+                result = fn(writer)
+                return result, before, _last_change(writer)
+
+        async with self._write_lock:
+            if not self.shared:
+                return await asyncio.to_thread(run)
+            result, before, after = await asyncio.to_thread(run_logged)
+        # The repositories already hold this process's own changes
+        if self.synced_seq == before:
+            self.synced_seq = after
+        return result
+
+    def _params(self, table: str, record: Record) -> List[Any]:
+        columns = [record.json_value(column) for column in TABLES[table]]
+        return columns + [dumps(record.to_storage())]
+
+    async def load(self, table: str) -> List[Tuple[int, Dict[str, Any]]]:
+        """Load the rows of a table in ID order, as IDs and dicts of the stored fields."""
+        sql = self._sql[table]["load"]
+
+        def run(conn: sqlite3.Connection) -> List[Tuple[int, Dict[str, Any]]]:
+            return [(row[0], loads(row[1])) for row in conn.execute(sql)]
+
+        return await self.read(run)
+
+    async def insert(self, table: str, record: Record) -> int:
+        """Insert a record and return the ID SQLite assigned to it."""
+        sql = self._sql[table]["insert"]
+        params = self._params(table, record)
+
+        def run(conn: sqlite3.Connection) -> int:
+            return int(conn.execute(sql, params).lastrowid or 0)
+
+        return await self.write(run)
+
+    async def insert_many(self, table: str, records: Sequence[Record]) -> List[int]:
+        """Insert records in a single transaction and return their IDs in order."""
+        sql = self._sql[table]["insert"]
+        params = [self._params(table, record) for record in records]
+
+        def run(conn: sqlite3.Connection) -> List[int]:
+            return [int(conn.execute(sql, p).lastrowid or 0) for p in params]
+
+        return await self.write(run)
+
+    async def write_batch(
+        self, table: str, inserts: Sequence[Record], updates: Sequence[Record]
+    ) -> List[int]:
+        """Insert and update records in a single transaction; returns the new IDs in order."""
+        sql = self._sql[table]
+        insert_params = [self._params(table, record) for record in inserts]
+        update_params = [self._params(table, record) + [record["id"]] for record in updates]
+
+        def run(conn: sqlite3.Connection) -> List[int]:
+            ids = [int(conn.execute(sql["insert"], p).lastrowid or 0) for p in insert_params]
+            conn.executemany(sql["update"], update_params)
+            return ids
+
+        return await self.write(run)
+
+    async def update(self, table: str, record: Record) -> None:
+        """Persist the current state of a record."""
+        sql = self._sql[table]["update"]
+        params = self._params(table, record) + [record["id"]]
+        await self.write(lambda conn: conn.execute(sql, params))
+
+    async def delete(self, table: str, record_id: int) -> None:
+        """Delete a record by ID."""
+        sql = self._sql[table]["delete"]
+        await self.write(lambda conn: conn.execute(sql, (record_id,)))
+
+    async def bind(self, repositories: Dict[str, Repository]) -> None:
+        """Load every table into its repository and start syncing from the current log."""
+        self.synced_seq = await self.read(_last_change)
+        for table, repository in repositories.items():
+            await repository.bind(self, table)
+
+    def _read_changes(
+        self, conn: sqlite3.Connection, since: int
+    ) -> Tuple[int, Optional[Dict[str, Dict[int, Optional[Dict[str, Any]]]]]]:
+        rows = conn.execute(
+            "SELECT seq, tbl, row_id FROM changes WHERE seq > ? ORDER BY seq", (since,)
+        ).fetchall()
+        if not rows:
+            return since, {}
+        if rows[0][0] != since + 1:
+            # Entries we have not seen were pruned; the caller has to reload everything
+            return rows[-1][0], None
+        changed: Dict[str, Dict[int, Optional[Dict[str, Any]]]] = {}
+        for _, table, row_id in rows:
+            changed.setdefault(table, {})[row_id] = None
+        for table, records in changed.items():
+            ids = list(records)
+            for start in range(0, len(ids), 500):
+                chunk = ids[start : start + 500]
+                placeholders = ", ".join("?" for _ in chunk)
+                for row_id, data in conn.execute(
+                    f"SELECT id, data FROM {table} WHERE id IN ({placeholders})", chunk
+                ):
+                    records[row_id] = {"id": row_id, **loads(data)}
+        return rows[-1][0], changed
+
+    async def sync(self, repositories: Dict[str, Repository]) -> None:
+        """
+        Apply rows changed by other processes to the repositories.
+
+        Concurrent callers share work: a caller waiting for the lock returns as soon as
+        a sync that started after it arrived has finished.
+        """
+        if not self.shared:
+            return
+        arrival = self._syncs_started
+        async with self._sync_lock:
+            if self._syncs_started > arrival:
+                return
+            self._syncs_started += 1
+            seq, changed = await self.read(lambda conn: self._read_changes(conn, self.synced_seq))
+            if changed is None:
+                await self.bind(repositories)
+                return
+            for table, records in changed.items():
+                if table in repositories:
+                    repositories[table].refresh(records)
+            self.synced_seq = max(self.synced_seq, seq)
+
+    async def prune_changes(self, keep: int = 100_000) -> int:
+        """Drop all but the newest `keep` change-log entries."""
+        return await self.write(
+            lambda conn: conn.execute(
+                "DELETE FROM changes WHERE seq <= (SELECT max(seq) FROM changes) - ?", (keep,)
+            ).rowcount
+        )
+
+
+def _last_change(conn: sqlite3.Connection) -> int:
+    row = conn.execute("SELECT max(seq) FROM changes").fetchone()
+    return int(row[0] or 0)
+
+
+def migrate_tasks_json(conn: sqlite3.Connection, path: str) -> int:
+    """
+    Import tasks from the legacy `instance/tasks.json` document.
+
+    Runs once per database; returns the number of tasks imported.
+    """
+    if conn.execute("SELECT 1 FROM migrations WHERE name = 'tasks_json'").fetchone():
+        return 0
+
+    legacy_tasks: List[Dict[str, Any]] = []
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            legacy_tasks = loads(f.read()).get("tasks", [])
+
+    rows = []
+    for legacy in legacy_tasks:
+        steps = legacy.get("steps") or []
+        try:
+            status = to_status(legacy.get("status", Status.PENDING))
+        except ValueError:
+            status = Status.PENDING
+        task = {
+            "title": legacy.get("description", ""),
+            "description": "\n".join(f"- {step.get('description', '')}" for step in steps),
+            "estimated_duration": 30,
+            "status": status,
+            "created_at": legacy.get("created_at"),
+            "started_at": None,
+            "completed_at": legacy.get("completed_at"),
+            "check_in_time": None,
+        }
+        rows.append((task["status"], task["check_in_time"], dumps(task)))
+
+    conn.executemany("INSERT INTO tasks (status, check_in_time, data) VALUES (?, ?, ?)", rows)
+    conn.execute("INSERT INTO migrations (name, applied_at) VALUES ('tasks_json', datetime('now'))")
+    return len(rows)
+
+
+def init_app(app: Quart, repositories: Dict[str, Repository]) -> None:
+    """
+    Open the database when the app starts serving and load it into the repositories.
+
+    With SHARED_STATE set (several worker processes on one database), the
+    repositories are synced with changes made by other workers before every request
+    and every SYNC_INTERVAL_SECONDS in the background, so streams see them too.
+    """
+
+    @app.before_serving
+    async def open_database() -> None:
+        database = Database(
+            app.config["DATABASE"],
+            app.config.get("DATABASE_POOL_SIZE", 4),
+            shared=app.config.get("SHARED_STATE", False),
+        )
+        await database.open()
+        await database.write(lambda conn: migrate_tasks_json(conn, LEGACY_TASKS_FILE))
+        await database.bind(repositories)
+        app.extensions["database"] = database
+        if database.shared:
+            interval = app.config.get("SYNC_INTERVAL_SECONDS", 1.0)
+            app.extensions["database_sync"] = asyncio.create_task(
+                _sync_periodically(database, repositories, interval)
+            )
+
+    @app.before_request
+    async def sync_database() -> None:
+        database = app.extensions.get("database")
+        if database is not None and database.shared:
+            await database.sync(repositories)
+
+    @app.after_serving
+    async def close_database() -> None:
+        sync_task = app.extensions.pop("database_sync", None)
+        if sync_task is not None:
+            sync_task.cancel()
+        database = app.extensions.pop("database", None)
+        if database is not None:
+            await database.close()
+
+
+async def _sync_periodically(
+    database: Database, repositories: Dict[str, Repository], interval: float
+) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await database.sync(repositories)
+        except Exception:
+            logger.exception("Syncing with the shared database failed")
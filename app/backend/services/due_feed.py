@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import time
+from typing import Any, AsyncIterator, Dict, Optional, Set, Tuple
+
+from app.backend.services.repository import Record, Repository, to_timestamp
+
+logger = logging.getLogger(__name__)
+
+
+class DueFeed:
+    """
+    Pushes records to subscribers as the time in one of their fields comes due.
+
+    The repository must have a `TimeIndex` on `field`. While anyone is subscribed a
+    background task sleeps until the next due time in the index, then hands every
+    record that became due since its last pass to all subscribers. Records inserted or
+    updated with a time that has already passed are pushed straight away through the
+    repository's change listeners. Records are pushed once per value of their `key`
+    field and due time, so editing a record that is already due does not push it again.
+    """
+
+    def __init__(self, repository: Repository, field: str, key: str = "id") -> None:
+        self.repository = repository
+        self.field = field
+        self.key = key
+        self._subscribers: Set["asyncio.Queue[Dict[str, Any]]"] = set()
+        # The (key, due time) pairs handed out since the feed started
+        self._pushed: Set[Tuple[Any, float]] = set()
+        # Everything due up to this time has been handed out
+        self._watermark = 0.0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional["asyncio.Task[None]"] = None
+        repository.listeners.append(self._on_change)
+
+    def _push(self, record: Record, due_at: float) -> None:
+        pushed = (record.get(self.key), due_at)
+        if pushed in self._pushed:
+            return
+        self._pushed.add(pushed)
+        snapshot = record.to_dict()
+        for queue in self._subscribers:
+            queue.put_nowait(snapshot)
+
+    def _on_change(self, record: Record) -> None:
+        if not self._subscribers:
+            return
+        due_at = to_timestamp(record.get(self.field))
+        if due_at is None:
+            return
+        if due_at <= self._watermark:
+            self._push(record, due_at)
+        elif self._wakeup is not None:
+            # Possibly earlier than what the background task is sleeping until
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        assert self._wakeup is not None
+        while True:
+            now = time.time()
+            for record in self.repository.due(self.field, now, after=self._watermark):
+                due_at = to_timestamp(record.get(self.field))
+                if due_at is not None:
+                    self._push(record, due_at)
+            self._watermark = now
+            next_due = self.repository.next_due(self.field, now)
+            self._wakeup.clear()
+            timeout = None if next_due is None else max(0.0, next_due - time.time())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _start(self) -> None:
+        self._watermark = time.time()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        self._task.add_done_callback(self._log_failure)
+
+    def _stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+        self._task = None
+        self._wakeup = None
+        self._pushed.clear()
+
+    @staticmethod
+    def _log_failure(task: "asyncio.Task[None]") -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Due feed stopped", exc_info=task.exception())
+
+    async def subscribe(
+        self, heartbeat: Optional[float] = None
+    ) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Yield the records that are already due, then each record as it comes due, in
+        their JSON shape.
+
+        With `heartbeat` set, `None` is yielded after that many idle seconds so the
+        caller can keep its connection alive.
+        """
+        queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+        if not self._subscribers:
+            self._start()
+        self._subscribers.add(queue)
+        try:
+            for record in self.repository.due(self.field, self._watermark):
+                due_at = to_timestamp(record.get(self.field))
+                if due_at is not None:
+                    self._pushed.add((record.get(self.key), due_at))
+                yield record.to_dict()
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            self._subscribers.discard(queue)
+            if not self._subscribers:
+                self._stop()
@@ -0,0 +1,55 @@
+import re
+import zlib
+from typing import List, Protocol
+
+import numpy as np
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+
+
+class Embedder(Protocol):
+    """Turns texts into L2-normalized float32 vectors, one row per text."""
+
+    dim: int
+
+    def embed(self, texts: List[str]) -> np.ndarray: ...
+
+
+class HashingEmbedder:
+    """
+    Local embedder using the hashing trick over words, word bigrams and character trigrams.
+
+    It needs no model download or network access and is deterministic, which makes it
+    a reasonable default for near-duplicate detection and a stand-in in tests. A model
+    backed embedder can be swapped in anywhere an `Embedder` is accepted.
+    """
+
+    def __init__(self, dim: int = 512) -> None:
+        self.dim = dim
+
+    def _features(self, text: str) -> List[str]:
+        words = _WORD_RE.findall(text.lower())
+        features = list(words)
+        features.extend(f"{a} {b}" for a, b in zip(words, words[1:]))
+        for word in words:
+            padded = f"#{word}#"
+            features.extend(padded[i : i + 3] for i in range(len(padded) - 2))
+        return features
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        rows: List[int] = []
+        hashes: List[int] = []
+        for row, text in enumerate(texts):
+            features = self._features(text)
+            rows.extend([row] * len(features))
+            hashes.extend(zlib.crc32(feature.encode("utf-8")) for feature in features)
+
+        h = np.array(hashes, dtype=np.uint32)
+        # The top bit picks the sign so collisions tend to cancel out
+        signs = np.where(h & 0x80000000, 1.0, -1.0).astype(np.float32)
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        np.add.at(vectors, (np.array(rows, dtype=np.intp), h % self.dim), signs)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        normalized: np.ndarray = vectors / norms
+        return normalized
@@ -0,0 +1,160 @@
+from collections import Counter
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.backend.services.records import Goal, Task
+from app.backend.services.repository import Repository
+
+# (status, estimated minutes) of a task, as counted in the rollups
+TaskState = Tuple[str, int]
+
+
+def _minutes(value: Any) -> int:
+    return int(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else 0
+
+
+def _task_state(task: Task) -> TaskState:
+    return str(task.status), _minutes(task.estimated_duration)
+
+
+class Rollup:
+    """Task counts by status and estimated minutes for one goal."""
+
+    __slots__ = ("status_counts", "total_minutes", "remaining_minutes")
+
+    def __init__(self) -> None:
+        self.status_counts: "Counter[str]" = Counter()
+        self.total_minutes = 0
+        self.remaining_minutes = 0
+
+    def add(self, state: TaskState, sign: int = 1) -> None:
+        status, minutes = state
+        self.status_counts[status] += sign
+        if not self.status_counts[status]:
+            del self.status_counts[status]
+        self.total_minutes += sign * minutes
+        if status != "completed":
+            self.remaining_minutes += sign * minutes
+
+    def remove(self, state: TaskState) -> None:
+        self.add(state, -1)
+
+    def to_dict(self) -> Dict[str, Any]:
+        task_count = sum(self.status_counts.values())
+        completed = self.status_counts.get("completed", 0)
+        return {
+            "task_count": task_count,
+            "status_counts": dict(self.status_counts),
+            "total_minutes": self.total_minutes,
+            "remaining_minutes": self.remaining_minutes,
+            "percent_complete": round(completed * 100 / task_count, 1) if task_count else 0.0,
+        }
+
+
+class GoalProgress:
+    """
+    Progress rollups for every goal, updated incrementally as tasks and goals change.
+
+    Listens to both repositories: a task change moves that task's old status and
+    estimated duration out of the rollups of the goals it belongs to and the new ones
+    in, and a change to a goal's `tasks` list adds or removes only the tasks that
+    came or went. A goal whose `tasks` is still the same list object, unchanged or
+    appended to in place by `Repository.append`, only has the new tail looked at.
+    Reading a goal's progress, checking whether a goal contains a task and finding
+    the goals of a task are then O(1). Task IDs in a goal that don't match a stored
+    task are members but count for nothing until such a task exists.
+    """
+
+    def __init__(self, goals: Repository[Goal]) -> None:
+        # goal id -> its task ids, and task id -> the goals it is in
+        self._members: Dict[int, Set[Any]] = {}
+        # goal id -> the `tasks` list the members were last taken from, and its length
+        self._lists: Dict[int, Tuple[List[Any], int]] = {}
+        self._goals_of: Dict[Any, Set[int]] = {}
+        # task id -> the state the rollups currently count for it
+        self._tasks: Dict[Any, TaskState] = {}
+        self._rollups: Dict[int, Rollup] = {}
+        goals.listeners.append(self._goal_changed)
+        goals.removal_listeners.append(self._goal_removed)
+
+    def track(self, tasks: Repository[Task]) -> None:
+        """Start following changes to `tasks`."""
+        for task in tasks:
+            self._task_changed(task)
+        tasks.listeners.append(self._task_changed)
+        tasks.removal_listeners.append(self._task_removed)
+
+    def progress(self, goal_id: int) -> Optional[Dict[str, Any]]:
+        """The rollup of a goal, or `None` for an unknown goal."""
+        rollup = self._rollups.get(goal_id)
+        return rollup.to_dict() if rollup is not None else None
+
+    def has_task(self, goal_id: int, task_id: Any) -> bool:
+        return task_id in self._members.get(goal_id, ())
+
+    def goals_for_task(self, task_id: Any) -> List[int]:
+        return sorted(self._goals_of.get(task_id, ()))
+
+    def _task_changed(self, task: Task) -> None:
+        new = _task_state(task)
+        old = self._tasks.get(task.id)
+        if new == old:
+            return
+        self._tasks[task.id] = new
+        for goal_id in self._goals_of.get(task.id, ()):
+            rollup = self._rollups[goal_id]
+            if old is not None:
+                rollup.remove(old)
+            rollup.add(new)
+
+    def _task_removed(self, task: Task) -> None:
+        old = self._tasks.pop(task.id, None)
+        if old is None:
+            return
+        for goal_id in self._goals_of.get(task.id, ()):
+            self._rollups[goal_id].remove(old)
+
+    def _goal_changed(self, goal: Goal) -> None:
+        goal_id = goal.id
+        rollup = self._rollups.setdefault(goal_id, Rollup())
+        members = self._members.setdefault(goal_id, set())
+        task_ids = goal.tasks or []
+        seen = self._lists.get(goal_id)
+        if seen is not None and seen[0] is task_ids:
+            # The same list, unchanged or appended to in place; only tasks past the
+            # ones already seen can be new
+            for task_id in task_ids[seen[1] :]:
+                self._link(goal_id, task_id, members, rollup)
+        else:
+            new_members = set(task_ids)
+            for task_id in new_members - members:
+                self._link(goal_id, task_id, members, rollup)
+            for task_id in members - new_members:
+                members.discard(task_id)
+                self._unlink(goal_id, task_id)
+                state = self._tasks.get(task_id)
+                if state is not None:
+                    rollup.remove(state)
+        self._lists[goal_id] = (task_ids, len(task_ids))
+
+    def _link(self, goal_id: int, task_id: Any, members: Set[Any], rollup: Rollup) -> None:
+        if task_id in members:
+            return
+        members.add(task_id)
+        self._goals_of.setdefault(task_id, set()).add(goal_id)
+        state = self._tasks.get(task_id)
+        if state is not None:
+            rollup.add(state)
+
+    def _goal_removed(self, goal: Goal) -> None:
+        goal_id = goal.id
+        for task_id in self._members.pop(goal_id, ()):
+            self._unlink(goal_id, task_id)
+        self._lists.pop(goal_id, None)
+        self._rollups.pop(goal_id, None)
+
+    def _unlink(self, goal_id: int, task_id: Any) -> None:
+        goals = self._goals_of.get(task_id)
+        if goals is not None:
+            goals.discard(goal_id)
+            if not goals:
+                del self._goals_of[task_id]
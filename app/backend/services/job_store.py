@@ -0,0 +1,159 @@
+import pickle
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from apscheduler.job import Job
+from apscheduler.jobstores.base import BaseJobStore, ConflictingIdError, JobLookupError
+from apscheduler.util import datetime_to_utc_timestamp, utc_timestamp_to_datetime
+
+
+class SQLiteJobStore(BaseJobStore):
+    """
+    APScheduler job store kept in a table of the app's SQLite database.
+
+    Mirrors APScheduler's SQLAlchemy job store (pickled job state plus an indexed
+    `next_run_time` column) on top of the stdlib sqlite3 module, and adds
+    `add_job_states` and `remove_jobs` so large numbers of jobs can be inserted or
+    deleted in one transaction. Both block, so the app calls them in a worker thread.
+    """
+
+    TABLE = "apscheduler_jobs"
+
+    def __init__(self, path: str, pickle_protocol: int = pickle.HIGHEST_PROTOCOL) -> None:
+        super().__init__()
+        self.path = path
+        self.pickle_protocol = pickle_protocol
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def start(self, scheduler: Any, alias: str) -> None:
+        super().start(scheduler, alias)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        with self._conn:
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.TABLE} "
+                "(id TEXT PRIMARY KEY, next_run_time REAL, job_state BLOB NOT NULL)"
+            )
+            self._conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{self.TABLE}_next_run_time "
+                f"ON {self.TABLE} (next_run_time)"
+            )
+
+    def _execute(self, sql: str, params: Iterable[Any] = ()) -> sqlite3.Cursor:
+        assert self._conn is not None
+        with self._lock, self._conn:
+            return self._conn.execute(sql, tuple(params))
+
+    def lookup_job(self, job_id: str) -> Optional[Job]:
+        row = self._execute(
+            f"SELECT job_state FROM {self.TABLE} WHERE id = ?", (job_id,)
+        ).fetchone()
+        return self._reconstitute_job(row[0]) if row else None
+
+    def get_due_jobs(self, now: datetime) -> List[Job]:
+        return self._get_jobs("WHERE next_run_time <= ?", (datetime_to_utc_timestamp(now),))
+
+    def get_next_run_time(self) -> Optional[datetime]:
+        row = self._execute(
+            f"SELECT next_run_time FROM {self.TABLE} WHERE next_run_time IS NOT NULL "
+            "ORDER BY next_run_time LIMIT 1"
+        ).fetchone()
+        return utc_timestamp_to_datetime(row[0]) if row else None
+
+    def get_all_jobs(self) -> List[Job]:
+        jobs = self._get_jobs()
+        self._fix_paused_jobs_sorting(jobs)
+        return jobs
+
+    def add_job(self, job: Job) -> None:
+        try:
+            self._execute(
+                f"INSERT INTO {self.TABLE} (id, next_run_time, job_state) VALUES (?, ?, ?)",
+                (job.id, datetime_to_utc_timestamp(job.next_run_time), self._dumps(job)),
+            )
+        except sqlite3.IntegrityError:
+            raise ConflictingIdError(job.id)
+
+    def add_job_states(self, states: List[Dict[str, Any]]) -> None:
+        """Insert (or replace) many jobs given as `Job.__getstate__()` dicts at once."""
+        rows = [
+            (
+                state["id"],
+                datetime_to_utc_timestamp(state["next_run_time"]),
+                pickle.dumps(state, self.pickle_protocol),
+            )
+            for state in states
+        ]
+        assert self._conn is not None
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO {self.TABLE} (id, next_run_time, job_state) "
+                "VALUES (?, ?, ?)",
+                rows,
+            )
+
+    def update_job(self, job: Job) -> None:
+        cursor = self._execute(
+            f"UPDATE {self.TABLE} SET next_run_time = ?, job_state = ? WHERE id = ?",
+            (datetime_to_utc_timestamp(job.next_run_time), self._dumps(job), job.id),
+        )
+        if cursor.rowcount == 0:
+            raise JobLookupError(job.id)
+
+    def remove_job(self, job_id: str) -> None:
+        cursor = self._execute(f"DELETE FROM {self.TABLE} WHERE id = ?", (job_id,))
+        if cursor.rowcount == 0:
+            raise JobLookupError(job_id)
+
+    def remove_jobs(self, job_ids: List[str]) -> None:
+        """Delete the jobs with these IDs at once; IDs without a job are skipped."""
+        assert self._conn is not None
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"DELETE FROM {self.TABLE} WHERE id = ?", [(job_id,) for job_id in job_ids]
+            )
+
+    def remove_all_jobs(self) -> None:
+        self._execute(f"DELETE FROM {self.TABLE}")
+
+    def shutdown(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _dumps(self, job: Job) -> bytes:
+        return pickle.dumps(job.__getstate__(), self.pickle_protocol)
+
+    def _reconstitute_job(self, job_state: bytes) -> Job:
+        state = pickle.loads(job_state)
+        state["jobstore"] = self
+        job = Job.__new__(Job)
+        job.__setstate__(state)
+        job._scheduler = self._scheduler
+        job._jobstore_alias = self._alias
+        return job
+
+    def _get_jobs(self, where: str = "", params: Tuple[Any, ...] = ()) -> List[Job]:
+        jobs = []
+        failed_job_ids = []
+        rows = self._execute(
+            f"SELECT id, job_state FROM {self.TABLE} {where} ORDER BY next_run_time", params
+        ).fetchall()
+        for job_id, job_state in rows:
+            try:
+                jobs.append(self._reconstitute_job(job_state))
+            except BaseException:
+                self._logger.exception('Unable to restore job "%s" -- removing it', job_id)
+                failed_job_ids.append(job_id)
+
+        # Remove all the jobs we failed to restore
+        for job_id in failed_job_ids:
+            self._execute(f"DELETE FROM {self.TABLE} WHERE id = ?", (job_id,))
+        return jobs
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} (path={self.path})>"
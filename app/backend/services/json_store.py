@@ -0,0 +1,265 @@
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+from typing import IO, Any, Callable, Dict, Optional, Tuple
+
+
+def _lock_file(path: str) -> IO[Any]:
+    """Block until this process holds the exclusive lock that guards `path`."""
+    import fcntl
+
+    handle = open(path + ".lock", "a")
+    fcntl.flock(handle, fcntl.LOCK_EX)
+    return handle
+
+
+def _unlock_file(handle: IO[Any]) -> None:
+    import fcntl
+
+    fcntl.flock(handle, fcntl.LOCK_UN)
+    handle.close()
+
+
+class JournalStore:
+    """
+    A key/value section of a JSON document stored as a snapshot plus an append-only log.
+
+    Every `set` appends one JSON line to the journal instead of rewriting the document,
+    so a write costs the same however many keys exist, and a crash can at worst lose
+    the trailing partial line. The in-memory index is rebuilt on first use by loading
+    the snapshot and replaying the journal. `compact` folds the journal back into the
+    snapshot: it swaps in a fresh journal under the lock, writes the snapshot
+    atomically, and only then deletes the old journal, which is replayed on startup
+    if a crash happens in between (replaying a set is idempotent).
+
+    With `shared` set, other processes use the files too. Every operation then holds
+    an exclusive file lock and first replays what other processes appended since;
+    compaction writes the snapshot and swaps in an empty journal file, which the
+    others notice by its new inode and answer by reloading. `external_version` goes
+    up and `on_change` is called whenever another process's changes are picked up.
+    """
+
+    def __init__(
+        self,
+        snapshot_path: str,
+        journal_path: str,
+        section: str,
+        shared: bool = False,
+        on_change: Optional[Callable[[], None]] = None,
+    ) -> None:
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self.section = section
+        self.shared = shared
+        self.on_change = on_change
+        self.external_version = 0
+        self._index: Optional[Dict[str, Any]] = None
+        self._journal: Optional[Any] = None
+        self._pending = 0
+        # Bytes of the journal reflected in the index, and the journal's inode
+        self._offset = 0
+        self._inode = 0
+        self._lock = asyncio.Lock()
+        self._compact_lock = asyncio.Lock()
+
+    @property
+    def _old_journal_path(self) -> str:
+        return self.journal_path + ".old"
+
+    def _replay(self, path: str, index: Dict[str, Any], start: int = 0) -> Tuple[int, int]:
+        """Apply journal records from byte `start` on; returns the count and end offset."""
+        count = 0
+        good = start
+        if not os.path.exists(path):
+            return count, good
+        with open(path, "rb") as f:
+            f.seek(start)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                index[entry["key"]] = entry["value"]
+                count += 1
+                good += len(line)
+            else:
+                return count, good
+        # Drop the torn tail of a crashed write so new records start on a clean line
+        with open(path, "r+b") as f:
+            f.truncate(good)
+        return count, good
+
+    def _open(self) -> Dict[str, Any]:
+        index: Dict[str, Any] = {}
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "r") as f:
+                index = json.load(f).get(self.section, {})
+        if os.path.exists(self._old_journal_path):
+            # A compaction was interrupted; finish it before accepting new writes
+            self._replay(self._old_journal_path, index)
+            self._write_snapshot(json.dumps({self.section: index}, indent=2))
+        self._pending, self._offset = self._replay(self.journal_path, index)
+        if self._journal is not None:
+            self._journal.close()
+        self._journal = open(self.journal_path, "a")
+        self._inode = os.fstat(self._journal.fileno()).st_ino
+        return index
+
+    def _catch_up(self) -> bool:
+        """Pick up records other processes wrote; call with the file lock held."""
+        if self._index is None:
+            self._index = self._open()
+            return False
+        try:
+            st = os.stat(self.journal_path)
+        except FileNotFoundError:
+            st = None
+        if st is None or st.st_ino != self._inode:
+            # Another process compacted; its snapshot holds everything up to then
+            self._index = self._open()
+            return True
+        if st.st_size <= self._offset:
+            return False
+        count, self._offset = self._replay(self.journal_path, self._index, self._offset)
+        self._pending += count
+        return count > 0
+
+    def _locked(self, fn: Callable[[], Any]) -> Any:
+        handle = _lock_file(self.journal_path)
+        try:
+            return fn()
+        finally:
+            _unlock_file(handle)
+
+    async def _sync(self) -> Dict[str, Any]:
+        if await asyncio.to_thread(self._locked, self._catch_up):
+            self.external_version += 1
+            if self.on_change is not None:
+                self.on_change()
+        assert self._index is not None
+        return self._index
+
+    async def _load(self) -> Dict[str, Any]:
+        if self._index is None:
+            self._index = await asyncio.to_thread(self._open)
+        return self._index
+
+    async def get(self, key: str) -> Any:
+        """Get the value stored under `key`, or None."""
+        return (await self.all()).get(key)
+
+    async def all(self) -> Dict[str, Any]:
+        """Get every key and value. Callers must not modify the returned dict."""
+        if self.shared:
+            async with self._lock:
+                return await self._sync()
+        if self._index is None:
+            async with self._lock:
+                await self._load()
+        assert self._index is not None
+        return self._index
+
+    def _append(self, line: str) -> None:
+        assert self._journal is not None
+        self._journal.write(line)
+        self._journal.flush()
+
+    async def set(self, key: str, value: Any) -> None:
+        """Store `value` under `key` by appending a record to the journal."""
+        line = json.dumps({"key": key, "value": value}) + "\n"
+        async with self._lock:
+            if self.shared:
+                await self._sync_and_append(line)
+            else:
+                await self._load()
+                await asyncio.to_thread(self._append, line)
+            assert self._index is not None
+            self._index[key] = value
+            self._pending += 1
+
+    async def _sync_and_append(self, line: str) -> None:
+        def run() -> bool:
+            changed = self._catch_up()
+            self._append(line)
+            self._offset += len(line.encode())
+            return changed
+
+        if await asyncio.to_thread(self._locked, run):
+            self.external_version += 1
+            if self.on_change is not None:
+                self.on_change()
+
+    def _rotate(self) -> None:
+        assert self._journal is not None
+        self._journal.close()
+        if os.path.exists(self._old_journal_path):
+            # The previous compaction failed to write its snapshot; keep its records
+            with open(self._old_journal_path, "a") as old, open(self.journal_path, "r") as new:
+                shutil.copyfileobj(new, old)
+            os.unlink(self.journal_path)
+        else:
+            os.replace(self.journal_path, self._old_journal_path)
+        self._journal = open(self.journal_path, "a")
+
+    def _write_snapshot(self, payload: str) -> None:
+        directory = os.path.dirname(os.path.abspath(self.snapshot_path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        if os.path.exists(self._old_journal_path):
+            os.unlink(self._old_journal_path)
+
+    def _compact_shared(self, min_entries: int) -> bool:
+        self._catch_up()
+        assert self._index is not None
+        if self._pending < min_entries:
+            return False
+        self._write_snapshot(json.dumps({self.section: self._index}, indent=2))
+        # Replace the journal with an empty file; other processes see the new inode
+        directory = os.path.dirname(os.path.abspath(self.journal_path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".jsonl")
+        os.close(fd)
+        os.replace(tmp_path, self.journal_path)
+        assert self._journal is not None
+        self._journal.close()
+        self._journal = open(self.journal_path, "a")
+        self._inode = os.fstat(self._journal.fileno()).st_ino
+        self._offset = 0
+        self._pending = 0
+        return True
+
+    async def compact(self, min_entries: int = 1) -> bool:
+        """Rewrite the snapshot if at least `min_entries` records are in the journal."""
+        if self.shared:
+            async with self._lock:
+                return bool(
+                    await asyncio.to_thread(self._locked, lambda: self._compact_shared(min_entries))
+                )
+        async with self._compact_lock:
+            async with self._lock:
+                index = await self._load()
+                if self._pending < min_entries:
+                    return False
+                await asyncio.to_thread(self._rotate)
+                snapshot = dict(index)
+                self._pending = 0
+            payload = await asyncio.to_thread(json.dumps, {self.section: snapshot}, indent=2)
+            await asyncio.to_thread(self._write_snapshot, payload)
+            return True
+
+    async def flush(self) -> None:
+        """Force journal records written so far onto disk."""
+        async with self._lock:
+            if self._journal is not None:
+                await asyncio.to_thread(os.fsync, self._journal.fileno())
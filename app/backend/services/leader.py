@@ -0,0 +1,117 @@
+import asyncio
+import logging
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderLease:
+    """
+    A named, time-limited lease kept in a SQLite table.
+
+    Worker processes sharing a database compete for the lease; the holder is the
+    leader until it stops renewing it for `ttl` seconds. Acquiring and renewing are
+    the same conditional upsert, which SQLite serializes across processes.
+    """
+
+    TABLE = "leases"
+
+    def __init__(self, path: str, name: str, ttl: float = 15.0) -> None:
+        self.path = path
+        self.name = name
+        self.ttl = ttl
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+            with self._conn:
+                self._conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {self.TABLE} "
+                    "(name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+                )
+        return self._conn
+
+    def try_acquire(self) -> bool:
+        """Take or renew the lease if it is free, expired or already ours."""
+        conn = self._connection()
+        now = time.time()
+        with conn:
+            conn.execute(
+                f"""
+                INSERT INTO {self.TABLE} (name, owner, expires_at) VALUES (?, ?, ?)
+                ON CONFLICT (name) DO UPDATE SET
+                  owner = excluded.owner, expires_at = excluded.expires_at
+                WHERE {self.TABLE}.owner = excluded.owner OR {self.TABLE}.expires_at < ?
+                """,
+                (self.name, self.owner, now + self.ttl, now),
+            )
+            row = conn.execute(
+                f"SELECT owner FROM {self.TABLE} WHERE name = ?", (self.name,)
+            ).fetchone()
+        return row is not None and row[0] == self.owner
+
+    def release(self) -> None:
+        """Give up the lease if we hold it, so another worker can take over at once."""
+        if self._conn is None:
+            return
+        with self._conn:
+            self._conn.execute(
+                f"DELETE FROM {self.TABLE} WHERE name = ? AND owner = ?", (self.name, self.owner)
+            )
+        self._conn.close()
+        self._conn = None
+
+
+async def campaign(
+    lease: LeaderLease,
+    on_elected: Callable[[], Awaitable[None]],
+    on_deposed: Callable[[], Awaitable[None]],
+    while_leading: Optional[Callable[[], Awaitable[None]]] = None,
+    interval: Optional[float] = None,
+) -> None:
+    """
+    Keep competing for `lease` until cancelled.
+
+    Every `interval` seconds (a third of the lease by default) the lease is acquired
+    or renewed. `on_elected` and `on_deposed` run when leadership changes hands and
+    `while_leading` runs on every round this process leads. The lease is released
+    on cancellation.
+    """
+    interval = interval if interval is not None else lease.ttl / 3
+    leading = False
+    try:
+        while True:
+            try:
+                acquired = await asyncio.to_thread(lease.try_acquire)
+            except sqlite3.Error:
+                logger.exception("Could not renew the %s lease", lease.name)
+                acquired = False
+            if acquired and not leading:
+                logger.info("Became %s leader as %s", lease.name, lease.owner)
+                leading = True
+                await _run_logged(on_elected, lease.name)
+            elif leading and not acquired:
+                logger.warning("Lost the %s lease", lease.name)
+                leading = False
+                await _run_logged(on_deposed, lease.name)
+            if leading and while_leading is not None:
+                await _run_logged(while_leading, lease.name)
+            await asyncio.sleep(interval)
+    finally:
+        if leading:
+            await _run_logged(on_deposed, lease.name)
+        await asyncio.to_thread(lease.release)
+
+
+async def _run_logged(callback: Callable[[], Awaitable[None]], name: str) -> None:
+    try:
+        await callback()
+    except Exception:
+        logger.exception("Leadership callback for %s failed", name)
@@ -0,0 +1,127 @@
+import hashlib
+import uuid
+from typing import Any, Callable, Iterable, List, Optional, Set
+from urllib.parse import urlencode
+
+from quart import Response, jsonify, request
+
+from app.backend.services.repository import Record, Repository, to_timestamp
+
+MAX_PAGE_SIZE = 1000
+
+# Versions restart at zero with the process, so ETags also carry a per-process token
+_EPOCH = uuid.uuid4().hex
+
+
+class ListQueryError(ValueError):
+    """A list endpoint was given an invalid query parameter."""
+
+
+def _int_arg(name: str) -> Optional[int]:
+    value = request.args.get(name)
+    if value is None or value == "":
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ListQueryError(f"{name} must be an integer")
+
+
+def _time_arg(name: str) -> Optional[float]:
+    value = request.args.get(name)
+    if not value:
+        return None
+    timestamp = to_timestamp(value)
+    if timestamp is None:
+        raise ListQueryError(f"{name} must be an ISO 8601 timestamp")
+    return timestamp
+
+
+def _intersect(ids: Optional[Iterable[int]], other: Iterable[int]) -> List[int]:
+    if ids is None:
+        return list(other)
+    keep = set(other)
+    return [record_id for record_id in ids if record_id in keep]
+
+
+def _created_between(after: Optional[float], before: Optional[float]) -> Callable[[Record], bool]:
+    def matches(record: Record) -> bool:
+        created = to_timestamp(record.get("created_at"))
+        if created is None:
+            return False
+        return (after is None or created >= after) and (before is None or created < before)
+
+    return matches
+
+
+def _project(records: List[Record], fields: Optional[Set[str]]) -> List[Any]:
+    if fields is None:
+        return records
+    return [
+        {key: value for key, value in record.to_dict().items() if key in fields}
+        for record in records
+    ]
+
+
+def list_records(
+    repository: Repository,
+    key: Optional[str] = None,
+    ids: Optional[Iterable[int]] = None,
+    depends_on: Iterable[Repository] = (),
+) -> Response:
+    """
+    Respond to a list request for `repository` using the request's query string.
+
+    Supported parameters are `status`, `created_after`/`created_before` (ISO times,
+    the range is half-open), `limit` (at most `MAX_PAGE_SIZE`; all matches when
+    omitted), `cursor` (from the previous page's `X-Next-Cursor` header or `Link`
+    rel="next") and `fields` (comma-separated; `id` is always included). Endpoint
+    specific filters are applied by the caller through `ids`. The records are
+    returned as a JSON list, or under `key` in an object when given.
+
+    The ETag is derived from the versions of `repository` and `depends_on` and the
+    query string, so a matching `If-None-Match` is answered with 304 without
+    building the page.
+    """
+    versions = ",".join(str(r.version) for r in (repository, *depends_on))
+    digest = hashlib.sha1(
+        f"{_EPOCH}:{versions}:{request.query_string.decode()}".encode()
+    ).hexdigest()
+    etag = digest[:32]
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    try:
+        limit = _int_arg("limit")
+        cursor = _int_arg("cursor")
+        created_after = _time_arg("created_after")
+        created_before = _time_arg("created_before")
+    except ListQueryError as e:
+        response = jsonify({"error": str(e)})
+        response.status_code = 400
+        return response
+    if limit is not None:
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    status = request.args.get("status")
+    if status:
+        ids = _intersect(ids, (r.id for r in repository.find("status", status)))
+    where = None
+    if created_after is not None or created_before is not None:
+        where = _created_between(created_after, created_before)
+    fields = None
+    if request.args.get("fields"):
+        fields = {"id", *(f.strip() for f in request.args["fields"].split(","))}
+
+    records, next_cursor = repository.page(after=cursor, limit=limit, where=where, ids=ids)
+    body: Any = _project(records, fields)
+    response = jsonify({key: body} if key else body)
+    response.set_etag(etag)
+    if next_cursor is not None:
+        args = request.args.to_dict()
+        args["cursor"] = str(next_cursor)
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+        response.headers["Link"] = f'<{request.path}?{urlencode(args)}>; rel="next"'
+    return response
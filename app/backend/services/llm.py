@@ -0,0 +1,225 @@
+import asyncio
+import json
+import os
+import re
+import time
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import (
+    AsyncCallbackHandler,
+    AsyncCallbackManagerForLLMRun,
+    BaseCallbackHandler,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult, LLMResult
+
+from app.backend.services.metrics import llm_duration, llm_tokens
+from app.backend.services.tokens import count_tokens
+
+# Names accepted by the LLM_BACKEND config value
+BACKENDS = ("openai", "fake")
+
+DEFAULT_MODEL = "gpt-4-turbo-preview"
+
+ToolCall = Tuple[str, Dict[str, Any]]
+
+
+def _plan_tool_calls(message: str, available: Sequence[str]) -> List[ToolCall]:
+    """The tool calls an assistant would make for `message`, in the order made."""
+    text = message.lower()
+    calls: List[ToolCall] = []
+    if "remember" in text or "note that" in text:
+        words = re.findall(r"[a-z0-9]+", text)
+        key = "-".join(w for w in words if w not in ("remember", "that", "note"))[:40] or "note"
+        calls.append(("store_memory", {"key": key, "value": message}))
+    if "goal" in text or "break down" in text or "plan" in text:
+        calls.append(("schedule_goal", {"goal_description": message}))
+    if "done" in text or "finished" in text or "completed" in text:
+        number = re.search(r"\d+", text)
+        calls.append(("mark_task_done", {"task_id": number.group() if number else "1"}))
+    if "search" in text or "look up" in text or "latest" in text:
+        calls.append(("web_search", {"query": message}))
+    if not calls:
+        calls.append(("search_memories", {"query": message}))
+    return [(name, arguments) for name, arguments in calls if name in available]
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    Offline chat model that behaves like a tool-calling assistant.
+
+    For a user message it asks for the tool calls a model would plausibly make
+    (storing a memory for "remember ...", scheduling for goals, marking tasks done,
+    web search, otherwise a memory search), several at once when the message calls
+    for it, in the OpenAI tool-call format the tools agent parses. Once the tool
+    results are in it answers with them. Each call waits `latency` seconds and each
+    streamed answer token `token_latency` seconds, to stand in for a provider.
+    Replies only depend on the messages, so runs are deterministic.
+    """
+
+    latency: float = 0.0
+    token_latency: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"latency": self.latency, "token_latency": self.token_latency}
+
+    def _reply(self, messages: List[BaseMessage], tools: Sequence[Mapping[str, Any]]) -> AIMessage:
+        results = []
+        for message in reversed(messages):
+            if not isinstance(message, ToolMessage):
+                break
+            results.append(str(message.content))
+        if results:
+            return AIMessage(content=" ".join(reversed(results)))
+
+        request = next(
+            (str(m.content) for m in reversed(messages) if isinstance(m, HumanMessage)), ""
+        )
+        available = [tool["function"]["name"] for tool in tools]
+        calls = _plan_tool_calls(request, available)
+        if not calls:
+            return AIMessage(content=f"Noted: {request}")
+        tool_calls = [
+            {
+                "id": f"call_{len(messages)}_{i}",
+                "type": "function",
+                "function": {"name": name, "arguments": json.dumps(arguments)},
+            }
+            for i, (name, arguments) in enumerate(calls)
+        ]
+        return AIMessage(content="", additional_kwargs={"tool_calls": tool_calls})
+
+    def _result(self, messages: List[BaseMessage], message: AIMessage) -> ChatResult:
+        prompt_tokens = sum(count_tokens(str(m.content)) for m in messages)
+        completion_tokens = count_tokens(str(message.content) or str(message.additional_kwargs))
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        return ChatResult(
+            generations=[ChatGeneration(message=message)], llm_output={"token_usage": usage}
+        )
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        time.sleep(self.latency)
+        message = self._reply(messages, kwargs.get("tools", ()))
+        if run_manager is not None and message.content:
+            for token in re.findall(r"\S+\s*", str(message.content)):
+                if self.token_latency:
+                    time.sleep(self.token_latency)
+                run_manager.on_llm_new_token(token)
+        return self._result(messages, message)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        message = self._reply(messages, kwargs.get("tools", ()))
+        if run_manager is not None and message.content:
+            for token in re.findall(r"\S+\s*", str(message.content)):
+                if self.token_latency:
+                    await asyncio.sleep(self.token_latency)
+                await run_manager.on_llm_new_token(token)
+        return self._result(messages, message)
+
+
+class LLMMetricsHandler(AsyncCallbackHandler):
+    """Times LLM calls and counts their tokens."""
+
+    def __init__(self, model: str) -> None:
+        self.model = model
+        # Start time and estimated prompt tokens per run
+        self._runs: Dict[UUID, Tuple[float, int]] = {}
+
+    async def on_chat_model_start(
+        self,
+        serialized: Dict[str, Any],
+        messages: List[List[BaseMessage]],
+        *,
+        run_id: UUID,
+        **kwargs: Any,
+    ) -> None:
+        prompt_tokens = sum(count_tokens(str(m.content)) for batch in messages for m in batch)
+        self._runs[run_id] = (time.perf_counter(), prompt_tokens)
+
+    async def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        start, prompt_tokens = self._runs.pop(run_id, (None, 0))
+        if start is not None:
+            llm_duration.observe(time.perf_counter() - start, self.model, "ok")
+
+        # Streaming responses come without usage figures
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        completion_tokens = usage.get("completion_tokens")
+        if completion_tokens is None:
+            completion_tokens = sum(
+                count_tokens(generation.text)
+                for batch in response.generations
+                for generation in batch
+            )
+        llm_tokens.inc(usage.get("prompt_tokens", prompt_tokens), self.model, "prompt")
+        llm_tokens.inc(completion_tokens, self.model, "completion")
+
+    async def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        start, _ = self._runs.pop(run_id, (None, 0))
+        if start is not None:
+            llm_duration.observe(time.perf_counter() - start, self.model, "error")
+
+
+def model_name(config: Mapping[str, Any]) -> str:
+    """The model name reported in metrics for the configured backend."""
+    if config.get("LLM_BACKEND", "openai") == "fake":
+        return "scripted"
+    return str(config.get("LLM_MODEL", DEFAULT_MODEL))
+
+
+def create_llm(
+    config: Mapping[str, Any],
+    callbacks: Optional[List[BaseCallbackHandler]] = None,
+    streaming: bool = False,
+) -> BaseChatModel:
+    """
+    Build the chat model selected by `LLM_BACKEND` in `config`.
+
+    `openai` (the default) uses `LLM_MODEL` and `LLM_TEMPERATURE` with the
+    OPENAI_API_KEY environment variable, and asks for replies to be streamed when
+    `streaming` is set. `fake` is the offline `ScriptedChatModel`, with
+    `FAKE_LLM_LATENCY_SECONDS` per call and `FAKE_LLM_TOKEN_LATENCY_SECONDS` per
+    streamed token.
+    """
+    backend = config.get("LLM_BACKEND", "openai")
+    if backend == "fake":
+        return ScriptedChatModel(
+            latency=config.get("FAKE_LLM_LATENCY_SECONDS", 0.0),
+            token_latency=config.get("FAKE_LLM_TOKEN_LATENCY_SECONDS", 0.0),
+            callbacks=callbacks,
+        )
+    if backend == "openai":
+        from langchain_openai import ChatOpenAI
+
+        return ChatOpenAI(
+            model=config.get("LLM_MODEL", DEFAULT_MODEL),
+            temperature=config.get("LLM_TEMPERATURE", 0.7),
+            api_key=os.getenv("OPENAI_API_KEY"),
+            streaming=streaming,
+            callbacks=callbacks,
+        )
+    raise ValueError(f"Unknown LLM_BACKEND {backend!r}; expected one of {', '.join(BACKENDS)}")
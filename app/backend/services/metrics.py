@@ -0,0 +1,246 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from quart import Quart, Response, g, request
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Bucket upper bounds, in seconds and bytes
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    """A named metric with a fixed set of labels, rendered in Prometheus text format."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        # Observations come from the event loop and from scheduler threads
+        self._lock = threading.Lock()
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    """A value that only goes up, per label combination."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            lines.append(f"{self.name}{_format_labels(self.labels, labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    """A value that goes up and down, per label combination."""
+
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, *labels: str) -> None:
+        self.inc(-amount, *labels)
+
+
+class Histogram(Metric):
+    """
+    Counts of observations in cumulative buckets, plus their sum and count.
+
+    Each label combination keeps one (non-cumulative) count per bucket, so an
+    observation costs a bisect and an increment; buckets are summed on render.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label combination: [bucket counts..., +Inf count, sum]
+        self._series: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0.0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            series = [(labels, list(values)) for labels, values in self._series.items()]
+        bounds = self.buckets + (float("inf"),)
+        for labels, values in series:
+            cumulative = 0.0
+            for bound, count in zip(bounds, values):
+                cumulative += count
+                bucket_labels = _format_labels(
+                    self.labels + ("le",), labels + (_format_value(bound),)
+                )
+                lines.append(f"{self.name}_bucket{bucket_labels} {_format_value(cumulative)}")
+            label_text = _format_labels(self.labels, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(values[-1])}")
+            lines.append(f"{self.name}_count{label_text} {_format_value(cumulative)}")
+        return lines
+
+
+class Registry:
+    """The metrics exposed at /api/metrics."""
+
+    def __init__(self) -> None:
+        self.metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Any:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self.metrics for line in metric.render()) + "\n"
+
+
+registry = Registry()
+
+request_duration: Histogram = registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "Time to produce a response (to the first byte for streams).",
+        ("method", "route", "status"),
+    )
+)
+requests_in_flight: Gauge = registry.register(
+    Gauge("http_requests_in_flight", "Requests currently being handled.")
+)
+request_size: Histogram = registry.register(
+    Histogram("http_request_size_bytes", "Request body sizes.", ("method", "route"), SIZE_BUCKETS)
+)
+response_size: Histogram = registry.register(
+    Histogram(
+        "http_response_size_bytes",
+        "Response body sizes (streamed responses are not counted).",
+        ("method", "route"),
+        SIZE_BUCKETS,
+    )
+)
+tool_duration: Histogram = registry.register(
+    Histogram(
+        "assistant_tool_duration_seconds",
+        "Time spent in agent tool calls.",
+        ("tool", "outcome"),
+    )
+)
+llm_duration: Histogram = registry.register(
+    Histogram(
+        "assistant_llm_duration_seconds",
+        "Time spent in LLM calls.",
+        ("model", "outcome"),
+    )
+)
+llm_tokens: Counter = registry.register(
+    Counter(
+        "assistant_llm_tokens_total",
+        "Tokens sent to and received from the LLM (estimated when the API reports none).",
+        ("model", "type"),
+    )
+)
+job_latency: Histogram = registry.register(
+    Histogram(
+        "scheduler_job_latency_seconds",
+        "Time from a job's scheduled run time until it finished.",
+        ("job", "outcome"),
+    )
+)
+
+
+def route_label() -> str:
+    """The matched URL rule, so that label values stay bounded."""
+    rule = request.url_rule
+    return rule.rule if rule is not None else "<unmatched>"
+
+
+def observe_job(event: Any) -> None:
+    """APScheduler listener recording when executed, failed and missed jobs finished."""
+    from apscheduler.events import EVENT_JOB_ERROR, EVENT_JOB_MISSED
+
+    outcome = {EVENT_JOB_ERROR: "error", EVENT_JOB_MISSED: "missed"}.get(event.code, "ok")
+    # Check-in jobs are named "checkin:<task id>"; label them by kind only
+    job = event.job_id.split(":", 1)[0]
+    latency = time.time() - event.scheduled_run_time.timestamp()
+    job_latency.observe(max(latency, 0.0), job, outcome)
+
+
+def init_app(app: Quart) -> None:
+    """Record request latency, in-flight requests and payload sizes; serve /api/metrics."""
+
+    @app.before_request
+    async def start_timer() -> None:
+        g.request_start = time.perf_counter()
+        requests_in_flight.inc()
+
+    @app.after_request
+    async def record_request(response: Response) -> Response:
+        start: Optional[float] = g.get("request_start")
+        if start is None:
+            return response
+        route = route_label()
+        method = request.method
+        request_duration.observe(
+            time.perf_counter() - start, method, route, str(response.status_code)
+        )
+        if request.content_length is not None:
+            request_size.observe(request.content_length, method, route)
+        if response.content_length is not None:
+            response_size.observe(response.content_length, method, route)
+        return response
+
+    @app.teardown_request
+    async def finish_request(exc: Optional[BaseException]) -> None:
+        if g.pop("request_start", None) is not None:
+            requests_in_flight.dec()
+
+    @app.route("/api/metrics")
+    async def metrics() -> Response:
+        """Metrics of this worker process in Prometheus text format."""
+        return Response(registry.render(), content_type=CONTENT_TYPE)
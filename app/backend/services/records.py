@@ -0,0 +1,235 @@
+"""
+Record types for tasks, goals and check-ins.
+
+Records are slotted dataclasses, so a record costs a fixed-size object instead of a
+dict. Timestamps are held as naive `datetime`s (local wall time, the naive ISO strings
+the API has always used) and statuses as `Status` members shared by every record.
+orjson encodes both natively, datetimes as the same strings `isoformat()` gives, so
+`to_dict` (the API's JSON shape) and `to_storage` (the form persisted in the
+database) only gather the field values and nothing is formatted in Python.
+"""
+
+import copy
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import StrEnum
+from operator import attrgetter
+from typing import Any, ClassVar, Dict, List, Mapping, Tuple, Type, TypeVar, Union
+
+R = TypeVar("R", bound="Record")
+
+# A naive local datetime, or the original string for times that are not naive ISO
+# timestamps (dates, UTC offsets, ...) so they come back exactly as given
+Time = Union[datetime, str, None]
+
+# The separators at positions 4, 7, 10, 13, 16 (and 19) of `isoformat()` output for
+# naive datetimes, by length: without and with microseconds
+_ISO_SEPARATORS = {19: "--T::", 26: "--T::."}
+
+
+class Status(StrEnum):
+    PENDING = "pending"
+    IN_PROGRESS = "in_progress"
+    COMPLETED = "completed"
+
+
+_STATUSES: Dict[str, Status] = {status.value: status for status in Status}
+
+
+def to_status(value: Any) -> Status:
+    """The `Status` member for a status string; raises `ValueError` for anything else."""
+    status = _STATUSES.get(value) if isinstance(value, str) else None
+    if status is None:
+        raise ValueError(f"Unknown status {value!r}; expected one of {', '.join(_STATUSES)}")
+    return status
+
+
+def now() -> datetime:
+    """The current local wall time, as record timestamps hold it."""
+    return datetime.now()
+
+
+def _parse_time(value: str) -> Any:
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return value
+    # The same test as `parsed.isoformat() == value` for strings fromisoformat takes,
+    # without formatting: the canonical layout, with microseconds only when non-zero
+    if (
+        parsed.tzinfo is None
+        and value[4:20:3] == _ISO_SEPARATORS.get(len(value))
+        and (parsed.microsecond or len(value) == 19)
+    ):
+        return parsed
+    return value
+
+
+def to_time(value: Any) -> Any:
+    """
+    The stored form of a timestamp.
+
+    Naive ISO strings become datetimes when `isoformat()` gives the same string back;
+    anything else, including datetimes, is kept as it is.
+    """
+    if type(value) is str:
+        return _parse_time(value)
+    return value
+
+
+class Record:
+    """
+    Base class of the stored record types.
+
+    Fields can be read and changed like dict keys (`record["status"]`,
+    `record.get(...)`, `record.update(...)`); values set that way are converted to
+    their stored form. Subclasses are `@dataclass(slots=True)` classes listing their
+    timestamp fields in `TIMES`.
+    """
+
+    __slots__: ClassVar[Tuple[str, ...]] = ()
+
+    TIMES: ClassVar[Tuple[str, ...]] = ()
+
+    # Set for each record class: the stored fields (every field but the ID) and getters
+    # reading all fields, or the stored ones, in a single call
+    _stored: ClassVar[Tuple[str, ...]] = ()
+    _values: ClassVar["attrgetter[Any]"]
+    _stored_values: ClassVar["attrgetter[Any]"]
+
+    id: int
+    status: Any
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        # Called again for the class `dataclass(slots=True)` creates, which has the slots
+        if len(cls.__slots__) > 1:
+            cls._stored = cls.__slots__[1:]
+            cls._values = attrgetter(*cls.__slots__)
+            cls._stored_values = attrgetter(*cls._stored)
+
+    def __post_init__(self) -> None:
+        """Convert time strings with `to_time` and status strings with `to_status`."""
+        for name in self.TIMES:
+            value = getattr(self, name)
+            if value.__class__ is str:
+                setattr(self, name, _parse_time(value))
+        self.status = to_status(self.status)
+
+    def _convert(self, name: str, value: Any) -> Any:
+        if name in self.TIMES:
+            return to_time(value)
+        if name == "status":
+            return to_status(value)
+        return value
+
+    def __getitem__(self, name: str) -> Any:
+        if name not in self.__slots__:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def __setitem__(self, name: str, value: Any) -> None:
+        if name not in self.__slots__:
+            raise KeyError(name)
+        setattr(self, name, self._convert(name, value))
+
+    def get(self, name: str, default: Any = None) -> Any:
+        return getattr(self, name) if name in self.__slots__ else default
+
+    def update(self, changes: Mapping[str, Any]) -> None:
+        """Set several fields; unknown names raise `KeyError` before anything changes."""
+        unknown = [name for name in changes if name not in self.__slots__]
+        if unknown:
+            raise KeyError(unknown[0])
+        for name, value in changes.items():
+            setattr(self, name, self._convert(name, value))
+
+    def copy(self: R) -> R:
+        return copy.copy(self)
+
+    def reset(self, data: Mapping[str, Any]) -> None:
+        """Replace every field with the values in `data`, as `from_dict` would."""
+        fresh = self.from_dict(data)
+        for name in self.__slots__:
+            setattr(self, name, getattr(fresh, name))
+
+    def json_value(self, name: str) -> Any:
+        """The JSON value of one field, with times as ISO strings."""
+        value = getattr(self, name)
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return value
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The record in the API's JSON shape (times and statuses still to be encoded)."""
+        return dict(zip(self.__slots__, self._values(self)))
+
+    def to_storage(self) -> Dict[str, Any]:
+        """The record as persisted: every field but the ID."""
+        return dict(zip(self._stored, self._stored_values(self)))
+
+    @classmethod
+    def from_dict(cls: Type[R], data: Mapping[str, Any]) -> R:
+        """Build a record from its JSON or stored form; unknown keys are ignored."""
+        try:
+            return cls(**data)
+        except TypeError:
+            return cls(**{name: data[name] for name in cls.__slots__ if name in data})
+
+    @classmethod
+    def from_row(cls: Type[R], record_id: int, data: Mapping[str, Any]) -> R:
+        """Build a record from a database row: its ID and the decoded `data` column."""
+        # Rows written by `to_storage` hold exactly the stored fields; others go through
+        # `from_dict`
+        if len(data) != len(cls._stored):
+            return cls.from_dict({**data, "id": record_id})
+        record = object.__new__(cls)
+        record.id = record_id
+        try:
+            for name in cls._stored:
+                setattr(record, name, data[name])
+        except KeyError:
+            return cls.from_dict({**data, "id": record_id})
+        record.__post_init__()
+        return record
+
+
+@dataclass(slots=True)
+class Task(Record):
+    TIMES: ClassVar[Tuple[str, ...]] = ("created_at", "started_at", "completed_at", "check_in_time")
+
+    id: int = 0
+    title: str = ""
+    description: str = ""
+    estimated_duration: Any = 30  # in minutes
+    status: Any = Status.PENDING
+    created_at: Time = None
+    started_at: Time = None
+    completed_at: Time = None
+    check_in_time: Time = None
+
+
+@dataclass(slots=True)
+class Goal(Record):
+    TIMES: ClassVar[Tuple[str, ...]] = ("deadline", "created_at", "completed_at")
+
+    id: int = 0
+    title: str = ""
+    description: str = ""
+    deadline: Time = None
+    status: Any = Status.PENDING
+    created_at: Time = None
+    completed_at: Time = None
+    tasks: List[Any] = field(default_factory=list)  # IDs of the goal's tasks
+
+
+@dataclass(slots=True)
+class CheckIn(Record):
+    TIMES: ClassVar[Tuple[str, ...]] = ("created_at", "next_checkin_time")
+
+    id: int = 0
+    task_id: Any = None
+    status: Any = Status.IN_PROGRESS
+    notes: str = ""
+    created_at: Time = None
+    next_checkin_time: Time = None
@@ -0,0 +1,494 @@
+import asyncio
+import bisect
+from contextlib import contextmanager
+from datetime import datetime
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Generator,
+    Generic,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
+
+from app.backend.services.records import Record
+
+if TYPE_CHECKING:
+    from app.backend.services.database import Database
+
+
+class HashIndex:
+    """Secondary index mapping a field value to the ids of the records holding it."""
+
+    def __init__(self, field: str) -> None:
+        self.field = field
+        # Buckets are dicts used as insertion-ordered sets of record ids
+        self._buckets: Dict[Any, Dict[int, None]] = {}
+
+    def add(self, record: Record) -> None:
+        self._buckets.setdefault(getattr(record, self.field), {})[record.id] = None
+
+    def remove(self, record: Record) -> None:
+        value = getattr(record, self.field)
+        bucket = self._buckets.get(value)
+        if bucket is None:
+            return
+        bucket.pop(record.id, None)
+        if not bucket:
+            del self._buckets[value]
+
+    def ids(self, value: Any) -> List[int]:
+        return list(self._buckets.get(value, ()))
+
+    def clear(self) -> None:
+        self._buckets.clear()
+
+
+def to_timestamp(value: Any) -> Optional[float]:
+    """
+    POSIX timestamp of an ISO time string or a datetime.
+
+    Naive values are taken to be local time.
+    """
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+class TimeIndex:
+    """
+    Secondary index keeping records sorted by a timestamp field.
+
+    Values are parsed, so strings with different UTC offsets compare correctly.
+    Records whose field is empty or not a valid timestamp are left out. Range
+    queries are a binary search plus a slice, O(log n + k) for k matches.
+    """
+
+    def __init__(self, field: str) -> None:
+        self.field = field
+        self._entries: List[Tuple[float, int]] = []
+        self._times: Dict[int, float] = {}
+
+    def add(self, record: Record) -> None:
+        timestamp = to_timestamp(getattr(record, self.field))
+        if timestamp is None:
+            return
+        bisect.insort(self._entries, (timestamp, record.id))
+        self._times[record.id] = timestamp
+
+    def remove(self, record: Record) -> None:
+        timestamp = self._times.pop(record.id, None)
+        if timestamp is None:
+            return
+        position = bisect.bisect_left(self._entries, (timestamp, record.id))
+        del self._entries[position]
+
+    def ids(self, value: Any) -> List[int]:
+        timestamp = to_timestamp(value)
+        if timestamp is None:
+            return []
+        start = bisect.bisect_left(self._entries, (timestamp, float("-inf")))
+        end = bisect.bisect_right(self._entries, (timestamp, float("inf")))
+        return [record_id for _, record_id in self._entries[start:end]]
+
+    def between(self, after: Optional[float], until: float) -> List[int]:
+        """IDs of records with `after < timestamp <= until`, earliest first."""
+        start = 0 if after is None else bisect.bisect_right(self._entries, (after, float("inf")))
+        end = bisect.bisect_right(self._entries, (until, float("inf")))
+        return [record_id for _, record_id in self._entries[start:end]]
+
+    def next_after(self, after: float) -> Optional[float]:
+        """The earliest timestamp later than `after`, if any."""
+        position = bisect.bisect_right(self._entries, (after, float("inf")))
+        return self._entries[position][0] if position < len(self._entries) else None
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._times.clear()
+
+
+Index = Union[HashIndex, TimeIndex]
+
+R = TypeVar("R", bound=Record)
+
+
+class Repository(Generic[R]):
+    """
+    In-memory store of `record_type` records with O(1) lookup by id and hash indexes
+    on selected fields.
+
+    Records must be changed through `update` so the secondary indexes stay in sync.
+    Plain mappings given to the insert methods are converted with `from_dict`.
+    IDs are allocated from a monotonic counter and are never reused after a delete.
+    `indexes` takes field names, which get a `HashIndex`, or index objects such as a
+    `TimeIndex`. Callables in `listeners` are called with each inserted, updated or
+    loaded record, and those in `removal_listeners` with each removed record (including
+    everything dropped by `clear`), so derived state can be maintained incrementally.
+    `version` goes up with every change, so callers can tell whether anything changed.
+
+    Once bound to a `Database` the repository acts as a write-through cache: reads are
+    served from memory, every change is persisted before it is made in memory (so a
+    failed write changes nothing; `append` undoes its in-place change instead), and IDs
+    come from the table's AUTOINCREMENT key.
+    """
+
+    def __init__(self, record_type: Type[R], indexes: Iterable[Union[str, Index]] = ()) -> None:
+        self.record_type = record_type
+        self._records: Dict[int, R] = {}
+        self._indexes: Dict[str, Index] = {}
+        for index in indexes:
+            if isinstance(index, str):
+                index = HashIndex(index)
+            self._indexes[index.field] = index
+        self.listeners: List[Callable[[R], None]] = []
+        self.removal_listeners: List[Callable[[R], None]] = []
+        self.version = 0
+        # IDs in ascending order, for seeking to a pagination cursor
+        self._ids: List[int] = []
+        # Records with a write in flight, which `refresh` must not overwrite
+        self._writing: Dict[int, int] = {}
+        # Held from copying records' new state until it is applied, so a change made
+        # while another is being written is based on (and keeps) that one
+        self._change_lock = asyncio.Lock()
+        self._next_id = 1
+        self._database: Optional["Database"] = None
+        self._table = ""
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, record_id: object) -> bool:
+        return record_id in self._records
+
+    def __iter__(self) -> Iterator[R]:
+        return iter(self._records.values())
+
+    def get(self, record_id: int) -> Optional[R]:
+        """Get a record by ID."""
+        return self._records.get(record_id)
+
+    def all(self) -> List[R]:
+        """Get all records in ID order."""
+        records = self._records
+        return [records[record_id] for record_id in self._ids]
+
+    def find(self, field: str, value: Any) -> List[R]:
+        """Get all records whose `field` equals `value`, using an index when one exists."""
+        index = self._indexes.get(field)
+        if index is None:
+            return [r for r in self._records.values() if getattr(r, field) == value]
+        return [self._records[record_id] for record_id in index.ids(value)]
+
+    def page(
+        self,
+        after: Optional[int] = None,
+        limit: Optional[int] = None,
+        where: Optional[Callable[[R], bool]] = None,
+        ids: Optional[Iterable[int]] = None,
+    ) -> Tuple[List[R], Optional[int]]:
+        """
+        Get up to `limit` records with an ID greater than `after`, in ID order.
+
+        `ids` restricts the candidates (e.g. to an index lookup) and `where` filters
+        them. Returns the records and the cursor for the next page, which is `None`
+        when there are no more matches.
+        """
+        order = self._ids if ids is None else sorted(i for i in set(ids) if i in self._records)
+        start = 0 if after is None else bisect.bisect_right(order, after)
+        records: List[R] = []
+        for position in range(start, len(order)):
+            record = self._records[order[position]]
+            if where is not None and not where(record):
+                continue
+            if limit is not None and len(records) == limit:
+                return records, records[-1].id
+            records.append(record)
+        return records, None
+
+    def _time_index(self, field: str) -> TimeIndex:
+        index = self._indexes.get(field)
+        if not isinstance(index, TimeIndex):
+            raise ValueError(f"No time index on {field!r}")
+        return index
+
+    def due(self, field: str, until: float, after: Optional[float] = None) -> List[R]:
+        """Get records whose `field` time is in `(after, until]`, earliest first."""
+        ids = self._time_index(field).between(after, until)
+        return [self._records[record_id] for record_id in ids]
+
+    def next_due(self, field: str, after: float) -> Optional[float]:
+        """The earliest `field` timestamp later than `after`, if any."""
+        return self._time_index(field).next_after(after)
+
+    def _notify(self, record: R) -> None:
+        self.version += 1
+        for listener in self.listeners:
+            listener(record)
+
+    def _notify_removed(self, record: R) -> None:
+        self.version += 1
+        for listener in self.removal_listeners:
+            listener(record)
+
+    async def bind(self, database: "Database", table: str) -> None:
+        """Replace the contents with the rows of `table` and persist changes there from now on."""
+        from_row = self.record_type.from_row
+        records = [from_row(record_id, data) for record_id, data in await database.load(table)]
+        self.clear()
+        for record in records:
+            self._add(record)
+        if records:
+            self._next_id = max(self._next_id, records[-1].id + 1)
+        self._database = database
+        self._table = table
+        self.version += 1
+        if self.listeners:
+            for record in records:
+                self._notify(record)
+
+    def _coerce(self, record: Union[R, Mapping[str, Any]]) -> R:
+        if isinstance(record, self.record_type):
+            return record
+        return self.record_type.from_dict(record)  # type: ignore[arg-type]
+
+    def _add(self, record: R) -> None:
+        existing = self._records.get(record.id)
+        if existing is not None:
+            # Already loaded by a `refresh` that ran while the insert was in flight
+            for index in self._indexes.values():
+                index.remove(existing)
+            self._records[record.id] = record
+            for index in self._indexes.values():
+                index.add(record)
+            return
+        self._records[record.id] = record
+        if self._ids and self._ids[-1] > record.id:
+            bisect.insort(self._ids, record.id)
+        else:
+            self._ids.append(record.id)
+        for index in self._indexes.values():
+            index.add(record)
+
+    def _apply_changes(self, record: R, changes: Dict[str, Any]) -> None:
+        touched = [index for field, index in self._indexes.items() if field in changes]
+        for index in touched:
+            index.remove(record)
+        record.update(changes)
+        for index in touched:
+            index.add(record)
+
+    async def insert(self, record: Union[R, Mapping[str, Any]]) -> R:
+        """Assign the next ID to a new record and store it."""
+        record = self._coerce(record)
+        if self._database is not None:
+            record.id = await self._database.insert(self._table, record)
+        else:
+            record.id = self._next_id
+            self._next_id += 1
+        self._add(record)
+        self._notify(record)
+        return record
+
+    async def insert_many(self, records: Iterable[Union[R, Mapping[str, Any]]]) -> List[R]:
+        """Insert several records, persisting them in one transaction."""
+        new_records = [self._coerce(record) for record in records]
+        if self._database is not None:
+            ids = await self._database.insert_many(self._table, new_records)
+        else:
+            ids = list(range(self._next_id, self._next_id + len(new_records)))
+            self._next_id += len(new_records)
+        for record_id, record in zip(ids, new_records):
+            record.id = record_id
+            self._add(record)
+        for record in new_records:
+            self._notify(record)
+        return new_records
+
+    async def update(self, record_id: int, changes: Dict[str, Any]) -> Optional[R]:
+        """
+        Apply `changes` to a record and re-index the fields that changed.
+
+        The new state is persisted before memory is touched, so if that fails the
+        record is left as it was.
+        """
+        record = self._records.get(record_id)
+        if record is None:
+            return None
+        async with self._change_lock:
+            if self._records.get(record_id) is not record:
+                # Deleted while waiting for the lock
+                return None
+            if self._database is not None:
+                new_state = record.copy()
+                new_state.update(changes)
+                with self._write_in_flight([record_id]):
+                    await self._database.update(self._table, new_state)
+            self._apply_changes(record, changes)
+        self._notify(record)
+        return record
+
+    async def append(self, record_id: int, field: str, value: Any) -> Optional[R]:
+        """
+        Append `value` to a record's list `field` in place, without copying the list.
+
+        The list is changed before the record is persisted and restored if that fails.
+        """
+        record = self._records.get(record_id)
+        if record is None:
+            return None
+        async with self._change_lock:
+            if self._records.get(record_id) is not record:
+                # Deleted while waiting for the lock
+                return None
+            index = self._indexes.get(field)
+            if index is not None:
+                index.remove(record)
+            values = record[field]
+            values.append(value)
+            try:
+                if self._database is not None:
+                    with self._write_in_flight([record_id]):
+                        await self._database.update(self._table, record)
+            except BaseException:
+                values.pop()
+                raise
+            finally:
+                if index is not None:
+                    index.add(record)
+        self._notify(record)
+        return record
+
+    async def apply_batch(
+        self, inserts: List[R], updates: List[Tuple[int, Dict[str, Any]]]
+    ) -> List[R]:
+        """
+        Insert new records and apply changes to existing ones as a unit.
+
+        Everything is persisted in one transaction before memory is touched, so if
+        that fails nothing changes. Returns the updated records in the order of their
+        first change.
+        """
+        merged: Dict[int, Dict[str, Any]] = {}
+        for record_id, changes in updates:
+            if record_id not in self._records:
+                raise KeyError(record_id)
+            merged.setdefault(record_id, {}).update(changes)
+
+        async with self._change_lock:
+            if self._database is not None:
+                new_states = []
+                for record_id, changes in merged.items():
+                    if record_id not in self._records:
+                        # Deleted while waiting for the lock
+                        raise KeyError(record_id)
+                    new_state = self._records[record_id].copy()
+                    new_state.update(changes)
+                    new_states.append(new_state)
+                with self._write_in_flight(merged):
+                    ids = await self._database.write_batch(self._table, inserts, new_states)
+            else:
+                ids = list(range(self._next_id, self._next_id + len(inserts)))
+                self._next_id += len(inserts)
+
+            for record_id, record in zip(ids, inserts):
+                record.id = record_id
+                self._add(record)
+            updated = []
+            for record_id, changes in merged.items():
+                record = self._records[record_id]
+                self._apply_changes(record, changes)
+                updated.append(record)
+        for record in inserts + updated:
+            self._notify(record)
+        return updated
+
+    async def delete(self, record_id: int) -> Optional[R]:
+        """
+        Remove a record. Its ID is not handed out again.
+
+        The row is deleted before the record leaves memory, so if that fails the
+        record stays.
+        """
+        async with self._change_lock:
+            if record_id not in self._records:
+                return None
+            if self._database is not None:
+                with self._write_in_flight([record_id]):
+                    await self._database.delete(self._table, record_id)
+            record = self._records.pop(record_id)
+            del self._ids[bisect.bisect_left(self._ids, record_id)]
+            for index in self._indexes.values():
+                index.remove(record)
+        self._notify_removed(record)
+        return record
+
+    @contextmanager
+    def _write_in_flight(self, record_ids: Iterable[int]) -> Generator[None, None, None]:
+        record_ids = list(record_ids)
+        for record_id in record_ids:
+            self._writing[record_id] = self._writing.get(record_id, 0) + 1
+        try:
+            yield
+        finally:
+            for record_id in record_ids:
+                self._writing[record_id] -= 1
+                if not self._writing[record_id]:
+                    del self._writing[record_id]
+
+    def refresh(self, rows: Mapping[int, Optional[Mapping[str, Any]]]) -> None:
+        """
+        Bring records in line with rows another process wrote; `None` means deleted.
+
+        Nothing is written back. Existing records are updated in place so references
+        held elsewhere stay valid. Records this process is still writing are skipped:
+        its write commits last, so its version is the current one.
+        """
+        for record_id, row in rows.items():
+            if record_id in self._writing:
+                continue
+            current = self._records.get(record_id)
+            if row is None:
+                if current is not None:
+                    del self._records[record_id]
+                    del self._ids[bisect.bisect_left(self._ids, record_id)]
+                    for index in self._indexes.values():
+                        index.remove(current)
+                    self._notify_removed(current)
+                continue
+            if current is None:
+                record = self.record_type.from_dict(row)
+                self._add(record)
+                self._next_id = max(self._next_id, record_id + 1)
+                self._notify(record)
+                continue
+            for index in self._indexes.values():
+                index.remove(current)
+            current.reset(row)
+            for index in self._indexes.values():
+                index.add(current)
+            self._notify(current)
+
+    def clear(self) -> None:
+        """Remove all in-memory records. The ID counter and database are left untouched."""
+        if self.removal_listeners:
+            for record in self._records.values():
+                self._notify_removed(record)
+        self._records.clear()
+        self._ids.clear()
+        self.version += 1
+        for index in self._indexes.values():
+            index.clear()
@@ -0,0 +1,142 @@
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+
+from app.backend.services.embeddings import Embedder, HashingEmbedder
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+_WHITESPACE_RE = re.compile(r"\s+")
+# Messages with numbers ("at 5pm", "task 12") differ in exactly the part embeddings blur
+_NUMBER_RE = re.compile(r"\d")
+
+
+def normalize_message(message: str) -> str:
+    """Lowercase a message and strip punctuation and repeated whitespace."""
+    return _WHITESPACE_RE.sub(" ", _PUNCTUATION_RE.sub(" ", message.lower())).strip()
+
+
+@dataclass
+class CacheEntry:
+    key: str
+    response: str
+    expires_at: float
+    slot: int
+
+
+class ResponseCache:
+    """
+    Cache of assistant answers with an exact-match tier and a similarity tier.
+
+    Messages are normalized before lookup, so the exact tier already ignores case,
+    punctuation and spacing. On an exact miss the message is embedded and compared
+    against every cached message with one matrix-vector product; the closest entry is
+    used if its cosine similarity reaches `similarity_threshold`. Messages containing
+    numbers only ever match exactly, in either direction: "remind me at 5pm" must not
+    be answered with what was said about 6pm. Entries expire after
+    `ttl_seconds` and the least recently used one is evicted beyond `max_entries`.
+
+    `invalidate` drops everything and bumps `generation`; answers computed against an
+    older generation are not stored, so a run that overlaps an invalidation cannot put
+    a stale answer back.
+    """
+
+    def __init__(
+        self,
+        embedder: Optional[Embedder] = None,
+        max_entries: int = 1024,
+        ttl_seconds: float = 600,
+        similarity_threshold: float = 0.92,
+        min_words: int = 3,
+    ) -> None:
+        self.embedder: Embedder = embedder or HashingEmbedder()
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        # Very short messages ("yes", "do it") depend on context, so they are not cached
+        self.min_words = min_words
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._vectors = np.zeros((max_entries, self.embedder.dim), dtype=np.float32)
+        self._slot_keys: List[Optional[str]] = [None] * max_entries
+        self._free_slots = list(range(max_entries - 1, -1, -1))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _cacheable(self, key: str) -> bool:
+        return len(key.split()) >= self.min_words
+
+    def _similarity_match(self, key: str) -> bool:
+        return _NUMBER_RE.search(key) is None
+
+    def _remove(self, entry: CacheEntry) -> None:
+        del self._entries[entry.key]
+        self._vectors[entry.slot] = 0.0
+        self._slot_keys[entry.slot] = None
+        self._free_slots.append(entry.slot)
+
+    def _hit(self, entry: CacheEntry, now: float) -> Optional[str]:
+        if entry.expires_at <= now:
+            self._remove(entry)
+            return None
+        self._entries.move_to_end(entry.key)
+        self.hits += 1
+        return entry.response
+
+    def get(self, message: str) -> Optional[str]:
+        """Get a cached answer for `message` or a sufficiently similar one."""
+        key = normalize_message(message)
+        if not self._cacheable(key) or not self._entries:
+            self.misses += 1
+            return None
+        now = time.monotonic()
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            response = self._hit(entry, now)
+            if response is not None:
+                return response
+
+        if self._entries and self._similarity_match(key):
+            scores = self._vectors @ self.embedder.embed([key])[0]
+            slot = int(np.argmax(scores))
+            slot_key = self._slot_keys[slot]
+            if slot_key is not None and scores[slot] >= self.similarity_threshold:
+                response = self._hit(self._entries[slot_key], now)
+                if response is not None:
+                    return response
+
+        self.misses += 1
+        return None
+
+    def put(self, message: str, response: str, generation: int) -> None:
+        """Cache `response` for `message` if nothing was invalidated since `generation`."""
+        key = normalize_message(message)
+        if generation != self.generation or not self._cacheable(key):
+            return
+        existing = self._entries.get(key)
+        if existing is not None:
+            self._remove(existing)
+        if not self._free_slots:
+            self._remove(next(iter(self._entries.values())))
+
+        slot = self._free_slots.pop()
+        # A zero vector never reaches the threshold, so the entry only matches exactly
+        if self._similarity_match(key):
+            self._vectors[slot] = self.embedder.embed([key])[0]
+        self._slot_keys[slot] = key
+        self._entries[key] = CacheEntry(key, response, time.monotonic() + self.ttl_seconds, slot)
+
+    def invalidate(self) -> None:
+        """Drop every entry, e.g. after a tool changed the state answers depend on."""
+        self.generation += 1
+        self._entries.clear()
+        self._vectors[:] = 0.0
+        self._slot_keys = [None] * self.max_entries
+        self._free_slots = list(range(self.max_entries - 1, -1, -1))
@@ -0,0 +1,234 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping, Optional, Protocol, Tuple
+
+from quart import Quart
+
+from app.backend.services.metrics import Counter, registry
+from app.backend.services.tokens import count_tokens, truncate_tokens
+
+if TYPE_CHECKING:
+    import httpx
+
+# Names accepted by the SEARCH_PROVIDER config value
+PROVIDERS = ("tavily",)
+
+TAVILY_URL = "https://api.tavily.com/search"
+
+search_requests: Counter = registry.register(
+    Counter(
+        "assistant_web_search_requests_total",
+        "Web searches by how they were answered.",
+        ("outcome",),
+    )
+)
+
+
+@dataclass
+class SearchResult:
+    title: str
+    url: str
+    content: str
+
+
+class SearchProvider(Protocol):
+    """A web search API, called through the shared HTTP client."""
+
+    async def search(
+        self, client: "httpx.AsyncClient", query: str, max_results: int
+    ) -> List[SearchResult]: ...
+
+
+class TavilyProvider:
+    """The Tavily search API; `url` can point at a local stand-in speaking the same JSON."""
+
+    def __init__(self, api_key: str, url: str = TAVILY_URL) -> None:
+        self.api_key = api_key
+        self.url = url
+
+    async def search(
+        self, client: "httpx.AsyncClient", query: str, max_results: int
+    ) -> List[SearchResult]:
+        response = await client.post(
+            self.url,
+            json={"api_key": self.api_key, "query": query, "max_results": max_results},
+        )
+        response.raise_for_status()
+        return [
+            SearchResult(
+                title=str(result.get("title", "")),
+                url=str(result.get("url", "")),
+                content=str(result.get("content", "")),
+            )
+            for result in response.json().get("results", [])
+        ]
+
+
+def format_results(query: str, results: List[SearchResult], max_tokens: int) -> str:
+    """Results as prompt text, cut off once `max_tokens` tokens are used."""
+    if not results:
+        return f"No web results for '{query}'."
+    text = f"Web results for '{query}':"
+    budget = max_tokens - count_tokens(text)
+    for number, result in enumerate(results, 1):
+        entry = f"\n{number}. {result.title} ({result.url})\n{result.content}"
+        tokens = count_tokens(entry)
+        if tokens > budget:
+            # Keep what fits of the first result that doesn't
+            if budget > 0:
+                text += truncate_tokens(entry, budget)
+            break
+        text += entry
+        budget -= tokens
+    return text
+
+
+class WebSearch:
+    """
+    Web search for the assistant, built to keep provider calls to a minimum.
+
+    Every call goes through one pooled `httpx.AsyncClient`, so connections to the
+    provider are reused. Queries that differ only in case and spacing share a cache
+    key; identical queries that arrive while one is in flight wait for that
+    request instead of making their own. Answers are trimmed to `max_tokens` before
+    they are cached, so a repeated search costs neither a request nor prompt space
+    beyond the budget. Entries expire after `ttl_seconds` and the least recently
+    used one is evicted beyond `max_entries`. Failed searches are not cached.
+    """
+
+    def __init__(
+        self,
+        provider: SearchProvider,
+        max_results: int = 5,
+        max_tokens: int = 800,
+        ttl_seconds: float = 900,
+        max_entries: int = 256,
+        timeout: float = 10.0,
+        max_connections: int = 10,
+    ) -> None:
+        self.provider = provider
+        self.max_results = max_results
+        self.max_tokens = max_tokens
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._client: Optional["httpx.AsyncClient"] = None
+        # Normalized query -> (expiry time, formatted results), least recently used first
+        self._cache: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._in_flight: Dict[str, "asyncio.Future[str]"] = {}
+
+    @property
+    def client(self) -> "httpx.AsyncClient":
+        if self._client is None:
+            # Imported on first use, so workers that never search don't load it
+            import httpx
+
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        """Close the pooled connections; the next search opens new ones."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _cached(self, key: str) -> Optional[str]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        expires_at, text = entry
+        if expires_at <= time.monotonic():
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return text
+
+    def _store(self, key: str, text: str) -> None:
+        self._cache[key] = (time.monotonic() + self.ttl_seconds, text)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    async def _fetch(self, key: str, query: str) -> str:
+        results = await self.provider.search(self.client, query, self.max_results)
+        text = format_results(query, results, self.max_tokens)
+        self._store(key, text)
+        return text
+
+    def _finished(self, key: str, future: "asyncio.Future[str]") -> None:
+        del self._in_flight[key]
+        # Mark a failure as seen even if every caller has stopped waiting
+        if not future.cancelled():
+            future.exception()
+
+    async def search(self, query: str) -> str:
+        """The formatted results for `query`, from the cache when possible."""
+        # Punctuation is kept: "C++" and "C#" are different searches
+        key = " ".join(query.lower().split())
+        text = self._cached(key)
+        if text is not None:
+            search_requests.inc(1, "cached")
+            return text
+
+        future = self._in_flight.get(key)
+        if future is None:
+            search_requests.inc(1, "fetched")
+            future = asyncio.ensure_future(self._fetch(key, query))
+            self._in_flight[key] = future
+            future.add_done_callback(lambda done: self._finished(key, done))
+        else:
+            search_requests.inc(1, "coalesced")
+        # A caller that gives up (tool timeout) leaves the request running for the others
+        return await asyncio.shield(future)
+
+
+# The configured search, if any (set by `init_app`)
+searcher: Optional[WebSearch] = None
+
+
+def create_search(config: Mapping[str, Any]) -> Optional[WebSearch]:
+    """
+    Build the web search selected by `SEARCH_PROVIDER` in `config`, or `None` when it
+    has no API key.
+
+    `tavily` (the default) uses the TAVILY_API_KEY environment variable and
+    `SEARCH_API_URL` if set. `SEARCH_MAX_RESULTS`, `SEARCH_RESULT_TOKENS`,
+    `SEARCH_CACHE_SECONDS` and `SEARCH_CACHE_SIZE` tune the `WebSearch`.
+    """
+    provider_name = config.get("SEARCH_PROVIDER", "tavily")
+    if provider_name != "tavily":
+        raise ValueError(
+            f"Unknown SEARCH_PROVIDER {provider_name!r}; expected one of {', '.join(PROVIDERS)}"
+        )
+    api_key = os.getenv("TAVILY_API_KEY")
+    if not api_key:
+        return None
+    provider = TavilyProvider(api_key, config.get("SEARCH_API_URL") or TAVILY_URL)
+    return WebSearch(
+        provider,
+        max_results=config.get("SEARCH_MAX_RESULTS", 5),
+        max_tokens=config.get("SEARCH_RESULT_TOKENS", 800),
+        ttl_seconds=config.get("SEARCH_CACHE_SECONDS", 900),
+        max_entries=config.get("SEARCH_CACHE_SIZE", 256),
+    )
+
+
+def init_app(app: Quart) -> None:
+    """Set up the web search from the app config and close its connections on shutdown."""
+    global searcher
+    searcher = create_search(app.config)
+
+    @app.after_serving
+    async def close_search_client() -> None:
+        if searcher is not None:
+            await searcher.aclose()
@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import TYPE_CHECKING, Awaitable, Callable, Deque, List, Optional, Set, Tuple
+
+from app.backend.services.tokens import count_tokens, truncate_tokens
+
+if TYPE_CHECKING:
+    # Imported where messages are built, so the app can start without loading LangChain
+    from langchain_core.messages import BaseMessage
+
+logger = logging.getLogger(__name__)
+
+# Folds older messages into the running summary: (summary, messages) -> new summary
+Summarizer = Callable[[str, List["BaseMessage"]], Awaitable[str]]
+
+
+class SessionMemory:
+    """
+    Conversation history for one session, kept within a token budget.
+
+    The most recent messages are kept verbatim. Once they exceed `max_tokens` the
+    oldest ones are dropped from the window; if the store has a summarizer they are
+    first queued up to be folded into a rolling summary that is sent ahead of the window.
+    """
+
+    def __init__(self, max_tokens: int) -> None:
+        self.max_tokens = max_tokens
+        self.summary = ""
+        self.summary_tokens = 0
+        self.last_used = time.monotonic()
+        # Serializes turns within the session so history is appended in order
+        self.lock = asyncio.Lock()
+        self._messages: Deque[Tuple["BaseMessage", int]] = deque()
+        self._tokens = 0
+        self._evicted: List["BaseMessage"] = []
+        self._evicted_tokens = 0
+
+    @property
+    def tokens(self) -> int:
+        """Tokens the history adds to a prompt."""
+        return self._tokens + self.summary_tokens
+
+    @property
+    def has_history(self) -> bool:
+        """Whether earlier turns (or a summary of them) are sent with the next one."""
+        return bool(self._messages or self.summary)
+
+    def history(self) -> List["BaseMessage"]:
+        """Messages to send as `chat_history` for the next turn."""
+        from langchain_core.messages import SystemMessage
+
+        messages = [message for message, _ in self._messages]
+        if self.summary:
+            summary = SystemMessage(content=f"Summary of the earlier conversation: {self.summary}")
+            return [summary] + messages
+        return messages
+
+    def add_turn(self, user_message: str, ai_message: str, keep_evicted: bool) -> None:
+        """Append a user/assistant exchange and trim the window back under budget."""
+        from langchain_core.messages import AIMessage, HumanMessage
+
+        turn: Tuple["BaseMessage", ...] = (
+            HumanMessage(content=user_message),
+            AIMessage(content=ai_message),
+        )
+        for message in turn:
+            tokens = count_tokens(str(message.content))
+            self._messages.append((message, tokens))
+            self._tokens += tokens
+
+        while self._messages and self.tokens > self.max_tokens:
+            message, tokens = self._messages.popleft()
+            self._tokens -= tokens
+            if keep_evicted:
+                self._evicted.append(message)
+                self._evicted_tokens += tokens
+
+    def take_evicted(self, min_tokens: int) -> List["BaseMessage"]:
+        """Hand over evicted messages once at least `min_tokens` of them have piled up."""
+        if self._evicted_tokens < min_tokens:
+            return []
+        evicted, self._evicted, self._evicted_tokens = self._evicted, [], 0
+        return evicted
+
+    def set_summary(self, summary: str, max_tokens: int) -> None:
+        self.summary = truncate_tokens(summary, max_tokens)
+        self.summary_tokens = count_tokens(self.summary)
+
+
+class SessionStore:
+    """
+    Per-session conversation memories with LRU eviction of idle sessions.
+
+    At most `max_sessions` sessions are kept; the least recently used one is dropped
+    when a new session would exceed that, and any session idle for longer than
+    `idle_seconds` is dropped on the next access. Prompt size per session is capped
+    by `history_tokens`, so it stays bounded however long the process runs.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 1000,
+        idle_seconds: float = 3600,
+        history_tokens: int = 2000,
+        summarizer: Optional[Summarizer] = None,
+        summarize_after_tokens: int = 500,
+    ) -> None:
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self.history_tokens = history_tokens
+        self.summarizer = summarizer
+        self.summarize_after_tokens = summarize_after_tokens
+        self._sessions: "OrderedDict[str, SessionMemory]" = OrderedDict()
+        self._summaries: Set["asyncio.Task[None]"] = set()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _evict(self) -> None:
+        cutoff = time.monotonic() - self.idle_seconds
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if oldest.last_used >= cutoff and len(self._sessions) <= self.max_sessions:
+                break
+            self._sessions.popitem(last=False)
+
+    def get(self, session_id: str) -> SessionMemory:
+        """Get the memory for a session, creating it if needed."""
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = SessionMemory(self.history_tokens)
+            self._sessions[session_id] = session
+        else:
+            self._sessions.move_to_end(session_id)
+        session.last_used = time.monotonic()
+        self._evict()
+        return session
+
+    def save_turn(self, session: SessionMemory, user_message: str, ai_message: str) -> None:
+        """Record an exchange, summarizing dropped history in the background if enabled."""
+        session.add_turn(user_message, ai_message, keep_evicted=self.summarizer is not None)
+        if self.summarizer is None:
+            return
+        evicted = session.take_evicted(self.summarize_after_tokens)
+        if evicted:
+            task = asyncio.ensure_future(self._summarize(session, evicted))
+            self._summaries.add(task)
+            task.add_done_callback(self._summaries.discard)
+
+    async def _summarize(self, session: SessionMemory, messages: List["BaseMessage"]) -> None:
+        assert self.summarizer is not None
+        # Hold the session lock so the next turn sees the updated summary
+        async with session.lock:
+            try:
+                summary = await self.summarizer(session.summary, messages)
+            except Exception:
+                logger.exception("Failed to summarize conversation history")
+                return
+            session.set_summary(summary, self.history_tokens // 4)
@@ -0,0 +1,12 @@
+from typing import Any, Dict
+
+from app.backend.services.json_provider import dumps_bytes
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> bytes:
+    """Format a Server-Sent Events message."""
+    return b"event: " + event.encode() + b"\ndata: " + dumps_bytes(data) + b"\n\n"
+
+
+# A comment line; keeps idle connections open through proxies
+KEEPALIVE = b": keep-alive\n\n"
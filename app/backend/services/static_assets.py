@@ -0,0 +1,144 @@
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from quart import Request, Response
+
+try:
+    import brotli  # type: ignore
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Vite's build output in assets/ is named `<name>-<8 character hash>.<ext>`
+HASHED_ASSET_RE = re.compile(r"^assets/.+-[\w-]{8}\.[\w.]+$")
+
+# Hashed files never change under the same name; everything else is revalidated
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+COMPRESSIBLE_TYPES = ("application/javascript", "application/json", "image/svg+xml")
+# Smaller files don't get meaningfully smaller
+MIN_COMPRESS_BYTES = 256
+
+# Content-Encoding -> suffix of precompressed files on disk, best first
+ENCODINGS = {"br": ".br", "gzip": ".gz"}
+
+
+@dataclass
+class Asset:
+    body: bytes
+    mimetype: str
+    etag: str
+    cache_control: str
+    # Content-Encoding -> the compressed body, for the variants smaller than `body`
+    encoded: Dict[str, bytes] = field(default_factory=dict)
+
+
+def _compressible(mimetype: str) -> bool:
+    return mimetype.startswith("text/") or mimetype in COMPRESSIBLE_TYPES
+
+
+def _compress(body: bytes, encoding: str) -> Optional[bytes]:
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=9, mtime=0)
+    if encoding == "br" and brotli is not None:
+        return bytes(brotli.compress(body))
+    return None
+
+
+def _read(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+class StaticAssets:
+    """
+    The built frontend, held in memory and served without touching the disk.
+
+    `load` reads every file under `root` once, with its compressed variants: `.br`
+    and `.gz` files next to it when the build produced them, otherwise gzip (and
+    brotli, when the `brotli` package is installed) compressed at load time. A
+    variant is kept only if it is smaller.
+
+    Responses pick the best variant the client accepts and carry an ETag from the
+    content hash, so `If-None-Match` is answered with a 304 from memory. Hashed
+    Vite assets are cached by browsers for good; other files are revalidated.
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+        self._assets: Dict[str, Asset] = {}
+
+    def load(self) -> None:
+        """(Re)read the files under `root`."""
+        started = time.perf_counter()
+        assets: Dict[str, Asset] = {}
+        suffixes = tuple(ENCODINGS.values())
+        for directory, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if filename.endswith(suffixes):
+                    continue
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, self.root).replace(os.sep, "/")
+                assets[name] = self._load_asset(name, path)
+        self._assets = assets
+        logger.info(
+            "Loaded %d static files (%d bytes) in %.2fs",
+            len(assets),
+            sum(len(a.body) for a in assets.values()),
+            time.perf_counter() - started,
+        )
+
+    def _load_asset(self, name: str, path: str) -> Asset:
+        body = _read(path)
+        mimetype = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        if name.endswith(".map"):
+            mimetype = "application/json"
+        asset = Asset(
+            body=body,
+            mimetype=mimetype,
+            etag=hashlib.blake2b(body, digest_size=16).hexdigest(),
+            cache_control=IMMUTABLE if HASHED_ASSET_RE.match(name) else REVALIDATE,
+        )
+        if not _compressible(mimetype) or len(body) < MIN_COMPRESS_BYTES:
+            return asset
+        for encoding, suffix in ENCODINGS.items():
+            compressed = (
+                _read(path + suffix) if os.path.exists(path + suffix) else _compress(body, encoding)
+            )
+            if compressed is not None and len(compressed) < len(body):
+                asset.encoded[encoding] = compressed
+        return asset
+
+    def get(self, name: str) -> Optional[Asset]:
+        return self._assets.get(name)
+
+    def response(self, asset: Asset, request: Request) -> Response:
+        """The response for `asset`: a 304, or the best encoding the client accepts."""
+        encoding: Optional[str] = None
+        if asset.encoded:
+            encoding = request.accept_encodings.best_match(list(asset.encoded))
+        # Each encoding is a different representation, so it gets its own tag
+        etags: List[str] = [asset.etag] + [f"{asset.etag}-{e}" for e in asset.encoded]
+        etag = asset.etag if encoding is None else f"{asset.etag}-{encoding}"
+
+        if any(request.if_none_match.contains_weak(tag) for tag in etags):
+            response = Response(b"", status=304)
+        else:
+            body = asset.body if encoding is None else asset.encoded[encoding]
+            response = Response(body, mimetype=asset.mimetype)
+            if encoding is not None:
+                response.headers["Content-Encoding"] = encoding
+        response.headers["ETag"] = f'"{etag}"'
+        response.headers["Cache-Control"] = asset.cache_control
+        if asset.encoded:
+            response.headers["Vary"] = "Accept-Encoding"
+        return response
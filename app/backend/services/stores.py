@@ -0,0 +1,13 @@
+"""
+The repositories holding tasks, goals and check-ins.
+
+The blueprints serve them over HTTP and the services (the assistant's tools, the
+check-in jobs) change them directly; `database.init_app` binds them to their tables.
+"""
+
+from app.backend.services.records import CheckIn, Goal, Task
+from app.backend.services.repository import Repository, TimeIndex
+
+tasks = Repository(Task, indexes=("status", "check_in_time"))
+goals = Repository(Goal, indexes=("status",))
+checkins = Repository(CheckIn, indexes=("task_id", "status", TimeIndex("next_checkin_time")))
@@ -1,51 +1,179 @@
+import asyncio
 import json
 import os
 from datetime import datetime
-from typing import Optional
+from typing import Callable, List, Optional
 
+from apscheduler.events import EVENT_JOB_ERROR, EVENT_JOB_EXECUTED, EVENT_JOB_MISSED  # type: ignore
+from apscheduler.executors.asyncio import AsyncIOExecutor  # type: ignore
 from apscheduler.executors.pool import ThreadPoolExecutor  # type: ignore
 from apscheduler.jobstores.memory import MemoryJobStore  # type: ignore
 from apscheduler.schedulers.asyncio import AsyncIOScheduler  # type: ignore
 
-# File paths for persistent storage
-TASKS_FILE = "instance/tasks.json"
+from app.backend.services import search
+from app.backend.services.embeddings import HashingEmbedder
+from app.backend.services.job_store import SQLiteJobStore
+from app.backend.services.json_store import JournalStore
+from app.backend.services.metrics import observe_job
+from app.backend.services.records import Status, Task, now
+from app.backend.services.stores import tasks
+from app.backend.services.vector_index import VectorIndex
+
+# File paths for persistent storage (tasks are kept in the database, see
+# services/stores.py)
 MEMORY_FILE = "instance/memory.json"
+MEMORY_JOURNAL_FILE = "instance/memory.journal.jsonl"
+MEMORY_VECTORS_FILE = "instance/memory_vectors.npy"
+MEMORY_VECTOR_KEYS_FILE = "instance/memory_vectors.keys.jsonl"
 
-# Global scheduler variable
-scheduler = None
+# Number of similar memories offered when a lookup by key misses
+MEMORY_SEARCH_RESULTS = 3
+# Minimum cosine similarity for a memory to count as related
+MEMORY_SEARCH_MIN_SCORE = 0.2
+
+# How often the memory journal is folded back into memory.json
+MEMORY_COMPACTION_MINUTES = 10
+
+# Global scheduler variable, and its persistent job store when it has one
+scheduler: Optional[AsyncIOScheduler] = None
+job_store: Optional[SQLiteJobStore] = None
+
+# Callbacks run after a tool changes the stored tasks or memories
+state_change_listeners: List[Callable[[], None]] = []
+
+
+def notify_state_change() -> None:
+    """Tell listeners (such as the assistant's response cache) that tool state changed."""
+    for listener in state_change_listeners:
+        listener()
 
 
 def ensure_files_exist() -> None:  # type: ignore
     """Ensure that the JSON storage files exist."""
     os.makedirs("instance", exist_ok=True)
 
-    if not os.path.exists(TASKS_FILE):
-        with open(TASKS_FILE, 'w') as f:
-            json.dump({"tasks": []}, f)
-
     if not os.path.exists(MEMORY_FILE):
-        with open(MEMORY_FILE, 'w') as f:
+        with open(MEMORY_FILE, "w") as f:
             json.dump({"memories": {}}, f)
 
 
 ensure_files_exist()
 
+# Cached documents; writes are coalesced and flushed to disk in the background
+memory_store = JournalStore(MEMORY_FILE, MEMORY_JOURNAL_FILE, section="memories")
 
-async def initialize_scheduler() -> AsyncIOScheduler:  # type: ignore
-    """Initialize the scheduler in an async context."""
-    global scheduler
+# Similarity index over "key: value" texts of the stored memories
+memory_index = VectorIndex(MEMORY_VECTORS_FILE, MEMORY_VECTOR_KEYS_FILE, HashingEmbedder(dim=128))
+_memory_index_lock = asyncio.Lock()
+# memory_store.external_version the index was last brought up to date with
+_memory_index_version: Optional[int] = None
+
+
+def use_shared_storage() -> None:
+    """
+    Make the tool stores safe to use from several worker processes at once.
+
+    The memory store switches to file-locked, write-through mode and changes picked
+    up from other workers count as state changes. The memory index, whose files are
+    appended to in place, is kept in memory by each worker instead and backfilled
+    from the shared memories.
+    """
+    global memory_index, _memory_index_version
+    memory_store.shared = True
+    memory_store.on_change = notify_state_change
+    memory_index = VectorIndex(None, None, memory_index.embedder)
+    _memory_index_version = None
+
+
+def _memory_text(key: str, memory: dict) -> str:
+    return f"{key}: {memory['value']}"
+
+
+async def get_memory_index() -> VectorIndex:
+    """The memory index, after indexing any stored memories it does not cover yet."""
+    global _memory_index_version
+    if memory_store.shared:
+        # Picks up memories other workers stored
+        await memory_store.all()
+    if _memory_index_version == memory_store.external_version:
+        return memory_index
+    async with _memory_index_lock:
+        version = memory_store.external_version
+        if _memory_index_version != version:
+            memories = list((await memory_store.all()).items())
+
+            def backfill() -> None:
+                missing = [(key, memory) for key, memory in memories if key not in memory_index]
+                if missing:
+                    memory_index.add(
+                        [key for key, _ in missing],
+                        [_memory_text(key, memory) for key, memory in missing],
+                    )
+
+            await asyncio.to_thread(backfill)
+            _memory_index_version = version
+    return memory_index
+
+
+async def flush_stores() -> None:
+    """Write any pending changes to the JSON storage files."""
+    await memory_store.flush()
+    await asyncio.to_thread(memory_index.flush)
+
+
+async def compact_memory() -> None:
+    """Fold the memory journal into the memory.json snapshot."""
+    await memory_store.compact()
+
+
+async def initialize_scheduler(  # type: ignore
+    database_path: Optional[str] = None,
+    paused: bool = False,
+) -> AsyncIOScheduler:
+    """
+    Initialize the scheduler in an async context.
+
+    With a `database_path` jobs are kept in that SQLite file and survive restarts;
+    otherwise they only live in memory. A `paused` scheduler stores jobs that are
+    added but does not run any until resumed.
+    """
+    global scheduler, job_store
     if scheduler is None:
-        jobstores = {'default': MemoryJobStore()}
-        executors = {'default': ThreadPoolExecutor(20)}
-        job_defaults = {'coalesce': False, 'max_instances': 3}
+        if database_path is not None:
+            job_store = SQLiteJobStore(database_path)
+            jobstores = {"default": job_store}
+        else:
+            jobstores = {"default": MemoryJobStore()}
+        executors = {"default": ThreadPoolExecutor(20), "asyncio": AsyncIOExecutor()}
+        job_defaults = {"coalesce": False, "max_instances": 3}
 
         scheduler = AsyncIOScheduler(
             jobstores=jobstores, executors=executors, job_defaults=job_defaults
         )
-        scheduler.start()
+        scheduler.add_listener(observe_job, EVENT_JOB_EXECUTED | EVENT_JOB_ERROR | EVENT_JOB_MISSED)
+        scheduler.add_job(
+            compact_memory,
+            "interval",
+            minutes=MEMORY_COMPACTION_MINUTES,
+            id="compact_memory",
+            executor="asyncio",
+            coalesce=True,
+            max_instances=1,
+            replace_existing=True,
+        )
+        scheduler.start(paused=paused)
     return scheduler
 
 
+async def shutdown_scheduler() -> None:
+    """Stop the scheduler so the next initialize_scheduler call starts a fresh one."""
+    global scheduler, job_store
+    if scheduler is not None:
+        scheduler.shutdown(wait=False)
+        scheduler = None
+        job_store = None
+
+
 async def schedule_goal(goal_description: str) -> str:
     """
     Break down a goal into steps and schedule them.
@@ -58,67 +186,37 @@ async def schedule_goal(goal_description: str) -> str:
         # Initialize scheduler if needed
         await initialize_scheduler()
 
-        # Load existing tasks
-        with open(TASKS_FILE, 'r') as f:
-            data = json.load(f)
-
         # Create a new task
-        task_id = str(len(data["tasks"]) + 1)
-        new_task = {
-            "id": task_id,
-            "description": goal_description,
-            "steps": [],
-            "created_at": datetime.now().isoformat(),
-            "status": "pending",
-        }
-
-        # Add the task
-        data["tasks"].append(new_task)
-
-        # Save the updated tasks
-        with open(TASKS_FILE, 'w') as f:
-            json.dump(data, f, indent=2)
+        task = await tasks.insert(Task(title=goal_description, created_at=now()))
 
-        return f"Created new task with ID {task_id}. You can now add steps to this task."
+        notify_state_change()
+        return f"Created new task with ID {task.id}. You can now add steps to this task."
 
     except Exception as e:
         return f"Error scheduling goal: {str(e)}"
 
 
-async def mark_task_done(task_id: str, step_index: Optional[int] = None) -> str:
+async def mark_task_done(task_id: str) -> str:
     """
-    Mark a task or step as complete.
+    Mark a task as complete.
     Args:
         task_id: ID of the task
-        step_index: Index of the step (if marking a step complete)
     Returns:
         str: Response message
     """
     try:
-        with open(TASKS_FILE, 'r') as f:
-            data = json.load(f)
+        from app.backend.services.checkin_jobs import cancel_checkin
 
         # Find the task
-        task = next((t for t in data["tasks"] if t["id"] == task_id), None)
-        if not task:
+        task = tasks.get(int(task_id)) if task_id.strip().isdigit() else None
+        if task is None:
             return f"Task with ID {task_id} not found."
 
-        if step_index is not None:
-            # Mark step as complete
-            if 0 <= step_index < len(task["steps"]):
-                task["steps"][step_index]["status"] = "completed"
-                task["steps"][step_index]["completed_at"] = datetime.now().isoformat()
-            else:
-                return f"Step index {step_index} out of range."
-        else:
-            # Mark entire task as complete
-            task["status"] = "completed"
-            task["completed_at"] = datetime.now().isoformat()
-
-        # Save the updated tasks
-        with open(TASKS_FILE, 'w') as f:
-            json.dump(data, f, indent=2)
+        # Mark the task as complete, as the complete endpoint does
+        await tasks.update(task.id, {"status": Status.COMPLETED, "completed_at": now()})
+        await cancel_checkin(task.id)
 
+        notify_state_change()
         return "Task updated successfully."
 
     except Exception as e:
@@ -135,15 +233,13 @@ async def store_memory(key: str, value: str) -> str:
         str: Response message
     """
     try:
-        with open(MEMORY_FILE, 'r') as f:
-            data = json.load(f)
+        index = await get_memory_index()
 
         # Store the memory
-        data["memories"][key] = {"value": value, "created_at": datetime.now().isoformat()}
-
-        # Save the updated memories
-        with open(MEMORY_FILE, 'w') as f:
-            json.dump(data, f, indent=2)
+        memory = {"value": value, "created_at": datetime.now().isoformat()}
+        await memory_store.set(key, memory)
+        await asyncio.to_thread(index.add, [key], [_memory_text(key, memory)])
+        notify_state_change()
 
         return f"Memory stored successfully with key: {key}"
 
@@ -160,19 +256,50 @@ async def get_memory(key: str) -> str:
         str: Memory value or error message
     """
     try:
-        with open(MEMORY_FILE, 'r') as f:
-            data = json.load(f)
-
-        memory = data["memories"].get(key)
+        memory = await memory_store.get(key)
         if memory:
             return f"Memory for key '{key}': {memory['value']}"
-        else:
-            return f"No memory found for key: {key}"
+
+        # Offer the closest memories so the agent doesn't have to guess keys again
+        related = await _related_memories(key)
+        if related:
+            return f"No memory found for key: {key}. Closest memories:\n{related}"
+        return f"No memory found for key: {key}"
 
     except Exception as e:
         return f"Error retrieving memory: {str(e)}"
 
 
+async def _related_memories(query: str) -> str:
+    index = await get_memory_index()
+    memories = await memory_store.all()
+    found = await asyncio.to_thread(index.search, query, MEMORY_SEARCH_RESULTS)
+    lines = [
+        f"- {key}: {memories[key]['value']}"
+        for key, score in found
+        if score >= MEMORY_SEARCH_MIN_SCORE and key in memories
+    ]
+    return "\n".join(lines)
+
+
+async def search_memories(query: str) -> str:
+    """
+    Find the stored memories most similar to a query.
+    Args:
+        query: What to look for
+    Returns:
+        str: Matching memories or a message saying there are none
+    """
+    try:
+        related = await _related_memories(query)
+        if related:
+            return f"Memories related to '{query}':\n{related}"
+        return f"No memories related to '{query}'."
+
+    except Exception as e:
+        return f"Error searching memories: {str(e)}"
+
+
 async def web_search(query: str) -> str:
     """
     Search the web for real-time information.
@@ -181,5 +308,10 @@ async def web_search(query: str) -> str:
     Returns:
         str: Search results or error message
     """
-    # Simple placeholder for web search functionality
-    return f"Web search for '{query}' is not implemented yet. This feature will be added in a future update."
+    if search.searcher is None:
+        return "Web search is not configured. Set TAVILY_API_KEY to enable it."
+    try:
+        return await search.searcher.search(query)
+
+    except Exception as e:
+        return f"Error searching the web: {str(e)}"
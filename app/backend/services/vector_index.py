@@ -0,0 +1,144 @@
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Tuple, cast
+
+import numpy as np
+
+from app.backend.services.embeddings import Embedder
+
+
+class VectorIndex:
+    """
+    Embedded cosine-similarity index stored as a memory-mapped `.npy` matrix.
+
+    Row `i` of the matrix is the normalized embedding of the `i`-th key in the keys
+    file, a JSON-lines sidecar that is appended to as keys are added. Loading maps the
+    matrix instead of reading it, so startup cost does not depend on the index size.
+    New keys are embedded in one batch and written into spare rows; when the matrix
+    is full it is copied into a file of twice the capacity. Re-adding a key overwrites
+    its row. Rows are flushed before their keys are appended, so a crash cannot leave
+    a key pointing at an unwritten row. Search is one matrix-vector product plus a partial sort for the top k.
+
+    Without paths the index is kept in memory only. Methods are thread-safe, so the
+    app can call them in worker threads.
+    """
+
+    def __init__(
+        self,
+        vectors_path: Optional[str],
+        keys_path: Optional[str],
+        embedder: Embedder,
+        capacity: int = 1024,
+    ) -> None:
+        self.vectors_path = vectors_path
+        self.keys_path = keys_path
+        self.embedder = embedder
+        self.initial_capacity = capacity
+        self._vectors: Optional[np.ndarray] = None
+        self._keys: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._load()
+            return len(self._keys)
+
+    def __contains__(self, key: object) -> bool:
+        with self._lock:
+            self._load()
+            return key in self._rows
+
+    def _create(self, capacity: int) -> np.ndarray:
+        if self.vectors_path is None:
+            vectors = np.zeros((capacity, self.embedder.dim), dtype=np.float32)
+            if self._vectors is not None:
+                vectors[: len(self._keys)] = self._vectors[: len(self._keys)]
+            return vectors
+        tmp_path = self.vectors_path + ".tmp"
+        vectors = np.lib.format.open_memmap(
+            tmp_path, mode="w+", dtype=np.float32, shape=(capacity, self.embedder.dim)
+        )
+        if self._vectors is not None:
+            vectors[: len(self._keys)] = self._vectors[: len(self._keys)]
+            vectors.flush()
+            del self._vectors
+        os.replace(tmp_path, self.vectors_path)
+        return cast(np.ndarray, vectors)
+
+    def _load(self) -> np.ndarray:
+        if self._vectors is not None:
+            return self._vectors
+        if self.vectors_path is None or self.keys_path is None:
+            self._vectors = self._create(self.initial_capacity)
+            return self._vectors
+        keys: List[str] = []
+        if os.path.exists(self.keys_path):
+            with open(self.keys_path, "r") as f:
+                lines = f.read().split("\n")
+            if lines[-1]:
+                # Drop a torn last line so later appends start on a clean line
+                with open(self.keys_path, "w") as f:
+                    f.write("".join(line + "\n" for line in lines[:-1]))
+            # Parse all lines as one JSON array, much faster than line by line
+            keys = json.loads("[" + ",".join(lines[:-1]) + "]")
+        vectors: Optional[np.ndarray] = None
+        if os.path.exists(self.vectors_path):
+            vectors = np.load(self.vectors_path, mmap_mode="r+")
+            if vectors.shape[1] != self.embedder.dim:
+                # Embedder changed; the stored vectors are meaningless
+                vectors, keys = None, []
+        # Rows past the end of the matrix were never written
+        keys = keys[: len(vectors)] if vectors is not None else []
+        self._keys = keys
+        self._rows = {key: row for row, key in enumerate(keys)}
+        if vectors is None:
+            with open(self.keys_path, "w"):
+                pass
+            vectors = self._create(self.initial_capacity)
+        self._vectors = vectors
+        return vectors
+
+    def add(self, keys: List[str], texts: List[str]) -> None:
+        """Embed `texts` in one batch and index them under `keys`."""
+        with self._lock:
+            vectors = self._load()
+            embedded = self.embedder.embed(texts)
+            new_keys = []
+            for key, vector in zip(keys, embedded):
+                row = self._rows.get(key)
+                if row is None:
+                    if len(self._keys) == len(vectors):
+                        vectors = self._vectors = self._create(len(vectors) * 2)
+                    row = len(self._keys)
+                    self._keys.append(key)
+                    self._rows[key] = row
+                    new_keys.append(key)
+                vectors[row] = vector
+            if isinstance(vectors, np.memmap):
+                # Rows reach the disk before their keys, so every stored key has its vector
+                vectors.flush()
+            if new_keys and self.keys_path is not None:
+                with open(self.keys_path, "a") as f:
+                    f.write("".join(json.dumps(key) + "\n" for key in new_keys))
+
+    def flush(self) -> None:
+        """Write modified rows of the mapped matrix to disk."""
+        with self._lock:
+            if isinstance(self._vectors, np.memmap):
+                self._vectors.flush()
+
+    def search(self, text: str, k: int = 3) -> List[Tuple[str, float]]:
+        """The `k` keys most similar to `text`, best first, with their cosine similarity."""
+        with self._lock:
+            vectors = self._load()
+            count = len(self._keys)
+            if count == 0:
+                return []
+            query = self.embedder.embed([text])[0]
+            scores = vectors[:count] @ query
+            k = min(k, count)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(self._keys[row], float(scores[row])) for row in top]
@@ -0,0 +1,350 @@
+"""
+Load-test the API and the assistant tools in-process.
+
+Drives the app through the Quart test client with a number of concurrent callers
+and reports throughput and p50/p99 latency for:
+
+- task CRUD (create, get, update, complete)
+- `GET /api/tasks/` at 1k, 10k and 100k stored tasks (first page, filtered page,
+  full list)
+- starting 10k tasks in one `POST /api/tasks/start`, check-in scheduling included
+- polling `GET /api/checkins/due` with 10k stored check-ins
+- serving the built frontend: a hashed asset, a client-side route (index.html)
+  and a revalidation answered with 304
+- the file-backed functions in `services/tools.py`, called concurrently
+- `POST /api/assistant/message` with the offline scripted chat model
+  (`LLM_BACKEND="fake"`), so the numbers cover the agent loop, tools and memory
+  without any provider latency
+
+Results are written as JSON (to `benchmark-results.json` by default) together with
+the commit they were measured at; `--compare` prints the change against an earlier
+results file.
+
+    python -m benchmarks.api [--quick] [--output FILE] [--compare FILE]
+
+The tools' data files live under `instance/` relative to the working directory, so
+the suite runs in a temporary directory and leaves the checkout's data alone.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from benchmarks.json_provider import make_tasks
+
+LIST_SIZES = (1_000, 10_000, 100_000)
+QUICK_LIST_SIZES = (1_000, 10_000)
+CHECKINS = 10_000
+STARTS = 10_000
+# Share of the stored check-ins that are due when polling
+DUE_SHARE = 0.01
+CONCURRENCY = 16
+
+Result = Dict[str, Any]
+
+
+async def measure(
+    name: str,
+    call: Callable[[int], Awaitable[Any]],
+    requests: int,
+    concurrency: int = CONCURRENCY,
+) -> Result:
+    """Make `requests` calls (numbered from 0) with `concurrency` callers at a time."""
+    latencies: List[float] = []
+    numbers = iter(range(requests))
+
+    async def caller() -> None:
+        for i in numbers:
+            start = time.perf_counter()
+            await call(i)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(caller() for _ in range(concurrency)))
+    seconds = time.perf_counter() - start
+
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    result = {
+        "name": name,
+        "requests": requests,
+        "concurrency": concurrency,
+        "throughput": requests / seconds,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "p50_ms": cuts[49] * 1000,
+        "p99_ms": cuts[98] * 1000,
+    }
+    print(
+        f"{name:<44}{result['throughput']:>10.0f}"
+        f"{result['p50_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+    )
+    return result
+
+
+def http(client: Any, method: str, path: str, status: int = 200, **kwargs: Any) -> Any:
+    """A request callable for `measure` that fails on an unexpected status."""
+
+    async def call(i: int) -> None:
+        response = await client.open(path.format(i=i), method=method, **kwargs)
+        await response.get_data()
+        if response.status_code != status:
+            raise RuntimeError(f"{method} {path}: expected {status}, got {response.status_code}")
+
+    return call
+
+
+async def bench_crud(client: Any, requests: int) -> List[Result]:
+    from app.backend.services.stores import tasks
+
+    create = http(client, "POST", "/api/tasks/", 201, json={"title": "Task"})
+    results = [await measure("tasks.create", create, requests)]
+    ids = [task["id"] for task in tasks.all()[-requests:]]
+
+    def by_id(method: str, suffix: str = "", **kwargs: Any) -> Callable[[int], Awaitable[Any]]:
+        calls = [http(client, method, f"/api/tasks/{i}{suffix}", **kwargs) for i in ids]
+        return lambda i: calls[i](i)
+
+    results.append(await measure("tasks.get", by_id("GET"), requests))
+    results.append(
+        await measure("tasks.update", by_id("PUT", json={"description": "Updated"}), requests)
+    )
+    results.append(await measure("tasks.complete", by_id("POST", "/complete"), requests))
+    return results
+
+
+async def bench_lists(client: Any, size: int, requests: int) -> List[Result]:
+    from app.backend.services.stores import tasks
+
+    records = make_tasks(size)
+    for record in records:
+        del record["id"]
+        record["created_at"] = record["created_at"].isoformat()
+    await tasks.insert_many(records)
+
+    # A full listing of 100k tasks is tens of megabytes; make fewer of those
+    full_requests = max(4, min(requests, 100_000 // size))
+    return [
+        await measure(
+            f"tasks.list[{size}].first_page",
+            http(client, "GET", "/api/tasks/?limit=100"),
+            requests,
+        ),
+        await measure(
+            f"tasks.list[{size}].status_page",
+            http(client, "GET", "/api/tasks/?status=in_progress&limit=100"),
+            requests,
+        ),
+        await measure(
+            f"tasks.list[{size}].all",
+            http(client, "GET", "/api/tasks/"),
+            full_requests,
+            min(CONCURRENCY, full_requests),
+        ),
+    ]
+
+
+async def bench_starts(client: Any, requests: int) -> List[Result]:
+    from app.backend.services.stores import tasks
+
+    # Fresh tasks for every request, so each one starts (and schedules) all of them
+    batches = []
+    for _ in range(requests):
+        created = await tasks.insert_many([{"title": "Task"} for _ in range(STARTS)])
+        batches.append([task.id for task in created])
+
+    async def start(i: int) -> None:
+        response = await client.post("/api/tasks/start", json={"task_ids": batches[i]})
+        await response.get_data()
+        if response.status_code != 200:
+            raise RuntimeError(f"POST /api/tasks/start: got {response.status_code}")
+
+    return [await measure(f"tasks.start_many[{STARTS}]", start, requests, 1)]
+
+
+async def bench_due(client: Any, requests: int) -> List[Result]:
+    from app.backend.services.stores import checkins
+
+    now = datetime.now()
+    due = int(CHECKINS * DUE_SHARE)
+    await checkins.insert_many(
+        [
+            {
+                "task_id": i,
+                "status": "in_progress",
+                "notes": "",
+                "created_at": now.isoformat(),
+                "next_checkin_time": (now + timedelta(minutes=i - due)).isoformat(),
+            }
+            for i in range(1, CHECKINS + 1)
+        ]
+    )
+    return [
+        await measure(
+            f"checkins.due[{CHECKINS}]", http(client, "GET", "/api/checkins/due"), requests
+        )
+    ]
+
+
+async def bench_static(client: Any, requests: int) -> List[Result]:
+    import app.backend
+
+    assets = os.path.join(os.path.dirname(app.backend.__file__), "static", "assets")
+    names = os.listdir(assets) if os.path.isdir(assets) else []
+    scripts = [name for name in names if name.endswith(".js")]
+    if not scripts:
+        # The frontend hasn't been built
+        return []
+    asset = f"/assets/{scripts[0]}"
+    gzip = {"Accept-Encoding": "gzip, br"}
+    response = await client.get(asset, headers=gzip)
+    etag = response.headers["ETag"]
+    return [
+        await measure("static.asset", http(client, "GET", asset, headers=gzip), requests),
+        await measure(
+            "static.spa_route", http(client, "GET", "/goals/{i}", headers=gzip), requests
+        ),
+        await measure(
+            "static.not_modified",
+            http(client, "GET", asset, 304, headers={**gzip, "If-None-Match": etag}),
+            requests,
+        ),
+    ]
+
+
+async def bench_tools(requests: int) -> List[Result]:
+    from app.backend.services import tools
+
+    await tools.schedule_goal("Warm-up goal")
+    results = [
+        await measure(
+            "tools.store_memory", lambda i: tools.store_memory(f"key-{i}", f"value {i}"), requests
+        ),
+        await measure("tools.get_memory", lambda i: tools.get_memory(f"key-{i}"), requests),
+        await measure(
+            "tools.search_memories", lambda i: tools.search_memories(f"key {i}"), requests
+        ),
+        await measure("tools.schedule_goal", lambda i: tools.schedule_goal(f"Goal {i}"), requests),
+        await measure("tools.mark_task_done", lambda i: tools.mark_task_done("1"), requests),
+    ]
+    # schedule_goal started a scheduler outside any app; stop it
+    await tools.shutdown_scheduler()
+    return results
+
+
+async def bench_assistant(client: Any, requests: int) -> List[Result]:
+    from app.backend.blueprints import assistant
+
+    # Build the agent up front, as the warm-up hook would, so it is not timed
+    await assistant.get_agent()
+    # Messages that make the scripted model call each of the tools
+    messages = (
+        "What do I know about key {i}?",
+        "Remember that appointment {i} is on Friday",
+        "Break down my goal of cleaning the garage",
+        "I finished task 1",
+    )
+
+    def message(i: int) -> Awaitable[Any]:
+        text = messages[i % len(messages)].format(i=i)
+        # No session ID, as a first message from a new client: each gets its own session
+        body = {"message": text, "cache": False}
+        return http(client, "POST", "/api/assistant/message", json=body)(i)
+
+    return [await measure("assistant.message", message, requests)]
+
+
+def commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(quick: bool) -> List[Result]:
+    from app.backend.app import create_app
+
+    requests = 200 if quick else 1000
+    results: List[Result] = []
+    print(f"{'benchmark':<44}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+
+    async def with_client(scenario: Callable[[Any], Awaitable[List[Result]]]) -> None:
+        # A fresh database for each scenario, so the stored data is what it describes
+        with tempfile.TemporaryDirectory() as tmp:
+            app = create_app(
+                {
+                    "TESTING": True,
+                    "DATABASE": os.path.join(tmp, "bench.sqlite"),
+                    "LLM_BACKEND": "fake",
+                    "ASSISTANT_VERBOSE": False,
+                }
+            )
+            async with app.test_app() as test_app:
+                results.extend(await scenario(test_app.test_client()))
+
+    await with_client(lambda client: bench_crud(client, requests))
+    for size in QUICK_LIST_SIZES if quick else LIST_SIZES:
+        await with_client(lambda client: bench_lists(client, size, requests // 2))
+    await with_client(lambda client: bench_starts(client, 3 if quick else 10))
+    await with_client(lambda client: bench_due(client, requests))
+    await with_client(lambda client: bench_static(client, requests))
+    # In an app, since the task tools use its database
+    await with_client(lambda client: bench_tools(requests))
+    await with_client(lambda client: bench_assistant(client, requests // 5))
+    return results
+
+
+def compare(results: List[Result], baseline_path: str) -> None:
+    with open(baseline_path) as f:
+        baseline = {r["name"]: r for r in json.load(f)["results"]}
+    print(f"\nChange against {baseline_path}")
+    print(f"{'benchmark':<44}{'req/s':>10}{'p50':>10}{'p99':>10}")
+    for result in results:
+        old = baseline.get(result["name"])
+        if old is None:
+            continue
+        changes = [
+            (result[key] - old[key]) / old[key] * 100 for key in ("throughput", "p50_ms", "p99_ms")
+        ]
+        print(f"{result['name']:<44}" + "".join(f"{change:>+9.1f}%" for change in changes))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--quick", action="store_true", help="fewer requests, up to 10k tasks")
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--compare", metavar="FILE", help="earlier results to compare against")
+    args = parser.parse_args()
+    output = os.path.abspath(args.output)
+    baseline = os.path.abspath(args.compare) if args.compare else None
+    revision = commit()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        results = asyncio.run(run(args.quick))
+
+    report = {
+        "commit": revision,
+        "timestamp": datetime.now().astimezone().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "quick": args.quick,
+        "results": results,
+    }
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {output}")
+    if baseline is not None:
+        compare(results, baseline)
+
+
+if __name__ == "__main__":
+    main()
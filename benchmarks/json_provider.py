@@ -0,0 +1,102 @@
+"""
+Compare the JSON providers on 10k-item payloads.
+
+Times encoding a list response and parsing a request body of the same size with
+each provider, and a full `GET /api/tasks/` of 10k tasks through the test client.
+
+    python -m benchmarks.json_provider
+"""
+
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List
+
+from app.backend.app import create_app
+from app.backend.services.json_provider import PROVIDERS
+
+ITEMS = 10_000
+REPEATS = 20
+
+
+def make_tasks(count: int) -> List[Dict[str, Any]]:
+    now = datetime.now()
+    return [
+        {
+            "id": i,
+            "title": f"Task {i}",
+            "description": "Break the work into small steps and check in every half hour.",
+            "estimated_duration": 30,
+            "status": ("pending", "in_progress", "completed")[i % 3],
+            "created_at": now - timedelta(minutes=i),
+            "started_at": None,
+            "completed_at": None,
+            "check_in_time": (now + timedelta(minutes=30)).isoformat(),
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def best_ms(fn: Callable[[], Any]) -> float:
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+async def time_endpoint(name: str) -> Dict[str, float]:
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app(
+            {
+                "TESTING": True,
+                "JSON_PROVIDER": name,
+                "DATABASE": os.path.join(tmp, "bench.sqlite"),
+            }
+        )
+        from app.backend.services.stores import tasks
+
+        tasks_data = make_tasks(ITEMS)
+        body = {"operations": [{"op": "create", "data": t} for t in tasks_data]}
+        body_bytes = app.json.dumps(body).encode()
+
+        async with app.app_context():
+            encode = best_ms(lambda: app.json.response(tasks_data))
+        decode = best_ms(lambda: app.json.loads(body_bytes))
+
+        async with app.test_app() as test_app:
+            client = test_app.test_client()
+            await client.post("/api/tasks/batch", json=body)
+            assert len(tasks) == ITEMS
+            times = []
+            for _ in range(REPEATS):
+                start = time.perf_counter()
+                response = await client.get("/api/tasks/")
+                await response.get_data()
+                times.append(time.perf_counter() - start)
+            request_ms = min(times) * 1000
+            median_ms = statistics.median(times) * 1000
+        return {"encode": encode, "decode": decode, "get": request_ms, "get_median": median_ms}
+
+
+async def main() -> None:
+    results = {name: await time_endpoint(name) for name in PROVIDERS}
+    print(f"{ITEMS} items, best of {REPEATS} (ms)")
+    print(f"{'provider':<10}{'encode':>10}{'decode':>10}{'GET /api/tasks':>18}")
+    for name, r in results.items():
+        print(f"{name:<10}{r['encode']:>10.1f}{r['decode']:>10.1f}{r['get']:>18.1f}")
+    if "orjson" in results:
+        base, fast = results["json"], results["orjson"]
+        print(
+            f"speed-up: encode {base['encode'] / fast['encode']:.1f}x, "
+            f"decode {base['decode'] / fast['decode']:.1f}x, "
+            f"GET {base['get'] / fast['get']:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
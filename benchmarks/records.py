@@ -0,0 +1,122 @@
+"""
+Compare the record classes with the plain dicts tasks used to be stored as.
+
+Builds the same tasks both ways, as they are held in memory after loading the
+database, and reports the memory each takes per record and the time to:
+
+- encode them as an API response (JSON in the existing shape)
+- encode them for the database (`data` column)
+- load them back from their database rows
+- stamp a write with the current time
+
+    python -m benchmarks.records [--count N]
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List
+
+from app.backend.services.json_provider import dumps, dumps_bytes, loads
+from app.backend.services.records import Task, now
+
+REPEATS = 5
+
+
+def make_rows(count: int) -> List[str]:
+    """`data` column values as the dict-based code wrote them, with ISO times."""
+    start = datetime.now()
+    rows = []
+    for i in range(count):
+        created = start - timedelta(minutes=i, microseconds=i)
+        started = created + timedelta(minutes=5) if i % 3 else None
+        rows.append(
+            dumps(
+                {
+                    "title": f"Task {i}",
+                    "description": "Break the work into small steps and check in every half hour.",
+                    "estimated_duration": 30,
+                    "status": ("pending", "in_progress", "completed")[i % 3],
+                    "created_at": created.isoformat(),
+                    "started_at": started.isoformat() if started else None,
+                    "completed_at": None,
+                    "check_in_time": (
+                        (started + timedelta(minutes=30)).isoformat() if started else None
+                    ),
+                }
+            )
+        )
+    return rows
+
+
+def load_dicts(rows: List[str]) -> List[Dict[str, Any]]:
+    return [{"id": i, **loads(row)} for i, row in enumerate(rows, 1)]
+
+
+def load_records(rows: List[str]) -> List[Task]:
+    return [Task.from_row(i, loads(row)) for i, row in enumerate(rows, 1)]
+
+
+def bytes_per_record(build: Callable[[], List[Any]]) -> float:
+    gc.collect()
+    tracemalloc.start()
+    records = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size / len(records)
+
+
+def best_ms(fn: Callable[[], Any]) -> float:
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--count", type=int, default=100_000, help="number of tasks")
+    args = parser.parse_args()
+
+    rows = make_rows(args.count)
+    dicts = load_dicts(rows)
+    records = load_records(rows)
+    # Rows as written from the records
+    record_rows = [dumps(record.to_storage()) for record in records]
+    assert loads(dumps_bytes(records)) == loads(dumps_bytes(dicts))
+
+    results = {
+        "bytes per record": (
+            bytes_per_record(lambda: load_dicts(rows)),
+            bytes_per_record(lambda: load_records(record_rows)),
+        ),
+        "API encode (ms)": (
+            best_ms(lambda: dumps_bytes(dicts)),
+            best_ms(lambda: dumps_bytes(records)),
+        ),
+        "database encode (ms)": (
+            best_ms(lambda: [dumps({k: v for k, v in d.items() if k != "id"}) for d in dicts]),
+            best_ms(lambda: [dumps(record.to_storage()) for record in records]),
+        ),
+        "database load (ms)": (
+            best_ms(lambda: load_dicts(rows)),
+            best_ms(lambda: load_records(record_rows)),
+        ),
+        "timestamp a write (ms)": (
+            best_ms(lambda: [datetime.now().isoformat() for _ in range(args.count)]),
+            best_ms(lambda: [now() for _ in range(args.count)]),
+        ),
+    }
+
+    print(f"{args.count} tasks, best of {REPEATS}")
+    print(f"{'':<24}{'dict':>10}{'Task':>10}{'change':>10}")
+    for name, (before, after) in results.items():
+        print(f"{name:<24}{before:>10.1f}{after:>10.1f}{(after / before - 1) * 100:>+9.0f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Report what app startup costs: time, memory and the slowest imports.
+
+Starts a fresh interpreter that imports the app and calls `create_app`, then builds
+the assistant agent (as the first assistant request or the warm-up hook would), and
+reports the time and peak RSS after each step together with the import time spent
+in each top-level package (from `python -X importtime`).
+
+    python -m benchmarks.startup [--output FILE] [--budget-ms N]
+
+With `--budget-ms` the exit status is 1 when importing the app and creating it
+takes longer than that, so the check can run in CI.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple
+
+TOP_PACKAGES = 15
+
+# Runs in the fresh interpreter and prints its measurements as JSON
+PROBE = """
+import asyncio, json, resource, sys, time
+
+def rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+started = time.perf_counter()
+from app.backend.app import create_app
+imported = time.perf_counter()
+app = create_app({"DATABASE": sys.argv[1], "LLM_BACKEND": "fake"})
+created = time.perf_counter()
+report = {
+    "import_ms": (imported - started) * 1000,
+    "create_app_ms": (created - imported) * 1000,
+    "rss_mb": rss_mb(),
+    "langchain_loaded": any(m.split(".")[0].startswith("langchain") for m in sys.modules),
+}
+
+from app.backend.blueprints import assistant
+
+started = time.perf_counter()
+asyncio.run(assistant.get_agent())
+report["agent_build_ms"] = (time.perf_counter() - started) * 1000
+report["rss_with_agent_mb"] = rss_mb()
+print(json.dumps(report))
+"""
+
+
+def import_costs(importtime_log: str) -> List[Tuple[str, float]]:
+    """Self import time in ms per top-level package, slowest first."""
+    costs: Dict[str, float] = defaultdict(float)
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:") :].split("|")
+        costs[name.strip().split(".")[0]] += int(self_us) / 1000
+    return sorted(costs.items(), key=lambda item: item[1], reverse=True)
+
+
+def measure() -> Dict[str, Any]:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with tempfile.TemporaryDirectory() as tmp:
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", PROBE, os.path.join(tmp, "startup.sqlite")],
+            cwd=tmp,
+            env={**os.environ, "PYTHONPATH": root},
+            capture_output=True,
+            text=True,
+        )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr[-2000:])
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report["import_ms_by_package"] = dict(import_costs(result.stderr))
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--output", help="write the report to this JSON file")
+    parser.add_argument("--budget-ms", type=float, help="fail if import + create_app is slower")
+    args = parser.parse_args()
+
+    report = measure()
+    startup_ms = report["import_ms"] + report["create_app_ms"]
+    print(f"import app        {report['import_ms']:>8.0f} ms")
+    print(f"create_app        {report['create_app_ms']:>8.0f} ms")
+    print(f"peak RSS          {report['rss_mb']:>8.0f} MB")
+    print(f"LangChain loaded  {'yes' if report['langchain_loaded'] else 'no':>8}")
+    print(f"build agent       {report['agent_build_ms']:>8.0f} ms")
+    print(f"peak RSS w/ agent {report['rss_with_agent_mb']:>8.0f} MB")
+    print("\nImport time by package (ms, including the agent)")
+    for package, ms in list(report["import_ms_by_package"].items())[:TOP_PACKAGES]:
+        print(f"  {package:<24}{ms:>8.0f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.budget_ms is not None and startup_ms > args.budget_ms:
+        print(f"\nStartup took {startup_ms:.0f} ms, over the {args.budget_ms:.0f} ms budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
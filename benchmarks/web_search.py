@@ -0,0 +1,142 @@
+"""
+Measure the assistant's web search against a local stand-in for the search API.
+
+Serves a Tavily-compatible endpoint on localhost that answers after a fixed delay,
+then times `WebSearch` (services/search.py) and counts the requests that reach the
+stand-in for:
+
+- distinct queries, with a new HTTP client per search and with the pooled client
+- identical queries made concurrently (coalesced into one request)
+- a few queries repeated many times (answered from the cache)
+
+    python -m benchmarks.web_search [--latency-ms N] [--searches N]
+"""
+
+import argparse
+import asyncio
+import socket
+import time
+from typing import Any, Awaitable, Callable, List
+
+import httpx
+from hypercorn.asyncio import serve
+from hypercorn.config import Config
+from quart import Quart, request
+
+from app.backend.services.search import SearchResult, TavilyProvider, WebSearch
+
+CONCURRENCY = 16
+
+
+def stand_in(latency: float) -> Quart:
+    app = Quart(__name__)
+    app.config["requests"] = 0
+
+    @app.route("/search", methods=["POST"])
+    async def search() -> Any:
+        body = await request.get_json()
+        app.config["requests"] += 1
+        await asyncio.sleep(latency)
+        return {
+            "results": [
+                {
+                    "title": f"Result {i} for {body['query']}",
+                    "url": f"https://example.com/{i}",
+                    "content": "Some text about the query. " * 40,
+                }
+                for i in range(body["max_results"])
+            ]
+        }
+
+    return app
+
+
+class UnpooledProvider(TavilyProvider):
+    """Opens a new client (and connection) for every search."""
+
+    async def search(
+        self, client: httpx.AsyncClient, query: str, max_results: int
+    ) -> List[SearchResult]:
+        async with httpx.AsyncClient() as own_client:
+            return await super().search(own_client, query, max_results)
+
+
+async def timed(calls: int, call: Callable[[int], Awaitable[Any]], concurrency: int) -> float:
+    numbers = iter(range(calls))
+
+    async def caller() -> None:
+        for i in numbers:
+            await call(i)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(caller() for _ in range(concurrency)))
+    return (time.perf_counter() - start) * 1000
+
+
+async def run(latency: float, searches: int) -> None:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    app = stand_in(latency)
+    config = Config()
+    config.bind = [f"127.0.0.1:{port}"]
+    config.accesslog = None
+    shutdown = asyncio.Event()
+    server = asyncio.create_task(serve(app, config, shutdown_trigger=shutdown.wait))
+    await asyncio.sleep(0.5)
+    url = f"http://127.0.0.1:{port}/search"
+
+    print(f"{'scenario':<36}{'searches':>10}{'requests':>10}{'ms':>10}")
+
+    async def scenario(
+        name: str, search: WebSearch, calls: int, query: Callable[[int], str], concurrency: int
+    ) -> None:
+        before = app.config["requests"]
+        ms = await timed(calls, lambda i: search.search(query(i)), concurrency)
+        print(f"{name:<36}{calls:>10}{app.config['requests'] - before:>10}{ms:>10.1f}")
+        await search.aclose()
+
+    distinct = lambda i: f"distinct query {i}"  # noqa: E731
+    await scenario(
+        "distinct, new client per search",
+        WebSearch(UnpooledProvider("bench", url)),
+        searches,
+        distinct,
+        CONCURRENCY,
+    )
+    await scenario(
+        "distinct, pooled client",
+        WebSearch(TavilyProvider("bench", url)),
+        searches,
+        lambda i: f"other query {i}",
+        CONCURRENCY,
+    )
+    await scenario(
+        "identical, concurrent",
+        WebSearch(TavilyProvider("bench", url)),
+        searches,
+        lambda i: "What is the Pomodoro technique?",
+        searches,
+    )
+    await scenario(
+        "10 queries repeated",
+        WebSearch(TavilyProvider("bench", url)),
+        searches * 10,
+        lambda i: f"Repeated query {i % 10}",
+        CONCURRENCY,
+    )
+
+    shutdown.set()
+    await server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--latency-ms", type=float, default=50, help="stand-in response delay")
+    parser.add_argument("--searches", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(run(args.latency_ms / 1000, args.searches))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import argparse
 import os
 import sys
 
@@ -10,6 +11,32 @@ load_dotenv()
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the ADHD Productivity Assistant backend")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.environ.get("WEB_CONCURRENCY", "1")),
+        help="Worker processes; more than one runs the production mode without reloading",
+    )
+    parser.add_argument("--bind", default=os.environ.get("BIND", "127.0.0.1:8000"))
+    args = parser.parse_args()
+
+    import hypercorn
+
+    if args.workers > 1:
+        import hypercorn.run
+
+        # Workers are spawned processes that each call create_app(); the variable
+        # tells them to share state through the database
+        os.environ["WEB_CONCURRENCY"] = str(args.workers)
+
+        config = hypercorn.Config()
+        config.application_path = "app.backend.app:create_app()"
+        config.bind = [args.bind]
+        config.workers = args.workers
+        config.accesslog = None
+        sys.exit(hypercorn.run.run(config))
+
     import asyncio
 
     import hypercorn.asyncio
@@ -19,7 +46,7 @@ if __name__ == "__main__":
     app = create_app()
 
     config = hypercorn.Config()
-    config.bind = ["127.0.0.1:8000"]
+    config.bind = [args.bind]
     config.use_reloader = True
 
     asyncio.run(hypercorn.asyncio.serve(app, config))
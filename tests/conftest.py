@@ -0,0 +1,46 @@
+import os
+from typing import Any, AsyncIterator, Callable
+
+import pytest
+from quart import Quart
+from quart.typing import TestClientProtocol
+
+from app.backend.app import create_app
+from app.backend.services.database import Database
+
+
+@pytest.fixture
+def make_app(tmp_path: Any, monkeypatch: pytest.MonkeyPatch) -> Callable[..., Quart]:
+    """Build apps on a database in `tmp_path`, with the offline model."""
+    # The legacy tasks.json and the memory files are looked up in instance/
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("instance", exist_ok=True)
+
+    def make(**config: Any) -> Quart:
+        return create_app(
+            {
+                "TESTING": True,
+                "DATABASE": str(tmp_path / "db.sqlite"),
+                "LLM_BACKEND": "fake",
+                "ASSISTANT_VERBOSE": False,
+                **config,
+            }
+        )
+
+    return make
+
+
+@pytest.fixture
+async def client(make_app: Callable[..., Quart]) -> AsyncIterator[TestClientProtocol]:
+    """A test client for a started app with the default test configuration."""
+    async with make_app().test_app() as test_app:
+        yield test_app.test_client()
+
+
+@pytest.fixture
+async def database(tmp_path: Any) -> AsyncIterator[Database]:
+    """An open database in `tmp_path`, closed after the test."""
+    database = Database(str(tmp_path / "db.sqlite"))
+    await database.open()
+    yield database
+    await database.close()
@@ -0,0 +1,95 @@
+import asyncio
+import time
+from typing import Callable, List
+
+import pytest
+from quart import Quart
+
+from app.backend.services.admission import AdmissionControl, DeadlineExceeded, Overloaded
+
+
+async def test_full_queue_is_rejected_with_a_retry_delay() -> None:
+    admission = AdmissionControl(max_concurrent=1, max_queue=1)
+    release = asyncio.Event()
+
+    async def hold(client: str) -> None:
+        async with admission.admit(client):
+            await release.wait()
+
+    running = asyncio.ensure_future(hold("a"))
+    queued = asyncio.ensure_future(hold("b"))
+    await asyncio.sleep(0)
+    assert (admission.active, admission.queued) == (1, 1)
+
+    with pytest.raises(Overloaded) as rejected:
+        await hold("c")
+    assert rejected.value.retry_after >= 1
+
+    release.set()
+    await asyncio.gather(running, queued)
+    assert (admission.active, admission.queued) == (0, 0)
+
+
+async def test_request_still_queued_at_its_deadline_is_dropped() -> None:
+    admission = AdmissionControl(max_concurrent=1)
+    release = asyncio.Event()
+
+    async def hold() -> None:
+        async with admission.admit("a"):
+            await release.wait()
+
+    running = asyncio.ensure_future(hold())
+    await asyncio.sleep(0)
+    with pytest.raises(DeadlineExceeded):
+        async with admission.admit("b", deadline=time.monotonic() + 0.01):
+            pass
+    assert admission.queued == 0
+
+    release.set()
+    await running
+    assert admission.active == 0
+
+
+async def test_freed_slots_go_to_clients_in_turn() -> None:
+    admission = AdmissionControl(max_concurrent=1)
+    order: List[str] = []
+    release = asyncio.Event()
+
+    async def run(client: str, name: str) -> None:
+        async with admission.admit(client):
+            order.append(name)
+            await release.wait()
+
+    first = asyncio.ensure_future(run("a", "a0"))
+    await asyncio.sleep(0)
+    waiting = [
+        asyncio.ensure_future(run(client, name))
+        for client, name in (("a", "a1"), ("a", "a2"), ("b", "b1"))
+    ]
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(first, *waiting)
+    assert order == ["a0", "a1", "b1", "a2"]
+
+
+async def test_assistant_answers_429_and_504(make_app: Callable[..., Quart]) -> None:
+    app = make_app(ASSISTANT_MAX_CONCURRENT=1, ASSISTANT_MAX_QUEUE=0, FAKE_LLM_LATENCY_SECONDS=0.2)
+    async with app.test_app() as test_app:
+        client = test_app.test_client()
+
+        async def send(message: str) -> int:
+            response = await client.post(
+                "/api/assistant/message", json={"message": message, "cache": False}
+            )
+            if response.status_code == 429:
+                assert int(response.headers["Retry-After"]) >= 1
+            return response.status_code
+
+        assert sorted(await asyncio.gather(send("hello"), send("hi there"))) == [200, 429]
+
+        response = await client.post(
+            "/api/assistant/message",
+            json={"message": "hello again", "cache": False},
+            headers={"X-Request-Timeout": "0.05"},
+        )
+        assert response.status_code == 504
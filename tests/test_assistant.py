@@ -0,0 +1,41 @@
+import json
+from typing import Any, Dict, List, Tuple
+
+from quart.typing import TestClientProtocol as Client
+
+
+def parse_sse(body: bytes) -> List[Tuple[str, Dict[str, Any]]]:
+    """The (event, data) pairs of a Server-Sent Events body, skipping comments."""
+    events = []
+    for message in body.decode().split("\n\n"):
+        fields = dict(
+            line.split(": ", 1) for line in message.splitlines() if not line.startswith(":")
+        )
+        if fields:
+            events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+async def test_stream_sends_tool_events_tokens_and_the_answer(client: Client) -> None:
+    response = await client.post(
+        "/api/assistant/message/stream", json={"message": "remember that I like tea"}
+    )
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+    events = parse_sse(await response.get_data())
+
+    names = [name for name, _ in events]
+    assert names[:2] == ["tool_start", "tool_end"]
+    assert events[0][1]["tool"] == "store_memory"
+    assert set(names[2:-1]) == {"token"}
+    assert names[-1] == "done"
+
+    done = events[-1][1]
+    assert done["status"] == "success"
+    assert done["response"] == "".join(data["token"] for name, data in events if name == "token")
+    assert done["session_id"] == response.headers["X-Session-ID"]
+
+
+async def test_stream_without_a_message_is_rejected(client: Client) -> None:
+    response = await client.post("/api/assistant/message/stream", json={})
+    assert response.status_code == 400
@@ -0,0 +1,74 @@
+from typing import Any
+
+import pytest
+from quart.typing import TestClientProtocol as Client
+
+from app.backend.services.database import Database
+from app.backend.services.records import Task
+from app.backend.services.repository import Repository
+
+
+async def test_batch_with_an_invalid_operation_applies_nothing(client: Client) -> None:
+    await client.post("/api/tasks/", json={"title": "a"})
+
+    response = await client.post(
+        "/api/tasks/batch",
+        json={
+            "operations": [
+                {"op": "create", "data": {"title": "b"}},
+                {"op": "update", "id": 1, "data": {"title": "renamed"}},
+                {"op": "create", "data": {}},
+                {"op": "update", "id": 99, "data": {"title": "missing"}},
+            ]
+        },
+    )
+    assert response.status_code == 400
+    results = (await response.get_json())["results"]
+    assert [result["status"] for result in results] == [424, 424, 400, 404]
+
+    response = await client.get("/api/tasks/")
+    assert [task["title"] for task in await response.get_json()] == ["a"]
+
+    response = await client.post(
+        "/api/tasks/batch",
+        json={
+            "operations": [
+                {"op": "create", "data": {"title": "b"}},
+                {"op": "update", "id": 1, "data": {"title": "renamed"}},
+            ]
+        },
+    )
+    assert response.status_code == 200
+    response = await client.get("/api/tasks/")
+    assert [task["title"] for task in await response.get_json()] == ["renamed", "b"]
+
+    response = await client.post("/api/tasks/batch", json={"operations": {}})
+    assert response.status_code == 400
+
+
+async def test_failed_batch_write_changes_nothing(
+    database: Database, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    tasks = Repository(Task, indexes=("status",))
+    await database.bind({"tasks": tasks})
+    task = await tasks.insert(Task(title="a"))
+
+    async def fail(*args: Any) -> None:
+        raise OSError("disk full")
+
+    monkeypatch.setattr(database, "write_batch", fail)
+    with pytest.raises(OSError):
+        await tasks.apply_batch([Task(title="b")], [(task.id, {"status": "completed"})])
+    assert tasks.all() == [task]
+    assert task.status == "pending"
+    assert [t.id for t in tasks.find("status", "pending")] == [task.id]
+
+    reloaded = Repository(Task)
+    await reloaded.bind(database, "tasks")
+    assert reloaded.all() == [task]
+
+
+async def test_missing_bodies_are_rejected(client: Client) -> None:
+    for url in ("/api/tasks/", "/api/goals/", "/api/checkins/", "/api/tasks/batch"):
+        response = await client.post(url)
+        assert response.status_code == 400, url
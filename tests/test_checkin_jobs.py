@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator
+
+import pytest
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+from app.backend.services import stores, tools
+from app.backend.services.checkin_jobs import (
+    checkin_job_id,
+    fire_checkin,
+    reconcile_checkins,
+    schedule_checkins,
+)
+from app.backend.services.database import Database
+from app.backend.services.job_store import SQLiteJobStore
+from app.backend.services.records import Status, Task
+
+
+@pytest.fixture
+async def scheduler(tmp_path: Any) -> AsyncIterator[AsyncIOScheduler]:
+    """A paused scheduler keeping its jobs in `tmp_path`/db.sqlite."""
+    yield await tools.initialize_scheduler(str(tmp_path / "db.sqlite"), paused=True)
+    await tools.shutdown_scheduler()
+
+
+async def test_batched_job_states_load_back_as_jobs(
+    scheduler: AsyncIOScheduler, tmp_path: Any
+) -> None:
+    run_at = datetime.now().astimezone().replace(microsecond=0) + timedelta(hours=1)
+    await schedule_checkins([(1, run_at), (2, run_at + timedelta(minutes=5))])
+
+    # A fresh store, as after a restart, unpickles the states into working jobs
+    store = SQLiteJobStore(str(tmp_path / "db.sqlite"))
+    store.start(scheduler, "default")
+    job = store.lookup_job(checkin_job_id(1))
+    assert job is not None
+    assert job.func is fire_checkin and job.args == (1,)
+    assert job.executor == "asyncio"
+    assert job.trigger.run_date == run_at and job.next_run_time == run_at
+    assert job.trigger.get_next_fire_time(None, run_at) == run_at
+    assert [job.id for job in store.get_all_jobs() if job.id.startswith("checkin:")] == [
+        checkin_job_id(1),
+        checkin_job_id(2),
+    ]
+    store.shutdown()
+
+
+async def test_reconciliation_schedules_and_records_check_ins(
+    scheduler: AsyncIOScheduler, database: Database
+) -> None:
+    await database.bind({"tasks": stores.tasks, "checkins": stores.checkins})
+    soon = (datetime.now() + timedelta(hours=1)).replace(microsecond=0)
+    past = (datetime.now() - timedelta(hours=1)).replace(microsecond=0)
+    upcoming, due, _ = await stores.tasks.insert_many(
+        [
+            Task(title="upcoming", status=Status.IN_PROGRESS, check_in_time=soon),
+            Task(title="due", status=Status.IN_PROGRESS, check_in_time=past),
+            Task(title="pending", check_in_time=soon),
+        ]
+    )
+
+    assert await reconcile_checkins(database) == {"removed": 0, "due": 1, "scheduled": 1}
+    assert scheduler.get_job(checkin_job_id(upcoming.id)) is not None
+    assert [checkin.task_id for checkin in stores.checkins.all()] == [due.id]
+    # Running it again finds nothing left to do
+    assert await reconcile_checkins(database) == {"removed": 0, "due": 0, "scheduled": 0}
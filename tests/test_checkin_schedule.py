@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+from typing import Any
+
+import pytest
+from quart.typing import TestClientProtocol as Client
+
+from app.backend.blueprints import tasks as tasks_blueprint
+from app.backend.services.checkin_schedule import MAX_DELAY_MINUTES, CheckInSchedule
+from app.backend.services.records import Status, Task
+from app.backend.services.repository import Repository
+from app.backend.services.stores import tasks
+
+START = datetime(2030, 1, 7, 9)
+
+
+def minutes(count: float) -> timedelta:
+    return timedelta(minutes=count)
+
+
+async def test_check_ins_follow_how_long_tasks_took() -> None:
+    schedule = CheckInSchedule()
+    assert schedule.ratio() == 1.0
+    [check_in_time] = schedule.plan([Task(id=1, estimated_duration=30)], START)
+    assert check_in_time == START + minutes(30)
+
+    repository: Repository[Task] = Repository(Task)
+    schedule.track(repository)
+    await repository.insert(
+        Task(
+            estimated_duration=30,
+            status=Status.COMPLETED,
+            started_at=START,
+            completed_at=START + minutes(120),
+        )
+    )
+    assert 1.0 < schedule.ratio() < 4.0
+    [later] = schedule.plan([Task(id=2, estimated_duration=30)], START)
+    assert later > START + minutes(30)
+
+
+def test_check_ins_are_spread_out_up_to_the_maximum_delay() -> None:
+    schedule = CheckInSchedule(checkins_per_minute=1)
+    batch = [Task(id=task_id, estimated_duration=30) for task_id in range(1, 151)]
+    times = schedule.plan(batch, START)
+
+    assert times[:3] == [START + minutes(30), START + minutes(31), START + minutes(32)]
+    latest = START + minutes(MAX_DELAY_MINUTES)
+    assert max(times) == latest
+    # Once the slots up to the maximum delay are full they take a second check-in each
+    assert times.count(START + minutes(30)) == 2
+    assert all(times.count(time) <= 2 for time in times)
+
+
+async def test_restore_gives_back_the_slots_of_failed_starts() -> None:
+    schedule = CheckInSchedule(checkins_per_minute=1)
+    repository: Repository[Task] = Repository(Task)
+    schedule.track(repository)
+    first, second = await repository.insert_many([Task(), Task()])
+
+    [planned] = schedule.plan([first], START)
+    schedule.restore(repository, [first.id])
+    # The slot is free again
+    assert schedule.plan([second], START) == [planned]
+
+
+def test_skips_before_the_planning_time_are_pruned() -> None:
+    schedule = CheckInSchedule(checkins_per_minute=1)
+    schedule.plan([Task(id=task_id) for task_id in range(1, 11)], START)
+    assert schedule._skip
+
+    # Once a plan starts past the maximum delay no search can reach those slots
+    schedule.plan([Task(id=11)], START + minutes(3 * MAX_DELAY_MINUTES))
+    assert schedule._skip == {}
+
+
+async def test_failed_start_releases_the_check_in_slot(
+    client: Client, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    response = await client.post("/api/tasks/", json={"title": "Report"})
+    task_id = (await response.get_json())["id"]
+
+    async def fail(*args: Any) -> None:
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(tasks, "update", fail)
+    monkeypatch.setattr(tasks, "apply_batch", fail)
+    response = await client.post(f"/api/tasks/{task_id}/start")
+    assert response.status_code == 500
+    assert task_id not in tasks_blueprint.checkin_schedule._times
+    response = await client.post("/api/tasks/start", json={"task_ids": [task_id]})
+    assert response.status_code == 500
+    assert task_id not in tasks_blueprint.checkin_schedule._times
+    task = tasks.get(task_id)
+    assert task is not None and task.status is Status.PENDING
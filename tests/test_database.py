@@ -0,0 +1,96 @@
+import json
+from typing import Any, Callable
+
+import pytest
+from quart import Quart
+from quart.typing import TestClientProtocol as Client
+
+from app.backend.services.database import Database, migrate_tasks_json
+from app.backend.services.records import Status, Task
+from app.backend.services.repository import Repository
+
+
+async def test_bound_repository_persists_changes(database: Database) -> None:
+    tasks = Repository(Task, indexes=("status",))
+    await database.bind({"tasks": tasks})
+    task = await tasks.insert(Task(title="a", created_at="2024-03-01T09:00:00"))
+    await tasks.update(task.id, {"status": "in_progress"})
+    gone = await tasks.insert(Task(title="b"))
+    await tasks.delete(gone.id)
+
+    reloaded = Repository(Task)
+    await reloaded.bind(database, "tasks")
+    assert reloaded.all() == [task]
+
+
+async def test_failed_write_leaves_memory_unchanged(
+    database: Database, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    tasks = Repository(Task, indexes=("status",))
+    await database.bind({"tasks": tasks})
+    task = await tasks.insert(Task(title="a"))
+
+    async def fail(*args: Any) -> None:
+        raise OSError("disk full")
+
+    monkeypatch.setattr(database, "update", fail)
+    monkeypatch.setattr(database, "delete", fail)
+    with pytest.raises(OSError):
+        await tasks.update(task.id, {"title": "b", "status": "completed"})
+    with pytest.raises(OSError):
+        await tasks.delete(task.id)
+    assert task.title == "a"
+    assert tasks.find("status", Status.PENDING) == [task]
+    assert tasks.get(task.id) is task
+
+
+async def test_legacy_tasks_are_migrated_once(database: Database, tmp_path: Any) -> None:
+    legacy = tmp_path / "tasks.json"
+    legacy.write_text(
+        json.dumps(
+            {
+                "tasks": [
+                    {
+                        "description": "Plan the week",
+                        "status": "completed",
+                        "created_at": "2024-03-01T09:00:00",
+                        "completed_at": "2024-03-01T10:00:00",
+                        "steps": [{"description": "List tasks"}, {"description": "Order them"}],
+                    }
+                ]
+            }
+        )
+    )
+    assert await database.write(lambda conn: migrate_tasks_json(conn, str(legacy))) == 1
+    assert await database.write(lambda conn: migrate_tasks_json(conn, str(legacy))) == 0
+
+    tasks = Repository(Task, indexes=("status",))
+    await database.bind({"tasks": tasks})
+    [task] = tasks.all()
+    assert task.title == "Plan the week"
+    assert task.description == "- List tasks\n- Order them"
+    assert tasks.find("status", Status.COMPLETED) == [task]
+    assert task.json_value("completed_at") == "2024-03-01T10:00:00"
+
+
+async def test_app_migrates_legacy_tasks_on_startup(make_app: Callable[..., Quart]) -> None:
+    with open("instance/tasks.json", "w") as f:
+        json.dump({"tasks": [{"description": "Legacy", "status": "pending"}]}, f)
+
+    async with make_app().test_app() as test_app:
+        response = await test_app.test_client().get("/api/tasks/")
+        assert [task["title"] for task in await response.get_json()] == ["Legacy"]
+
+
+async def test_api_changes_survive_a_restart(
+    make_app: Callable[..., Quart], client: Client
+) -> None:
+    await client.post("/api/tasks/", json={"title": "kept"})
+    await client.post("/api/goals/", json={"title": "goal"})
+
+    async with make_app().test_app() as test_app:
+        restarted = test_app.test_client()
+        tasks = await (await restarted.get("/api/tasks/")).get_json()
+        goals = (await (await restarted.get("/api/goals/")).get_json())["goals"]
+    assert [task["title"] for task in tasks] == ["kept"]
+    assert [goal["title"] for goal in goals] == ["goal"]
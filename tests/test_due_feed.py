@@ -0,0 +1,69 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncGenerator, Dict, List, Optional, cast
+
+from quart.typing import TestClientProtocol as Client
+
+from app.backend.services.due_feed import DueFeed
+from app.backend.services.records import CheckIn
+from app.backend.services.repository import Repository, TimeIndex
+
+
+def checkins() -> Repository:
+    return Repository(CheckIn, indexes=(TimeIndex("next_checkin_time"),))
+
+
+def at(seconds: float) -> str:
+    """An ISO timestamp `seconds` from now, in UTC."""
+    return (datetime.now(timezone.utc) + timedelta(seconds=seconds)).isoformat()
+
+
+async def test_due_records_come_earliest_first_across_utc_offsets() -> None:
+    repository = checkins()
+    later = await repository.insert(
+        CheckIn(task_id=1, next_checkin_time="2024-03-01T10:30:00+01:00")
+    )
+    earlier = await repository.insert(CheckIn(task_id=2, next_checkin_time="2024-03-01T09:15:00Z"))
+    await repository.insert(CheckIn(task_id=3, next_checkin_time=at(3600)))
+    assert repository.due("next_checkin_time", time.time()) == [earlier, later]
+
+    await repository.update(earlier.id, {"next_checkin_time": at(7200)})
+    assert repository.due("next_checkin_time", time.time()) == [later]
+    await repository.delete(later.id)
+    assert repository.due("next_checkin_time", time.time()) == []
+
+
+async def next_record(subscription: AsyncGenerator[Optional[Dict[str, Any]], None]) -> Any:
+    record = await asyncio.wait_for(subscription.__anext__(), 1.0)
+    assert record is not None
+    return record
+
+
+async def test_feed_pushes_records_once_as_they_come_due() -> None:
+    repository = checkins()
+    overdue = await repository.insert(CheckIn(task_id=1, next_checkin_time=at(-60)))
+    feed = DueFeed(repository, "next_checkin_time", key="task_id")
+    subscription = cast(AsyncGenerator[Optional[Dict[str, Any]], None], feed.subscribe())
+
+    received: List[Any] = []
+    received.append((await next_record(subscription))["id"])
+    soon = await repository.insert(CheckIn(task_id=2, next_checkin_time=at(0.05)))
+    received.append((await next_record(subscription))["id"])
+    # Already due when inserted, so pushed straight away
+    now = await repository.insert(CheckIn(task_id=3, next_checkin_time=at(-1)))
+    received.append((await next_record(subscription))["id"])
+    assert received == [overdue.id, soon.id, now.id]
+
+    # Editing a record that was already pushed does not push it again
+    await repository.update(now.id, {"notes": "seen"})
+    later = await repository.insert(CheckIn(task_id=4, next_checkin_time=at(0.05)))
+    assert (await next_record(subscription))["id"] == later.id
+    await subscription.aclose()
+
+
+async def test_due_endpoint_lists_due_check_ins(client: Client) -> None:
+    await client.post("/api/checkins/", json={"task_id": 1, "next_checkin_time": at(-60)})
+    await client.post("/api/checkins/", json={"task_id": 1, "next_checkin_time": at(3600)})
+    response = await client.get("/api/checkins/due")
+    assert [checkin["task_id"] for checkin in await response.get_json()] == [1]
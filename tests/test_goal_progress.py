@@ -0,0 +1,104 @@
+from quart.typing import TestClientProtocol as Client
+
+from app.backend.services.goal_progress import GoalProgress
+from app.backend.services.records import Goal, Status, Task
+from app.backend.services.repository import Repository
+
+
+def task_count(progress: GoalProgress, goal_id: int) -> int:
+    snapshot = progress.progress(goal_id)
+    assert snapshot is not None
+    return int(snapshot["task_count"])
+
+
+async def test_counters_follow_task_and_goal_changes() -> None:
+    goals = Repository(Goal)
+    tasks = Repository(Task)
+    progress = GoalProgress(goals)
+    progress.track(tasks)
+    first = await tasks.insert(Task(title="a", estimated_duration=10))
+    second = await tasks.insert(Task(title="b", estimated_duration=20))
+    goal = await goals.insert(Goal(title="g", tasks=[first.id]))
+    await goals.append(goal.id, "tasks", second.id)
+    # Unknown task IDs are members that count for nothing
+    await goals.append(goal.id, "tasks", 99)
+
+    assert progress.progress(goal.id) == {
+        "task_count": 2,
+        "status_counts": {"pending": 2},
+        "total_minutes": 30,
+        "remaining_minutes": 30,
+        "percent_complete": 0.0,
+    }
+    assert progress.has_task(goal.id, 99)
+    assert progress.goals_for_task(second.id) == [goal.id]
+
+    await tasks.update(second.id, {"status": Status.COMPLETED})
+    await tasks.update(first.id, {"estimated_duration": 30})
+    snapshot = progress.progress(goal.id)
+    assert snapshot is not None
+    assert snapshot["status_counts"] == {"pending": 1, "completed": 1}
+    assert (snapshot["total_minutes"], snapshot["remaining_minutes"]) == (50, 30)
+    assert snapshot["percent_complete"] == 50.0
+
+    # Replacing the list drops the tasks that left, even with duplicate IDs
+    await goals.update(goal.id, {"tasks": [second.id, second.id]})
+    assert progress.goals_for_task(first.id) == []
+    assert task_count(progress, goal.id) == 1
+
+    await tasks.delete(second.id)
+    assert task_count(progress, goal.id) == 0
+    await goals.delete(goal.id)
+    assert progress.progress(goal.id) is None
+
+
+async def test_progress_endpoint(client: Client) -> None:
+    await client.post("/api/goals/", json={"title": "g"})
+    await client.post("/api/tasks/", json={"title": "a", "estimated_duration": 15})
+    await client.post("/api/tasks/", json={"title": "b", "estimated_duration": 45})
+    for task_id in (1, 2):
+        response = await client.post("/api/goals/1/tasks", json={"task_id": task_id})
+        assert response.status_code == 200
+    response = await client.post("/api/goals/1/tasks", json={"task_id": 1})
+    assert response.status_code == 400
+    response = await client.post("/api/goals/1/tasks", json={"task_id": "1"})
+    assert response.status_code == 400
+    response = await client.post("/api/goals/1/tasks", json={"task_id": 99})
+    assert response.status_code == 404
+    await client.post("/api/tasks/2/complete")
+
+    response = await client.get("/api/goals/1/progress")
+    assert await response.get_json() == {
+        "goal_id": 1,
+        "task_count": 2,
+        "status_counts": {"pending": 1, "completed": 1},
+        "total_minutes": 60,
+        "remaining_minutes": 15,
+        "percent_complete": 50.0,
+    }
+    response = await client.get("/api/goals/?task_id=2")
+    assert [goal["id"] for goal in (await response.get_json())["goals"]] == [1]
+    response = await client.get("/api/goals/2/progress")
+    assert response.status_code == 404
+
+
+async def test_unknown_statuses_are_rejected(client: Client) -> None:
+    await client.post("/api/tasks/", json={"title": "a"})
+    await client.post("/api/goals/", json={"title": "g"})
+    await client.post("/api/checkins/", json={"task_id": 1})
+
+    for url in ("/api/tasks/1", "/api/goals/1", "/api/checkins/1"):
+        response = await client.put(url, json={"status": "bogus"})
+        assert response.status_code == 400, url
+    response = await client.post("/api/checkins/", json={"task_id": 1, "status": "bogus"})
+    assert response.status_code == 400
+
+    batch = {"operations": [{"op": "update", "id": 1, "data": {"status": "bogus"}}]}
+    response = await client.post("/api/tasks/batch", json=batch)
+    assert response.status_code == 400
+    assert (await response.get_json())["results"][0]["status"] == 400
+
+    response = await client.get("/api/tasks/1")
+    assert (await response.get_json())["status"] == "pending"
+    response = await client.get("/api/goals/1/progress")
+    assert (await response.get_json())["status_counts"] == {}
@@ -0,0 +1,37 @@
+from datetime import datetime
+from typing import Callable
+from uuid import UUID
+
+import pytest
+from quart import Quart
+
+from app.backend.services.json_provider import PROVIDERS
+from app.backend.services.records import Task
+
+
+@pytest.mark.parametrize("name", sorted(PROVIDERS))
+async def test_providers_encode_records_and_times_alike(
+    make_app: Callable[..., Quart], name: str
+) -> None:
+    app = make_app(JSON_PROVIDER=name)
+    value = {
+        "task": Task(id=1, title="Tée", created_at="2024-03-01T09:00:00"),
+        "at": datetime(2024, 3, 1, 9, 30),
+        "uuid": UUID(int=1),
+    }
+    encoded = app.json.loads(app.json.dumps(value))
+    assert encoded["task"]["title"] == "Tée"
+    assert encoded["task"]["created_at"] == "2024-03-01T09:00:00"
+    assert encoded["at"] == "2024-03-01T09:30:00"
+    assert encoded["uuid"] == str(UUID(int=1))
+
+    async with app.test_app() as test_app:
+        client = test_app.test_client()
+        response = await client.post("/api/tasks/", json={"title": "Tée"})
+        assert response.status_code == 201
+        assert (await response.get_json())["title"] == "Tée"
+
+
+def test_unknown_provider_is_rejected(make_app: Callable[..., Quart]) -> None:
+    with pytest.raises(ValueError):
+        make_app(JSON_PROVIDER="yaml")
@@ -0,0 +1,52 @@
+import json
+from typing import Any
+
+from app.backend.services.json_store import JournalStore
+
+
+def journal(tmp_path: Any) -> JournalStore:
+    return JournalStore(
+        str(tmp_path / "memory.json"), str(tmp_path / "memory.journal.jsonl"), "memories"
+    )
+
+
+async def test_journal_is_replayed_on_open(tmp_path: Any) -> None:
+    store = journal(tmp_path)
+    await store.set("a", {"content": "first"})
+    await store.set("b", {"content": "second"})
+    await store.set("a", {"content": "changed"})
+    await store.flush()
+
+    reopened = journal(tmp_path)
+    assert await reopened.all() == {"a": {"content": "changed"}, "b": {"content": "second"}}
+
+
+async def test_torn_journal_tail_is_dropped(tmp_path: Any) -> None:
+    store = journal(tmp_path)
+    await store.set("a", 1)
+    await store.flush()
+    journal_path = tmp_path / "memory.journal.jsonl"
+    with open(journal_path, "a") as f:
+        f.write('{"key": "b", "val')
+
+    reopened = journal(tmp_path)
+    assert await reopened.all() == {"a": 1}
+    # New records start on a clean line
+    await reopened.set("c", 3)
+    assert await journal(tmp_path).all() == {"a": 1, "c": 3}
+
+
+async def test_compaction_and_interrupted_compaction(tmp_path: Any) -> None:
+    store = journal(tmp_path)
+    await store.set("a", 1)
+    await store.set("b", 2)
+    assert await store.compact()
+    assert json.loads((tmp_path / "memory.json").read_text()) == {"memories": {"a": 1, "b": 2}}
+    assert (tmp_path / "memory.journal.jsonl").read_text() == ""
+    assert not await store.compact()
+
+    # A crash after the journal was rotated but before the snapshot was written
+    old_journal = tmp_path / "memory.journal.jsonl.old"
+    old_journal.write_text(json.dumps({"key": "c", "value": 3}) + "\n")
+    assert await journal(tmp_path).all() == {"a": 1, "b": 2, "c": 3}
+    assert not old_journal.exists()
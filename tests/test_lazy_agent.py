@@ -0,0 +1,66 @@
+import asyncio
+import os
+import subprocess
+import sys
+from typing import Any, Callable, List, Mapping
+
+import pytest
+from quart import Quart
+
+from app.backend.blueprints import assistant
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHECK_IMPORTS = """
+import sys
+from app.backend.app import create_app
+
+create_app({"TESTING": True, "DATABASE": sys.argv[1], "LLM_BACKEND": "fake"})
+print(sorted(name for name in sys.modules if name.split(".")[0] == "langchain"))
+"""
+
+
+def test_creating_the_app_does_not_import_langchain(tmp_path: Any) -> None:
+    result = subprocess.run(
+        [sys.executable, "-c", CHECK_IMPORTS, str(tmp_path / "db.sqlite")],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=tmp_path,
+        env={**os.environ, "PYTHONPATH": ROOT},
+    )
+    assert result.stdout.strip() == "[]"
+
+
+@pytest.fixture
+def builds(monkeypatch: pytest.MonkeyPatch) -> List[Mapping[str, Any]]:
+    """Replace building the agent with recording the config it is built from."""
+    configs: List[Mapping[str, Any]] = []
+
+    def build(config: Mapping[str, Any]) -> Any:
+        configs.append(config)
+        return object()
+
+    monkeypatch.setattr(assistant, "_build_agent", build)
+    return configs
+
+
+async def test_agent_is_built_once_on_first_use(
+    make_app: Callable[..., Quart], builds: List[Mapping[str, Any]]
+) -> None:
+    async with make_app().test_app():
+        assert builds == []
+        agents = await asyncio.gather(*(assistant.get_agent() for _ in range(5)))
+    assert len(builds) == 1 and builds[0]["LLM_BACKEND"] == "fake"
+    assert all(agent is agents[0] for agent in agents)
+
+
+async def test_warm_up_builds_the_agent_at_startup(
+    make_app: Callable[..., Quart], builds: List[Mapping[str, Any]]
+) -> None:
+    async with make_app(ASSISTANT_WARMUP=True).test_app():
+        for _ in range(100):
+            if builds:
+                break
+            await asyncio.sleep(0.01)
+        assert len(builds) == 1
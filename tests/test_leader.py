@@ -0,0 +1,72 @@
+import asyncio
+from typing import Any, List
+
+import pytest
+
+from app.backend.services import leader
+from app.backend.services.leader import LeaderLease, campaign
+
+
+def test_one_holder_at_a_time_until_released_or_expired(
+    tmp_path: Any, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    clock = [1000.0]
+    monkeypatch.setattr(leader.time, "time", lambda: clock[0])
+    path = str(tmp_path / "db.sqlite")
+    first, second = LeaderLease(path, "scheduler"), LeaderLease(path, "scheduler")
+    assert first.try_acquire()
+    assert not second.try_acquire()
+    # Renewing our own lease keeps it
+    assert first.try_acquire()
+
+    first.release()
+    assert second.try_acquire()
+
+    third = LeaderLease(path, "scheduler")
+    clock[0] += second.ttl - 1
+    assert not third.try_acquire()
+    clock[0] += 2
+    assert third.try_acquire()
+    # Leases with other names are independent
+    other = LeaderLease(path, "other")
+    assert other.try_acquire()
+    for lease in (second, third, other):
+        lease.release()
+
+
+async def wait_for_events(events: List[str], count: int) -> None:
+    for _ in range(500):
+        if len(events) >= count:
+            return
+        await asyncio.sleep(0.01)
+
+
+async def test_leadership_passes_on_when_the_leader_stops(tmp_path: Any) -> None:
+    path = str(tmp_path / "db.sqlite")
+    events: List[str] = []
+
+    def worker(name: str) -> "asyncio.Task[None]":
+        async def on_elected() -> None:
+            events.append(f"{name} elected")
+
+        async def on_deposed() -> None:
+            events.append(f"{name} deposed")
+
+        # Far longer than the test, so only a release can hand the lease over
+        lease = LeaderLease(path, "scheduler", ttl=60)
+        return asyncio.create_task(campaign(lease, on_elected, on_deposed, interval=0.01))
+
+    first = worker("first")
+    await wait_for_events(events, 1)
+    second = worker("second")
+    await asyncio.sleep(0.05)
+    assert events == ["first elected"]
+
+    first.cancel()
+    await asyncio.gather(first, return_exceptions=True)
+    await wait_for_events(events, 3)
+    assert events == ["first elected", "first deposed", "second elected"]
+
+    second.cancel()
+    await asyncio.gather(second, return_exceptions=True)
+    assert events[-1] == "second deposed"
@@ -0,0 +1,45 @@
+from quart.typing import TestClientProtocol as Client
+
+
+async def test_etag_answers_unchanged_lists_with_304(client: Client) -> None:
+    await client.post("/api/tasks/", json={"title": "a"})
+
+    response = await client.get("/api/tasks/")
+    etag = response.headers["ETag"]
+    response = await client.get("/api/tasks/", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert await response.get_data() == b""
+
+    # A different query is a different representation
+    response = await client.get("/api/tasks/?limit=1", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+
+    # Any change gives the list a new tag
+    await client.post("/api/tasks/", json={"title": "b"})
+    response = await client.get("/api/tasks/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert len(await response.get_json()) == 2
+
+
+async def test_cursor_pages_through_filtered_records(client: Client) -> None:
+    for i in range(5):
+        response = await client.post("/api/tasks/", json={"title": str(i)})
+        if i % 2:
+            await client.post(f"/api/tasks/{(await response.get_json())['id']}/complete")
+
+    titles = []
+    url = "/api/tasks/?status=pending&limit=2&fields=title"
+    while True:
+        response = await client.get(url)
+        titles += [task["title"] for task in await response.get_json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            assert "Link" not in response.headers
+            break
+        assert f"cursor={cursor}" in response.headers["Link"]
+        url = f"/api/tasks/?status=pending&limit=2&fields=title&cursor={cursor}"
+    assert titles == ["0", "2", "4"]
+
+    response = await client.get("/api/tasks/?cursor=next")
+    assert response.status_code == 400
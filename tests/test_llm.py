@@ -0,0 +1,62 @@
+from typing import Any, Dict, List
+
+import pytest
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from app.backend.services.llm import ScriptedChatModel, create_llm
+
+
+def tool(name: str) -> Dict[str, Any]:
+    return {"type": "function", "function": {"name": name, "parameters": {}}}
+
+
+TOOLS = [tool("store_memory"), tool("schedule_goal"), tool("search_memories")]
+
+
+def tool_calls(message: Any) -> List[str]:
+    return [call["function"]["name"] for call in message.additional_kwargs["tool_calls"]]
+
+
+async def test_scripted_model_asks_for_tools_then_answers_with_their_results() -> None:
+    llm = create_llm({"LLM_BACKEND": "fake"})
+    assert isinstance(llm, ScriptedChatModel)
+    request = HumanMessage(content="Remember that my goal is to run a marathon")
+    reply = await llm.ainvoke([request], tools=TOOLS)
+    assert tool_calls(reply) == ["store_memory", "schedule_goal"]
+    # Replies only depend on the messages
+    assert (await llm.ainvoke([request], tools=TOOLS)) == reply
+
+    results = [
+        ToolMessage(content="Stored.", tool_call_id="1"),
+        ToolMessage(content="Scheduled.", tool_call_id="2"),
+    ]
+    answer = await llm.ainvoke([request, reply, *results], tools=TOOLS)
+    assert answer.content == "Stored. Scheduled."
+
+
+async def test_scripted_model_only_calls_tools_it_was_given() -> None:
+    llm = create_llm({"LLM_BACKEND": "fake"})
+    reply = await llm.ainvoke([HumanMessage(content="Plan my week")], tools=[tool("web_search")])
+    assert reply == AIMessage(content="Noted: Plan my week")
+
+
+async def test_scripted_model_passes_answer_tokens_to_callbacks() -> None:
+    tokens: List[str] = []
+
+    class Collect(AsyncCallbackHandler):
+        async def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+            tokens.append(token)
+
+    llm = create_llm({"LLM_BACKEND": "fake"}, callbacks=[Collect()])
+    await llm.ainvoke([HumanMessage(content="Plan my week")], tools=[])
+    assert tokens == ["Noted: ", "Plan ", "my ", "week"]
+
+
+def test_openai_backend_streams_only_when_asked(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    config = {"LLM_BACKEND": "openai", "LLM_MODEL": "gpt-4o-mini"}
+    assert getattr(create_llm(config), "streaming") is False
+    assert getattr(create_llm(config, streaming=True), "streaming") is True
+    with pytest.raises(ValueError):
+        create_llm({"LLM_BACKEND": "unknown"})
@@ -0,0 +1,47 @@
+from quart.typing import TestClientProtocol as Client
+
+from app.backend.services.metrics import Counter, Histogram
+
+
+def sample(text: str, series: str) -> float:
+    """The value of one series in Prometheus text output, 0 if absent."""
+    for line in text.splitlines():
+        if line.startswith(series + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def test_histogram_renders_cumulative_buckets() -> None:
+    histogram = Histogram("job_seconds", "Job time.", ("job",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value, "compact")
+    text = "\n".join(histogram.render())
+    assert "# TYPE job_seconds histogram" in text
+    assert sample(text, 'job_seconds_bucket{job="compact",le="0.1"}') == 1
+    assert sample(text, 'job_seconds_bucket{job="compact",le="1"}') == 3
+    assert sample(text, 'job_seconds_bucket{job="compact",le="+Inf"}') == 4
+    assert sample(text, 'job_seconds_count{job="compact"}') == 4
+    assert sample(text, 'job_seconds_sum{job="compact"}') == 6.05
+
+
+def test_label_values_are_escaped() -> None:
+    counter = Counter("tokens_total", "Tokens.", ("model",))
+    counter.inc(2, 'say "hi"\n')
+    assert 'tokens_total{model="say \\"hi\\"\\n"} 2' in counter.render()
+
+
+async def test_requests_are_timed_by_route_and_status(client: Client) -> None:
+    series = (
+        "http_request_duration_seconds_count"
+        '{method="GET",route="/api/tasks/<int:task_id>",status="404"}'
+    )
+    before = sample(await (await client.get("/api/metrics")).get_data(as_text=True), series)
+    for task_id in (41, 42):
+        await client.get(f"/api/tasks/{task_id}")
+
+    response = await client.get("/api/metrics")
+    assert response.content_type.startswith("text/plain")
+    text = await response.get_data(as_text=True)
+    assert sample(text, series) == before + 2
+    # The metrics request itself is the one in flight
+    assert sample(text, "http_requests_in_flight") == 1
@@ -0,0 +1,67 @@
+from datetime import datetime
+
+import orjson
+import pytest
+
+from app.backend.services.records import CheckIn, Goal, Status, Task, to_status
+
+
+def test_task_round_trips_through_storage() -> None:
+    task = Task(
+        id=7,
+        title="Write report",
+        estimated_duration=45,
+        status="in_progress",
+        created_at="2024-03-01T09:00:00",
+        started_at="2024-03-01T09:30:00.250000",
+    )
+    assert task.status is Status.IN_PROGRESS
+    assert task.created_at == datetime(2024, 3, 1, 9)
+
+    stored = orjson.loads(orjson.dumps(task.to_storage()))
+    assert "id" not in stored
+    loaded = Task.from_row(7, stored)
+    assert loaded == task
+    assert orjson.loads(orjson.dumps(loaded.to_dict())) == {
+        "id": 7,
+        "title": "Write report",
+        "description": "",
+        "estimated_duration": 45,
+        "status": "in_progress",
+        "created_at": "2024-03-01T09:00:00",
+        "started_at": "2024-03-01T09:30:00.250000",
+        "completed_at": None,
+        "check_in_time": None,
+    }
+
+
+def test_non_canonical_times_are_kept_as_given() -> None:
+    goal = Goal(deadline="2024-05-01", created_at="2024-03-01T09:00:00+02:00")
+    assert goal.deadline == "2024-05-01"
+    assert goal.created_at == "2024-03-01T09:00:00+02:00"
+    assert Goal.from_row(1, goal.to_storage()).to_dict()["deadline"] == "2024-05-01"
+
+
+def test_rows_with_other_fields_go_through_from_dict() -> None:
+    checkin = CheckIn.from_row(3, {"task_id": 1, "notes": "ok", "legacy": True})
+    assert checkin.id == 3
+    assert checkin.notes == "ok"
+    assert checkin.status is Status.IN_PROGRESS
+
+
+def test_dict_style_access_converts_values() -> None:
+    task = Task(id=1)
+    task.update({"status": "completed", "completed_at": "2024-03-01T10:00:00"})
+    assert task["status"] is Status.COMPLETED
+    assert task.get("completed_at") == datetime(2024, 3, 1, 10)
+    assert task.get("missing", "default") == "default"
+
+
+def test_unknown_statuses_are_rejected() -> None:
+    assert to_status("pending") is Status.PENDING
+    with pytest.raises(ValueError):
+        to_status("done")
+    with pytest.raises(ValueError):
+        Task(id=1, status="done")
+    with pytest.raises(ValueError):
+        Task.from_row(1, {**Task(id=1).to_storage(), "status": None})
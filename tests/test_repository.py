@@ -0,0 +1,47 @@
+from typing import List
+
+from app.backend.services.records import Status, Task
+from app.backend.services.repository import Repository
+
+
+async def test_indexes_follow_updates_and_deletes() -> None:
+    tasks = Repository(Task, indexes=("status",))
+    first = await tasks.insert(Task(title="a"))
+    second = await tasks.insert({"title": "b", "status": "completed"})
+    assert [t.id for t in tasks.all()] == [1, 2]
+    assert tasks.find("status", Status.PENDING) == [first]
+
+    await tasks.update(first.id, {"status": Status.COMPLETED})
+    assert tasks.find("status", Status.PENDING) == []
+    assert sorted(t.id for t in tasks.find("status", Status.COMPLETED)) == [1, 2]
+
+    await tasks.delete(first.id)
+    assert tasks.get(first.id) is None
+    assert tasks.find("status", Status.COMPLETED) == [second]
+    # IDs are not reused after a delete
+    assert (await tasks.insert(Task(title="c"))).id == 3
+
+
+async def test_page_returns_a_cursor_until_the_last_match() -> None:
+    tasks = Repository(Task)
+    await tasks.insert_many(Task(title=str(i)) for i in range(5))
+    page, cursor = tasks.page(limit=2)
+    assert [t.id for t in page] == [1, 2] and cursor == 2
+    page, cursor = tasks.page(after=cursor, limit=2)
+    assert [t.id for t in page] == [3, 4] and cursor == 4
+    page, cursor = tasks.page(after=cursor, limit=2)
+    assert [t.id for t in page] == [5] and cursor is None
+
+
+async def test_listeners_see_every_change() -> None:
+    tasks = Repository(Task)
+    changed: List[str] = []
+    removed: List[int] = []
+    tasks.listeners.append(lambda task: changed.append(task.title))
+    tasks.removal_listeners.append(lambda task: removed.append(task.id))
+    task = await tasks.insert(Task(title="a"))
+    await tasks.update(task.id, {"title": "b"})
+    await tasks.delete(task.id)
+    assert changed == ["a", "b"]
+    assert removed == [task.id]
+    assert tasks.version == 3
@@ -0,0 +1,66 @@
+from quart.typing import TestClientProtocol as Client
+
+from app.backend.services.response_cache import ResponseCache
+
+
+def test_exact_and_similar_messages_hit() -> None:
+    cache = ResponseCache(similarity_threshold=0.8)
+    cache.put("What should I focus on this week?", "Your goals.", cache.generation)
+    assert cache.get("what should i focus on this week") == "Your goals."
+    assert cache.get("This week, what should I focus on?") == "Your goals."
+    assert cache.get("Tell me a story about dragons") is None
+    # Too short to be answered without context
+    cache.put("do it", "Done.", cache.generation)
+    assert cache.get("do it") is None
+
+
+def test_messages_with_numbers_only_match_exactly() -> None:
+    cache = ResponseCache(similarity_threshold=0.5)
+    cache.put("remind me to stretch at 5pm", "At 5pm.", cache.generation)
+    assert cache.get("Remind me to stretch at 5pm!") == "At 5pm."
+    assert cache.get("remind me to stretch at 6pm") is None
+
+
+def test_entries_expire_and_the_least_recently_used_is_evicted() -> None:
+    cache = ResponseCache(max_entries=2, ttl_seconds=0)
+    cache.put("first question here", "1", cache.generation)
+    assert cache.get("first question here") is None
+    assert len(cache) == 0
+
+    cache = ResponseCache(max_entries=2)
+    cache.put("first question here", "1", cache.generation)
+    cache.put("second question here", "2", cache.generation)
+    cache.get("first question here")
+    cache.put("third question here", "3", cache.generation)
+    assert cache.get("second question here") is None
+    assert cache.get("first question here") == "1"
+    assert cache.get("third question here") == "3"
+
+
+def test_answers_from_before_an_invalidation_are_not_stored() -> None:
+    cache = ResponseCache()
+    generation = cache.generation
+    cache.put("what are my tasks", "None yet.", generation)
+    cache.invalidate()
+    assert cache.get("what are my tasks") is None
+    cache.put("what are my tasks", "None yet.", generation)
+    assert cache.get("what are my tasks") is None
+
+
+async def test_repeated_first_messages_are_answered_from_the_cache(client: Client) -> None:
+    message = {"message": "what do you know about my habits"}
+    first = await (await client.post("/api/assistant/message", json=message)).get_json()
+    second = await (await client.post("/api/assistant/message", json=message)).get_json()
+    assert (first["cached"], second["cached"]) == (False, True)
+    assert second["response"] == first["response"]
+
+    opted_out = {**message, "cache": False}
+    reply = await (await client.post("/api/assistant/message", json=opted_out)).get_json()
+    assert reply["cached"] is False
+
+
+async def test_answers_that_changed_state_are_not_cached(client: Client) -> None:
+    message = {"message": "remember that I water the plants on sunday"}
+    for _ in range(2):
+        reply = await (await client.post("/api/assistant/message", json=message)).get_json()
+        assert reply["cached"] is False
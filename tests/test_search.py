@@ -0,0 +1,157 @@
+import asyncio
+import json
+from typing import Any, Callable, Coroutine, List
+
+import httpx
+import pytest
+
+from app.backend.services import search, tools
+from app.backend.services.search import (
+    SearchResult,
+    TavilyProvider,
+    WebSearch,
+    create_search,
+    format_results,
+)
+from app.backend.services.tokens import count_tokens
+
+Handler = Callable[[httpx.Request], Coroutine[None, None, httpx.Response]]
+
+
+def results(*titles: str) -> httpx.Response:
+    return httpx.Response(
+        200,
+        json={
+            "results": [
+                {"title": title, "url": f"https://example.com/{title}", "content": "text"}
+                for title in titles
+            ]
+        },
+    )
+
+
+def web_search(handler: Handler, **options: Any) -> WebSearch:
+    """A `WebSearch` on Tavily whose requests go to `handler`."""
+    web = WebSearch(TavilyProvider("key", "https://search.test/search"), **options)
+    web._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return web
+
+
+async def test_identical_queries_share_one_request() -> None:
+    queries: List[str] = []
+    release = asyncio.Event()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        queries.append(json.loads(request.content)["query"])
+        await release.wait()
+        return results("asyncio")
+
+    web = web_search(handler)
+    pending = asyncio.gather(
+        web.search("Python  asyncio"),
+        web.search("python asyncio"),
+        web.search(" PYTHON asyncio "),
+    )
+    await asyncio.sleep(0)
+    release.set()
+    first, second, third = await pending
+
+    assert queries == ["Python  asyncio"]
+    assert first == second == third
+    assert "1. asyncio (https://example.com/asyncio)" in first
+    # Different punctuation is a different search
+    await web.search("python asyncio?")
+    assert len(queries) == 2
+    await web.aclose()
+
+
+async def test_cache_entries_expire_and_the_least_recent_is_evicted(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    clock = [1000.0]
+    monkeypatch.setattr(search.time, "monotonic", lambda: clock[0])
+    queries: List[str] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        queries.append(json.loads(request.content)["query"])
+        return results("page")
+
+    web = web_search(handler, ttl_seconds=60, max_entries=2)
+    await web.search("a")
+    await web.search("b")
+    await web.search("a")
+    assert queries == ["a", "b"]
+
+    # "b" is the least recently used, so "c" evicts it
+    await web.search("c")
+    await web.search("a")
+    await web.search("b")
+    assert queries == ["a", "b", "c", "b"]
+
+    clock[0] += 61
+    await web.search("b")
+    assert queries == ["a", "b", "c", "b", "b"]
+    await web.aclose()
+
+
+def test_results_are_trimmed_to_the_token_budget() -> None:
+    long_results = [
+        SearchResult(title=f"Result {number}", url="https://example.com", content="word " * 200)
+        for number in range(3)
+    ]
+    text = format_results("query", long_results, max_tokens=120)
+    assert text.startswith("Web results for 'query':")
+    assert "1. Result 0" in text
+    assert "Result 1" not in text
+    # Pieces are counted separately, which can round up by a token at the join
+    assert count_tokens(text) <= 121
+
+    assert format_results("query", [], max_tokens=120) == "No web results for 'query'."
+
+
+async def test_failed_searches_raise_and_are_not_cached() -> None:
+    calls = [0]
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls[0] += 1
+        await asyncio.sleep(0)
+        if calls[0] == 1:
+            return httpx.Response(500)
+        return results("page")
+
+    web = web_search(handler)
+    failed = await asyncio.gather(web.search("q"), web.search("q"), return_exceptions=True)
+    assert calls[0] == 1
+    assert all(isinstance(error, httpx.HTTPStatusError) for error in failed)
+
+    assert "1. page" in await web.search("q")
+    assert calls[0] == 2
+    await web.aclose()
+
+
+async def test_web_search_tool_reports_errors(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(search, "searcher", None)
+    assert "not configured" in await tools.web_search("q")
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("unreachable", request=request)
+
+    web = web_search(handler)
+    monkeypatch.setattr(search, "searcher", web)
+    assert await tools.web_search("q") == "Error searching the web: unreachable"
+    await web.aclose()
+
+
+def test_create_search_needs_a_key_and_a_known_provider(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("TAVILY_API_KEY", raising=False)
+    assert create_search({}) is None
+
+    monkeypatch.setenv("TAVILY_API_KEY", "key")
+    web = create_search({"SEARCH_API_URL": "http://localhost:9000", "SEARCH_CACHE_SIZE": 3})
+    assert web is not None
+    assert isinstance(web.provider, TavilyProvider)
+    assert web.provider.url == "http://localhost:9000"
+    assert web.max_entries == 3
+
+    with pytest.raises(ValueError):
+        create_search({"SEARCH_PROVIDER": "bing"})
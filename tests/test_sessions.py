@@ -0,0 +1,64 @@
+import asyncio
+from typing import List
+
+from langchain_core.messages import BaseMessage
+from quart.typing import TestClientProtocol as Client
+
+from app.backend.blueprints import assistant
+from app.backend.services.sessions import SessionStore
+
+
+def test_history_is_trimmed_to_the_token_budget() -> None:
+    store = SessionStore(history_tokens=30)
+    session = store.get("a")
+    for i in range(20):
+        store.save_turn(session, f"question number {i}", f"answer number {i}")
+    assert 0 < session.tokens <= 30
+    # The most recent exchange is the one kept
+    assert session.history()[-1].content == "answer number 19"
+
+
+def test_least_recently_used_and_idle_sessions_are_dropped() -> None:
+    store = SessionStore(max_sessions=2, idle_seconds=60)
+    first = store.get("a")
+    store.get("b")
+    store.get("a")
+    store.get("c")
+    assert len(store) == 2
+    assert store.get("a") is first
+
+    first.last_used -= 120
+    store.get("c")
+    assert store.get("a") is not first
+
+
+async def test_dropped_history_is_folded_into_a_summary() -> None:
+    folded: List[int] = []
+
+    async def summarize(summary: str, messages: List[BaseMessage]) -> str:
+        folded.append(len(messages))
+        return f"{summary} {len(messages)} messages".strip()
+
+    store = SessionStore(history_tokens=30, summarizer=summarize, summarize_after_tokens=1)
+    session = store.get("a")
+    for i in range(10):
+        store.save_turn(session, f"question number {i}", f"answer number {i}")
+    await asyncio.gather(*store._summaries)
+
+    assert folded and session.summary
+    assert str(session.history()[0].content).startswith("Summary of the earlier conversation")
+
+
+async def test_session_id_carries_history_between_turns(client: Client) -> None:
+    response = await client.post("/api/assistant/message", json={"message": "hello"})
+    session_id = (await response.get_json())["session_id"]
+    assert response.headers["X-Session-ID"] == session_id
+
+    await client.post(
+        "/api/assistant/message", json={"message": "and again", "session_id": session_id}
+    )
+    assert len(assistant.sessions.get(session_id).history()) == 4
+
+    # Requests without an ID get a fresh session each
+    response = await client.post("/api/assistant/message", json={"message": "hello"})
+    assert (await response.get_json())["session_id"] != session_id
@@ -0,0 +1,84 @@
+import gzip
+from pathlib import Path
+
+from quart.typing import TestClientProtocol as Client
+
+from app.backend.services.static_assets import IMMUTABLE, REVALIDATE, StaticAssets
+
+SCRIPT = b"console.log('hello');\n" * 50
+
+
+def test_files_are_loaded_with_their_compressed_variants(tmp_path: Path) -> None:
+    (tmp_path / "assets").mkdir()
+    (tmp_path / "index.html").write_bytes(b"<html></html>")
+    (tmp_path / "assets" / "app-AbCd_123.js").write_bytes(SCRIPT)
+    (tmp_path / "assets" / "app-AbCd_123.js.map").write_bytes(b"{}")
+    (tmp_path / "assets" / "lib-12345678.js").write_bytes(SCRIPT)
+    # Precompressed by the build (marked to tell it apart): used as it is, and not
+    # served as a file of its own
+    prebuilt = gzip.compress(SCRIPT, mtime=0)[:-1] + b"!"
+    (tmp_path / "assets" / "lib-12345678.js.gz").write_bytes(prebuilt)
+    assets = StaticAssets(str(tmp_path))
+    assets.load()
+
+    assert assets.get("assets/lib-12345678.js.gz") is None
+    lib = assets.get("assets/lib-12345678.js")
+    assert lib is not None and lib.encoded["gzip"] == prebuilt
+
+    script = assets.get("assets/app-AbCd_123.js")
+    assert script is not None
+    assert script.cache_control == IMMUTABLE
+    assert gzip.decompress(script.encoded["gzip"]) == SCRIPT
+
+    # Too small to be worth compressing
+    index = assets.get("index.html")
+    assert index is not None
+    assert (index.mimetype, index.cache_control, index.encoded) == ("text/html", REVALIDATE, {})
+    source_map = assets.get("assets/app-AbCd_123.js.map")
+    assert source_map is not None and source_map.mimetype == "application/json"
+
+
+async def test_assets_are_served_compressed_and_revalidated(client: Client) -> None:
+    plain = await client.get("/assets/index-9_sxcfan.js")
+    assert plain.status_code == 200
+    assert plain.headers["Cache-Control"] == IMMUTABLE
+    assert plain.headers["Vary"] == "Accept-Encoding"
+    assert "Content-Encoding" not in plain.headers
+    body = await plain.get_data(as_text=False)
+
+    compressed = await client.get(
+        "/assets/index-9_sxcfan.js", headers={"Accept-Encoding": "gzip, deflate"}
+    )
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert compressed.headers["ETag"] != plain.headers["ETag"]
+    assert gzip.decompress(await compressed.get_data(as_text=False)) == body
+
+    for response in (plain, compressed):
+        etag = response.headers["ETag"]
+        cached = await client.get(
+            "/assets/index-9_sxcfan.js",
+            headers={"If-None-Match": etag, "Accept-Encoding": "gzip"},
+        )
+        assert cached.status_code == 304
+        assert await cached.get_data() == b""
+
+    missing = await client.get("/assets/missing-12345678.js")
+    assert missing.status_code == 404
+
+
+async def test_client_routes_get_the_index_page(client: Client) -> None:
+    index = await client.get("/")
+    assert index.status_code == 200
+    assert index.headers["Cache-Control"] == REVALIDATE
+    assert index.mimetype == "text/html"
+    page = await index.get_data()
+
+    route = await client.get("/goals/3")
+    assert route.status_code == 200
+    assert await route.get_data() == page
+
+    assert (await client.get("/vite.svg")).mimetype == "image/svg+xml"
+    assert (await client.get("/missing.png")).status_code == 404
+    api = await client.get("/api/missing")
+    assert api.status_code == 404
+    assert await api.get_json() == {"error": "API endpoint not found"}
@@ -0,0 +1,47 @@
+import asyncio
+from typing import List
+
+from quart.typing import TestClientProtocol as Client
+
+from app.backend.services.agent import async_tool
+from tests.test_assistant import parse_sse
+
+
+async def test_tool_calls_time_out_with_an_error_message() -> None:
+    async def slow_lookup(query: str) -> str:
+        await asyncio.sleep(1)
+        return query
+
+    tool = async_tool(slow_lookup, "Look something up slowly", timeout=0.01)
+    result = await tool.ainvoke({"query": "tea"})
+    assert result == "Error: slow_lookup timed out after 0.01 seconds."
+
+
+async def test_concurrent_calls_are_limited_per_tool() -> None:
+    running: List[int] = [0]
+    peak: List[int] = [0]
+
+    async def lookup(query: str) -> str:
+        running[0] += 1
+        peak[0] = max(peak[0], running[0])
+        await asyncio.sleep(0.01)
+        running[0] -= 1
+        return query
+
+    tool = async_tool(lookup, "Look something up", max_concurrency=2)
+    results = await asyncio.gather(*(tool.ainvoke({"query": str(i)}) for i in range(6)))
+    assert results == [str(i) for i in range(6)]
+    assert peak[0] == 2
+
+
+async def test_tool_calls_from_one_turn_run_concurrently(client: Client) -> None:
+    message = {"message": "remember that my goal is to run a marathon"}
+    response = await client.post("/api/assistant/message/stream", json=message)
+    tool_events = [
+        (name, data["tool"])
+        for name, data in parse_sse(await response.get_data())
+        if name.startswith("tool_")
+    ]
+    # Both calls start before either has finished
+    assert [name for name, _ in tool_events] == ["tool_start", "tool_start", "tool_end", "tool_end"]
+    assert {tool for _, tool in tool_events} == {"store_memory", "schedule_goal"}
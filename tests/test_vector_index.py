@@ -0,0 +1,56 @@
+from typing import Any, List
+
+import numpy as np
+import pytest
+
+from app.backend.services.embeddings import HashingEmbedder
+from app.backend.services.vector_index import VectorIndex
+
+
+def open_index(tmp_path: Any, capacity: int = 4) -> VectorIndex:
+    return VectorIndex(
+        str(tmp_path / "vectors.npy"),
+        str(tmp_path / "keys.jsonl"),
+        HashingEmbedder(dim=64),
+        capacity=capacity,
+    )
+
+
+def test_search_returns_the_closest_keys_after_growing(tmp_path: Any) -> None:
+    index = open_index(tmp_path, capacity=2)
+    index.add(["tea", "run", "bills"], ["I like green tea", "Run on sundays", "Pay the bills"])
+    index.add(["tea"], ["I like black tea"])
+    assert len(index) == 3
+    assert index.search("black tea please", k=1)[0][0] == "tea"
+
+    reopened = open_index(tmp_path)
+    assert [key for key, _ in reopened.search("sundays run", k=3)][0] == "run"
+    assert len(reopened) == 3
+
+
+def test_rows_are_on_disk_before_their_keys(tmp_path: Any, monkeypatch: pytest.MonkeyPatch) -> None:
+    index = open_index(tmp_path)
+    index.add(["a"], ["first"])
+    keys_at_flush: List[str] = []
+    flush = np.memmap.flush
+
+    def record_flush(self: np.memmap) -> None:
+        keys_at_flush.append((tmp_path / "keys.jsonl").read_text())
+        flush(self)
+
+    monkeypatch.setattr(np.memmap, "flush", record_flush)
+    index.add(["b"], ["second"])
+    assert keys_at_flush == ['"a"\n']
+    assert (tmp_path / "keys.jsonl").read_text() == '"a"\n"b"\n'
+
+
+def test_torn_keys_file_is_repaired_on_load(tmp_path: Any) -> None:
+    index = open_index(tmp_path)
+    index.add(["a", "b"], ["first", "second"])
+    with open(tmp_path / "keys.jsonl", "a") as f:
+        f.write('"c')
+
+    reopened = open_index(tmp_path)
+    assert len(reopened) == 2 and "c" not in reopened
+    reopened.add(["c"], ["third"])
+    assert len(open_index(tmp_path)) == 3